@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Asyncio Batch Engine - Concurrent platform sweeps
+Per-platform concurrency limits + Same result shapes as the scrape_*_user functions
+
+The platform scrapers are blocking (requests / Selenium), so every job runs in a
+worker thread while an asyncio semaphore bounds how many run at once per platform.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Max simultaneous scrapes per platform.
+# Override with SCRAPER_CONCURRENCY_<PLATFORM>, e.g. SCRAPER_CONCURRENCY_LEETCODE=6
+DEFAULT_CONCURRENCY = {
+    'leetcode': 4,
+    'codechef': 2,    # Chrome-backed, keep low
+    'codeforces': 4,
+    'github': 6,
+    'codolio': 2,     # Chrome-backed, keep low
+}
+FALLBACK_CONCURRENCY = 2
+
+
+def get_platform_concurrency(platform):
+    """Concurrency limit for a platform (env override wins over the default)"""
+    default = DEFAULT_CONCURRENCY.get(platform, FALLBACK_CONCURRENCY)
+    value = os.getenv(f'SCRAPER_CONCURRENCY_{platform.upper()}')
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            logger.warning(f"Invalid SCRAPER_CONCURRENCY_{platform.upper()}={value!r}, using {default}")
+    return default
+
+
+class BatchEngine:
+    """Run blocking per-item jobs concurrently with a per-platform limit"""
+
+    def __init__(self, concurrency=None):
+        self.concurrency = dict(concurrency or {})
+
+    def limit_for(self, platform):
+        """Effective concurrency for a platform"""
+        if platform in self.concurrency:
+            return max(1, int(self.concurrency[platform]))
+        return get_platform_concurrency(platform)
+
+    async def run_platform_async(self, platform, job, items):
+        """
+        Run job(item) for every item, at most limit_for(platform) at a time.
+        Returns a list of (item, result, error) tuples in input order.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        limit = self.limit_for(platform)
+        semaphore = asyncio.Semaphore(limit)
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f'{platform}-batch')
+
+        async def run_one(item):
+            async with semaphore:
+                try:
+                    result = await loop.run_in_executor(executor, job, item)
+                    return item, result, None
+                except Exception as e:
+                    logger.error(f"[BatchEngine] {platform} job failed: {e}")
+                    return item, None, e
+
+        started = time.monotonic()
+        try:
+            results = await asyncio.gather(*(run_one(item) for item in items))
+        finally:
+            executor.shutdown(wait=True)
+
+        elapsed = time.monotonic() - started
+        logger.info(f"[BatchEngine] {platform}: {len(items)} jobs in {elapsed:.1f}s (concurrency {limit})")
+        return results
+
+    async def run_platforms_async(self, batches):
+        """
+        Run several platforms side by side, each under its own limit.
+        batches: {platform: (job, items)} -> {platform: [(item, result, error), ...]}
+        """
+        platforms = list(batches)
+        outcomes = await asyncio.gather(*(
+            self.run_platform_async(platform, *batches[platform]) for platform in platforms
+        ))
+        return dict(zip(platforms, outcomes))
+
+    def run_platform(self, platform, job, items):
+        """Blocking wrapper around run_platform_async"""
+        return asyncio.run(self.run_platform_async(platform, job, items))
+
+    def run_platforms(self, batches):
+        """Blocking wrapper around run_platforms_async"""
+        return asyncio.run(self.run_platforms_async(batches))
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Batch Refresh - Refresh a list of students (or a whole batch) on one platform
+Shared Mongo/HTTP/browser pools + Bounded concurrency + One bulk write + Per-student results
+
+Refreshing batch A from the staff UI used to mean one refresh_<platform>.py
+process per student: N interpreters, N Mongo connections and N Chromes.
+This runs the same refresh_student_platform() for every student in one
+process, at most SCRAPER_CONCURRENCY_<PLATFORM> at a time, collects each
+student's update and writes them all with a single unordered bulk_write:
+
+    python batch_refresh.py codechef --batch A
+    python batch_refresh.py leetcode <student_id> <student_id> ...
+
+Batches are the ones in import_students.BATCH_ASSIGNMENTS (plus any student
+whose stored `batch` matches). The scraper daemon serves the same thing as
+a job: POST /jobs/refresh-batch/<platform> {"studentIds": [...]} or {"batch": "A"}.
+"""
+
+import importlib
+import json
+import logging
+import os
+import sys
+import time
+
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from batch_engine import BatchEngine
+from import_students import BATCH_ASSIGNMENTS
+from refresh_jobs import current_job, report_progress
+from scraper_daemon import REFRESH_MODULES
+from write_behind import get_write_behind
+
+logger = logging.getLogger(__name__)
+
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/go-tracker')
+
+
+class QueuedUpdate:
+    """Stands in for the UpdateResult of an update waiting for the batch's bulk write"""
+    matched_count = 1
+    modified_count = 1
+
+
+def update_student(collection, writes, filter, update, upsert=False):
+    """
+    Write a refresh's {'$set': ...} update. A single refresh goes through the
+    write-behind buffer and waits for its flush (so it is grouped with other
+    refreshes in flight); when `writes` is a dict (batch refresh) the update is
+    queued under the student's id for the batch's bulk write instead.
+    """
+    if writes is None:
+        result = get_write_behind().update(collection, filter, update['$set'], upsert=upsert, wait=True)
+        if result.error:
+            raise RuntimeError(result.error)
+        return result
+    writes[str(filter['_id'])] = UpdateOne(filter, update, upsert=upsert)
+    return QueuedUpdate()
+
+
+def resolve_student_ids(students_collection, student_ids=None, batch=None):
+    """Student ids to refresh: the given ids, or every active student in `batch`"""
+    if student_ids:
+        return [str(student_id) for student_id in dict.fromkeys(student_ids)]
+    if not batch:
+        raise ValueError('Give student ids or a batch name')
+    batch = batch.strip().upper()
+    roll_numbers = [roll for roll, name in BATCH_ASSIGNMENTS.items() if name == batch]
+    students = students_collection.find(
+        {'$or': [{'rollNumber': {'$in': roll_numbers}}, {'batch': batch}], 'isActive': {'$ne': False}},
+        {'_id': 1}
+    )
+    student_ids = [str(student['_id']) for student in students]
+    if not student_ids:
+        raise ValueError(f"No students found for batch '{batch}'")
+    return student_ids
+
+
+def refresh_batch(platform, student_ids=None, batch=None, db=None, engine=None, slots=None):
+    """
+    Refresh `platform` for several students and write the results in one bulk
+    operation. Returns {success, platform, batch, total, succeeded, failed,
+    results: [{studentId, success, username, error, durationMs}]}.
+
+    `slots` is a semaphore every scrape holds while it runs; the scraper daemon
+    passes its per-platform one so batch jobs and single refreshes together
+    stay within SCRAPER_CONCURRENCY_<PLATFORM>.
+    """
+    if platform not in REFRESH_MODULES:
+        raise ValueError(f"Unknown platform '{platform}'")
+    module = importlib.import_module(REFRESH_MODULES[platform])
+
+    client = None
+    if db is None:
+        client = MongoClient(MONGO_URI)
+        db = client['go-tracker']
+    try:
+        students = db['students']
+        student_ids = resolve_student_ids(students, student_ids, batch)
+        total = len(student_ids)
+        logger.info(f"[BatchRefresh] Refreshing {platform} for {total} students (batch {batch or '-'})")
+        report_progress('fetching', platform=platform, total=total)
+
+        job = current_job()
+        writes = {}
+        results = {}
+
+        def refresh_one(student_id):
+            started = time.monotonic()
+            error = None
+            try:
+                if slots is None:
+                    data = module.refresh_student_platform(student_id, db=db, writes=writes)
+                else:
+                    with slots:
+                        data = module.refresh_student_platform(student_id, db=db, writes=writes)
+            except Exception as e:
+                data, error = None, str(e)
+            results[student_id] = {
+                'studentId': student_id,
+                'success': bool(data),
+                'username': data.get('username') if isinstance(data, dict) else None,
+                'error': error or (None if data else f"{platform} refresh failed"),
+                'durationMs': round((time.monotonic() - started) * 1000),
+            }
+            if job is not None:
+                job.publish('student', studentId=student_id, success=bool(data), done=len(results), total=total)
+
+        (engine or BatchEngine()).run_platform(platform, refresh_one, student_ids)
+
+        # One unordered bulk write for every student that scraped successfully
+        report_progress('parsing', queued=len(writes))
+        queued = [student_id for student_id in student_ids if student_id in writes]
+        write_errors = {}
+        if queued:
+            try:
+                students.bulk_write([writes[student_id] for student_id in queued], ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get('writeErrors', []):
+                    write_errors[queued[error['index']]] = error.get('errmsg', 'write failed')
+            except Exception as e:
+                logger.error(f"[BatchRefresh] Bulk write for {platform} failed: {e}")
+                write_errors = {student_id: str(e) for student_id in queued}
+        for student_id, message in write_errors.items():
+            results[student_id].update(success=False, error=f"Failed to update MongoDB: {message}")
+
+        ordered = [results[student_id] for student_id in student_ids]
+        succeeded = sum(1 for result in ordered if result['success'])
+        report_progress('written', written=len(queued) - len(write_errors), failed=total - succeeded)
+        logger.info(f"[BatchRefresh] {platform}: {succeeded}/{total} refreshed, "
+                    f"{len(queued) - len(write_errors)} written in one bulk write")
+        return {
+            'success': succeeded == total,
+            'platform': platform,
+            'batch': batch,
+            'total': total,
+            'succeeded': succeeded,
+            'failed': total - succeeded,
+            'results': ordered,
+        }
+    finally:
+        if client:
+            client.close()
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) < 2 or (args[1] == '--batch' and len(args) != 3):
+        print("Usage: python batch_refresh.py <platform> --batch <A|B|C|D|NON-CRT>")
+        print("       python batch_refresh.py <platform> <student_id> [<student_id> ...]")
+        sys.exit(1)
+
+    platform = args[0]
+    if args[1] == '--batch':
+        summary = refresh_batch(platform, batch=args[2])
+    else:
+        summary = refresh_batch(platform, student_ids=args[1:])
+
+    print(f"\n{'=' * 60}")
+    print(f"🏁 {platform} batch refresh: {summary['succeeded']}/{summary['total']} refreshed")
+    for result in summary['results']:
+        status = '✅' if result['success'] else '❌'
+        print(f"   {status} {result['studentId']} {result['username'] or ''} {result['error'] or ''}".rstrip())
+    print(f"{'=' * 60}")
+    print("\n📦 BATCH_RESULTS_JSON_START")
+    print(json.dumps(summary, default=str))
+    print("📦 BATCH_RESULTS_JSON_END\n")
+    sys.stdout.flush()
+    sys.exit(0 if summary['success'] else 1)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
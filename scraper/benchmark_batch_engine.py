@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark: platform sweep wall-time vs student count
+Sequential loop (old scrape_platform_batch) vs batch_engine.BatchEngine
+
+Runs against a local stand-in HTTP server so no real platform is contacted.
+Usage: python benchmark_batch_engine.py [--counts 60 600 6000] [--latency 0.05] [--concurrency 4]
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from batch_engine import BatchEngine
+
+# Mean of the old safe_delay() (uniform 2-5 s) paid after every student
+OLD_SAFE_DELAY_MEAN = 3.5
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers every GET with a small profile payload after a fixed latency"""
+    latency = 0.05
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        username = self.path.rsplit('/', 1)[-1]
+        body = json.dumps({
+            'username': username,
+            'totalSolved': len(username) * 7,
+            'rating': 1500,
+            'contestsAttended': 3
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MemoryStudents:
+    """Minimal stand-in for the students collection (update_one only)"""
+
+    def __init__(self):
+        self.docs = {}
+        self.lock = threading.Lock()
+
+    def update_one(self, query, update):
+        with self.lock:
+            self.docs.setdefault(query['_id'], {}).update(update['$set'])
+
+
+def start_stand_in_server(latency):
+    StandInHandler.latency = latency
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_job(base_url, students_collection, platform='leetcode'):
+    """Scrape one stand-in profile and write it to platforms.<platform>, like ProductionScraper"""
+    def job(student):
+        username = student['platformUsernames'][platform]
+        with urllib.request.urlopen(f"{base_url}/users/{username}", timeout=30) as response:
+            data = json.loads(response.read())
+        students_collection.update_one(
+            {'_id': student['_id']},
+            {'$set': {f'platforms.{platform}': {**data, 'updatedAt': datetime.utcnow()}}}
+        )
+        return 'success'
+    return job
+
+
+def make_students(count, platform='leetcode'):
+    return [
+        {'_id': i, 'name': f'Student {i}', 'platformUsernames': {platform: f'user{i:05d}'}}
+        for i in range(count)
+    ]
+
+
+def run_sequential(job, students):
+    started = time.monotonic()
+    for student in students:
+        job(student)
+    return time.monotonic() - started
+
+
+def run_engine(job, students, concurrency):
+    engine = BatchEngine({'leetcode': concurrency})
+    started = time.monotonic()
+    engine.run_platform('leetcode', job, students)
+    return time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch sweep wall-time')
+    parser.add_argument('--counts', type=int, nargs='+', default=[60, 600, 6000])
+    parser.add_argument('--latency', type=float, default=0.05, help='stand-in server latency (s)')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--sequential-max', type=int, default=600,
+                        help='largest count to run sequentially; larger counts are extrapolated')
+    args = parser.parse_args()
+
+    server = start_stand_in_server(args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print("\n" + "=" * 78)
+    print("BATCH ENGINE BENCHMARK (local stand-in server)")
+    print("=" * 78)
+    print(f"Latency: {args.latency * 1000:.0f} ms/request | Engine concurrency: {args.concurrency}")
+    print(f"Old loop also slept {OLD_SAFE_DELAY_MEAN}s (mean safe_delay) after every student\n")
+    print(f"{'students':>9} | {'sequential':>11} | {'+safe_delay':>12} | {'engine':>9} | {'speedup':>8}")
+    print("-" * 78)
+
+    per_student = None
+    try:
+        for count in args.counts:
+            students = make_students(count)
+
+            if count <= args.sequential_max or per_student is None:
+                sequential = run_sequential(make_job(base_url, MemoryStudents()), students)
+                per_student = sequential / count
+                sequential_label = f"{sequential:.1f}s"
+            else:
+                sequential = per_student * count
+                sequential_label = f"~{sequential:.1f}s"
+
+            with_delay = sequential + OLD_SAFE_DELAY_MEAN * count
+            engine = run_engine(make_job(base_url, MemoryStudents()), students, args.concurrency)
+            print(f"{count:>9} | {sequential_label:>11} | {with_delay:11.1f}s | {engine:8.1f}s | {with_delay / engine:7.1f}x")
+    finally:
+        server.shutdown()
+
+    print("-" * 78)
+    print("'~' = extrapolated from the measured per-student sequential time\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Browser Pool - Shared warm headless Chrome for Selenium scrapers
+Warm browsers + Fresh tab per lease + Recycling + Crash replacement
+
+Starting Chrome often costs more than the page load itself, so the CodeChef,
+Codolio and Codeforces-enhanced scrapers lease a tab on an already running
+browser instead of launching their own:
+
+    with get_browser_pool().lease() as driver:
+        driver.get(url)
+
+A browser is recycled after BROWSER_MAX_PAGES leases or once its process tree
+has grown by BROWSER_MAX_MEMORY_GROWTH_MB (needs psutil), and replaced when
+it stops responding.
+"""
+
+import atexit
+import logging
+import os
+import platform
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from selenium import webdriver  # type: ignore
+    from selenium.webdriver.chrome.options import Options  # type: ignore
+    from selenium.webdriver.chrome.service import Service  # type: ignore
+    from selenium.common.exceptions import WebDriverException  # type: ignore
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+    WebDriverException = Exception
+
+try:
+    from webdriver_manager.chrome import ChromeDriverManager  # type: ignore
+except ImportError:
+    ChromeDriverManager = None
+
+try:
+    import psutil  # type: ignore
+except ImportError:
+    psutil = None
+
+from batch_engine import get_platform_concurrency
+
+logger = logging.getLogger(__name__)
+
+# One browser per concurrent Selenium scrape, so CodeChef and Codolio running
+# at their full SCRAPER_CONCURRENCY_<PLATFORM> never wait on each other for a lease
+SELENIUM_PLATFORMS = ('codechef', 'codolio')
+BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE') or
+                        sum(get_platform_concurrency(name) for name in SELENIUM_PLATFORMS))
+BROWSER_MAX_PAGES = int(os.getenv('BROWSER_MAX_PAGES', '50'))
+BROWSER_MAX_MEMORY_GROWTH_MB = int(os.getenv('BROWSER_MAX_MEMORY_GROWTH_MB', '300'))
+BROWSER_LEASE_TIMEOUT = int(os.getenv('BROWSER_LEASE_TIMEOUT', '120'))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+def resolve_chromedriver_path():
+    """
+    Install/locate ChromeDriver with ChromeDriverManager and make sure the path is
+    the executable (some versions return the directory or a LICENSE file).
+    Returns None when webdriver_manager is unavailable (Selenium Manager then decides).
+    """
+    if ChromeDriverManager is None:
+        return None
+
+    driver_path = ChromeDriverManager().install()
+    executable = 'chromedriver.exe' if platform.system() == 'Windows' else 'chromedriver'
+
+    if os.path.isdir(driver_path):
+        candidate = os.path.join(driver_path, executable)
+        if os.path.exists(candidate):
+            driver_path = candidate
+        else:
+            for file in os.listdir(driver_path):
+                if file in ('chromedriver.exe', 'chromedriver'):
+                    driver_path = os.path.join(driver_path, file)
+                    break
+    elif os.path.basename(driver_path) != executable:
+        candidate = os.path.join(os.path.dirname(driver_path), executable)
+        if os.path.exists(candidate):
+            driver_path = candidate
+
+    if not os.path.exists(driver_path):
+        raise FileNotFoundError(f"ChromeDriver executable not found at: {driver_path}")
+    return driver_path
+
+
+def chrome_options(headless=True):
+    options = Options()
+    if headless:
+        options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_argument(f'--user-agent={USER_AGENT}')
+    return options
+
+
+def create_chrome_driver():
+    """Start one Chrome; falls back to non-headless if headless mode fails"""
+    if not SELENIUM_AVAILABLE:
+        raise RuntimeError("Selenium is not installed")
+
+    driver_path = resolve_chromedriver_path()
+    service_kwargs = {'service': Service(driver_path)} if driver_path else {}
+
+    try:
+        return webdriver.Chrome(options=chrome_options(headless=True), **service_kwargs)
+    except Exception as headless_error:
+        logger.warning(f"[BrowserPool] Headless Chrome failed: {headless_error}, trying non-headless")
+        if driver_path:
+            service_kwargs = {'service': Service(driver_path)}
+        try:
+            return webdriver.Chrome(options=chrome_options(headless=False), **service_kwargs)
+        except Exception as fallback_error:
+            raise Exception(f"Both headless and non-headless modes failed. "
+                            f"Headless: {headless_error}. Fallback: {fallback_error}")
+
+
+class PooledBrowser:
+    """One running Chrome plus its usage counters"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.started = time.monotonic()
+        self.base_handle = driver.current_window_handle
+        self.baseline_memory = self.memory_mb()
+
+    def memory_mb(self):
+        """RSS of chromedriver + Chrome processes, or None without psutil"""
+        if psutil is None:
+            return None
+        try:
+            root = psutil.Process(self.driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes if p.is_running()) / (1024 * 1024)
+        except Exception:
+            return None
+
+    def is_alive(self):
+        try:
+            self.driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def open_tab(self):
+        """Fresh tab for the next lease; the base tab stays open so the session survives"""
+        self.driver.switch_to.window(self.base_handle)
+        self.driver.switch_to.new_window('tab')
+        self.pages += 1
+        return self.driver
+
+    def close_tab(self):
+        # delete_all_cookies() only reaches the current page's domain, so it has
+        # to run on the working tab before it closes, not on the blank base tab
+        for handle in self.driver.window_handles:
+            if handle != self.base_handle:
+                self.driver.switch_to.window(handle)
+                self.driver.delete_all_cookies()
+                self.driver.close()
+        self.driver.switch_to.window(self.base_handle)
+
+    def needs_recycle(self):
+        if self.pages >= BROWSER_MAX_PAGES:
+            return f'{self.pages} pages served'
+        current = self.memory_mb()
+        if current is not None and self.baseline_memory is not None:
+            growth = current - self.baseline_memory
+            if growth >= BROWSER_MAX_MEMORY_GROWTH_MB:
+                return f'memory grew {growth:.0f}MB'
+        return None
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.debug(f"[BrowserPool] Error closing browser: {e}")
+
+
+class BrowserPool:
+    """Up to `size` warm Chrome instances, each leased to one caller at a time"""
+
+    def __init__(self, size=BROWSER_POOL_SIZE):
+        self.size = max(1, size)
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(self.size)
+        self.lock = threading.Lock()
+        self.closed = False
+        self.stats = {'launched': 0, 'leases': 0, 'recycled': 0, 'crashed': 0, 'launch_seconds': 0.0}
+
+    def _launch(self):
+        started = time.monotonic()
+        browser = PooledBrowser(create_chrome_driver())
+        elapsed = time.monotonic() - started
+        with self.lock:
+            self.stats['launched'] += 1
+            self.stats['launch_seconds'] += elapsed
+        logger.info(f"[BrowserPool] Chrome started in {elapsed:.1f}s")
+        return browser
+
+    def warm(self, count=None):
+        """Start browsers ahead of time so the first leases don't pay for startup"""
+        for _ in range(min(count or self.size, self.size) - self.idle.qsize()):
+            if not self.slots.acquire(blocking=False):
+                break
+            try:
+                self.idle.put(self._launch())
+            finally:
+                self.slots.release()
+
+    def acquire(self, timeout=BROWSER_LEASE_TIMEOUT):
+        """Check out a browser with a fresh tab open. Pair with release()"""
+        if self.closed:
+            raise RuntimeError("Browser pool is closed")
+        if not self.slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No browser free after {timeout}s (pool size {self.size})")
+
+        try:
+            browser = None
+            while browser is None:
+                try:
+                    browser = self.idle.get_nowait()
+                except queue.Empty:
+                    browser = self._launch()
+                    break
+                if not browser.is_alive():
+                    logger.warning("[BrowserPool] Replacing crashed browser")
+                    with self.lock:
+                        self.stats['crashed'] += 1
+                    browser.quit()
+                    browser = None
+
+            browser.open_tab()
+            with self.lock:
+                self.stats['leases'] += 1
+            return browser
+        except Exception:
+            self.slots.release()
+            raise
+
+    def release(self, browser, healthy=None):
+        """
+        Return a browser; unhealthy or worn-out browsers are quit instead of reused.
+        healthy=None checks whether the browser still responds.
+        """
+        try:
+            if healthy is None:
+                healthy = browser.is_alive()
+            reason = None
+            if healthy:
+                try:
+                    browser.close_tab()
+                except Exception as e:
+                    reason = f'tab cleanup failed: {e}'
+                reason = reason or browser.needs_recycle()
+            else:
+                reason = 'crashed during lease'
+
+            if reason or self.closed:
+                if reason:
+                    logger.info(f"[BrowserPool] Recycling browser ({reason})")
+                    with self.lock:
+                        self.stats['recycled' if healthy else 'crashed'] += 1
+                browser.quit()
+            else:
+                self.idle.put(browser)
+        finally:
+            self.slots.release()
+
+    @contextmanager
+    def lease(self, timeout=BROWSER_LEASE_TIMEOUT):
+        """Context manager yielding a WebDriver positioned on a fresh tab"""
+        browser = self.acquire(timeout)
+        healthy = True
+        try:
+            yield browser.driver
+        except WebDriverException:
+            healthy = None  # find out whether the browser itself died
+            raise
+        finally:
+            self.release(browser, healthy)
+
+    def shutdown(self):
+        self.closed = True
+        while True:
+            try:
+                self.idle.get_nowait().quit()
+            except queue.Empty:
+                break
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        stats['idle'] = self.idle.qsize()
+        stats['size'] = self.size
+        if stats['launched']:
+            stats['avg_launch_seconds'] = round(stats['launch_seconds'] / stats['launched'], 2)
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """Process-wide BrowserPool (closed automatically at exit)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -7,14 +7,21 @@ Safe + Rate Limited + Comprehensive Data Extraction
 
 import requests  # type: ignore
 import time
-import random
 import logging
 import re
 import json
 import traceback
-import platform
 from datetime import datetime, timezone, timedelta
 
+import http_client
+from rate_governor import get_governor
+from contest_index import get_contest_index
+from browser_pool import get_browser_pool
+from page_readiness import (
+    PAGE_READY_DEADLINE, PageDeadline, wait_until, record_time_to_ready,
+    elements_present, count_stable, document_complete
+)
+
 # #region agent log
 try:
     log_path = r"c:\Users\inbat\Downloads\GO_TRACKER\.cursor\debug.log"
@@ -50,28 +57,8 @@ except: pass
 # #endregion agent log
 
 try:
-    # #region agent log
-    try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"sessionId":"debug-session","runId":"pre-fix","hypothesisId":"A","location":"codechef_scraper.py:46","message":"Before selenium.webdriver import","data":{"timestamp":int(time.time()*1000)}})+'\n')
-    except: pass
-    # #endregion agent log
-    
-    from selenium import webdriver  # type: ignore
-    # #region agent log
-    try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"sessionId":"debug-session","runId":"pre-fix","hypothesisId":"A","location":"codechef_scraper.py:46","message":"selenium.webdriver import succeeded","data":{"timestamp":int(time.time()*1000)}})+'\n')
-    except: pass
-    # #endregion agent log
-    
     from selenium.webdriver.common.by import By  # type: ignore
-    from selenium.webdriver.chrome.options import Options  # type: ignore
-    from selenium.webdriver.chrome.service import Service  # type: ignore
-    from selenium.webdriver.support.ui import WebDriverWait  # type: ignore
-    from selenium.webdriver.support import expected_conditions as EC  # type: ignore
     from selenium.common.exceptions import TimeoutException  # type: ignore
-    from webdriver_manager.chrome import ChromeDriverManager  # type: ignore
     SELENIUM_AVAILABLE = True
     # #region agent log
     try:
@@ -97,9 +84,8 @@ logger = logging.getLogger(__name__)
 # Constants
 DEFAULT_TIMEOUT = 15
 DEFAULT_RETRIES = 3
-HEATMAP_WAIT_TIME = 2
-SELENIUM_RENDER_WAIT = 3
-PAGE_LOAD_TIMEOUT = 60  # Increased from 30 to 60 seconds for slow connections
+IMPLICIT_WAIT = 2  # Readiness waits (page_readiness.py) cover rendering; keep missing-selector probes cheap
+PAGE_LOAD_TIMEOUT = PAGE_READY_DEADLINE  # A timed-out load continues with what rendered; readiness waits get their own budget
 SCRIPT_TIMEOUT = 30  # Timeout for JavaScript execution
 
 # Compiled regex patterns for better performance
@@ -120,20 +106,22 @@ def safe_request(url, headers=None, timeout=15, retries=3):
             'Upgrade-Insecure-Requests': '1'
         }
     
+    governor = get_governor()
+    
     for attempt in range(retries):
         try:
-            # Random delay to avoid rate limiting
-            if attempt > 0:
-                time.sleep(random.uniform(2, 4))
+            # Wait for codechef.com's rate budget
+            governor.acquire(url)
             
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = http_client.get(url, headers=headers, timeout=timeout)
+            paused = governor.observe(url, response)
             
             if response.status_code == 200:
                 return response
             elif response.status_code == 429:  # Rate limited
-                wait_time = 2 ** attempt * 5
-                logger.warning(f"CodeChef rate limited, waiting {wait_time}s before retry {attempt + 1}")
-                time.sleep(wait_time)
+                logger.warning(f"CodeChef rate limited, retry {attempt + 1} after the governor's pause")
+                if not paused:
+                    governor.backoff(url, attempt, base=5)
                 continue
             elif response.status_code == 404:
                 logger.warning(f"CodeChef user not found: {url}")
@@ -427,10 +415,41 @@ def extract_contests_from_html(soup):
     
     return 0
 
+def _extract_embedded_daily_submissions(soup):
+    """
+    Daily submission counts embedded in the static HTML as
+    userDailySubmissionsStats = [{"date": "2024-1-5", "value": 3}, ...].
+    Returns {YYYY-MM-DD: count}, empty when the page doesn't embed it.
+    """
+    counts = {}
+    for script in soup.find_all('script'):
+        text = script.string or ''
+        if 'userDailySubmissionsStats' not in text:
+            continue
+        match = re.search(r'userDailySubmissionsStats\s*=\s*(\[[\s\S]*?\])\s*;', text)
+        if not match:
+            continue
+        try:
+            entries = json.loads(match.group(1))
+        except json.JSONDecodeError:
+            logger.debug("[Submissions] Could not parse userDailySubmissionsStats")
+            continue
+        for entry in entries:
+            try:
+                day = datetime.strptime(str(entry.get('date', '')), '%Y-%m-%d').strftime('%Y-%m-%d')
+                count = int(entry.get('value', 0) or 0)
+            except (ValueError, TypeError, AttributeError):
+                continue
+            if count > 0:
+                counts[day] = counts.get(day, 0) + count
+        break
+    return counts
+
 def extract_submissions_from_heatmap(soup):
     """
     Universal submission heatmap extraction
-    Handles the heatmap container and SVG structure
+    Handles the heatmap container and SVG structure, or the daily
+    submission data embedded in the static HTML
     """
     result = {
         'totalSubmissions': 0,
@@ -513,13 +532,30 @@ def extract_submissions_from_heatmap(soup):
                 logger.info(f"[Submissions] Extracted {total_submissions} total submissions from {len(submissions_by_date)} days")
         else:
             logger.debug("[Submissions] Heatmap container not found")
+        
+        # Static HTML has no rendered rects; fall back to the embedded daily data
+        if result['totalSubmissions'] == 0:
+            embedded = _extract_embedded_daily_submissions(soup)
+            if embedded:
+                submissions_by_date = [
+                    {'date': day, 'count': count, 'category': 0}
+                    for day, count in sorted(embedded.items())
+                ]
+                total_submissions = sum(embedded.values())
+                result['totalSubmissions'] = total_submissions
+                result['submissionHeatmap'] = submissions_by_date
+                result['submissionByDate'] = dict(embedded)
+                result['submissionStats']['daysWithSubmissions'] = len(submissions_by_date)
+                result['submissionStats']['maxDailySubmissions'] = max(embedded.values())
+                result['submissionStats']['avgDailySubmissions'] = round(total_submissions / len(submissions_by_date), 2)
+                logger.info(f"[Submissions] Extracted {total_submissions} total submissions from embedded daily data")
     
     except Exception as e:
         logger.warning(f"Error extracting submission data: {e}")
     
     return result
 
-def extract_submissions_from_heatmap_selenium(driver):
+def extract_submissions_from_heatmap_selenium(driver, deadline=None):
     """
     Extract submission heatmap data using Selenium (for JS-rendered content)
     This function directly accesses DOM elements after JavaScript has rendered them
@@ -538,31 +574,18 @@ def extract_submissions_from_heatmap_selenium(driver):
     try:
         logger.info("[Selenium-Heatmap] Waiting for heatmap to render...")
         
-        # Wait for heatmap container to be present
+        # Ready once the heatmap's day rects exist and JS has stopped adding them
+        if not wait_until(driver, elements_present(".heatmap-content, #js-heatmap"),
+                          'codechef.heatmap_container', timeout=15, deadline=deadline):
+            logger.warning(f"[Selenium-Heatmap] Heatmap container not found")
+            return result
+        # Scroll to heatmap in case it renders lazily
         try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.ID, "js-heatmap"))
-            )
-            # Additional wait for JavaScript to populate data attributes (increased wait time)
-            time.sleep(HEATMAP_WAIT_TIME + 2)
-            
-            # Scroll to heatmap to ensure it's fully rendered
-            try:
-                heatmap_element = driver.find_element(By.ID, "js-heatmap")
-                driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", heatmap_element)
-                time.sleep(1)
-            except:
-                pass
-        except (Exception, TimeoutException) as e:
-            # Try alternative selectors
-            try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".heatmap-content, #js-heatmap"))
-                )
-                time.sleep(HEATMAP_WAIT_TIME + 2)
-            except (Exception, TimeoutException) as e2:
-                logger.warning(f"[Selenium-Heatmap] Heatmap container not found: {e2}")
-                return result
+            driver.execute_script("document.querySelector('#js-heatmap, .heatmap-content').scrollIntoView({block: 'center'});")
+        except Exception:
+            pass
+        wait_until(driver, count_stable('rect[data-count]'), 'codechef.heatmap_rects',
+                   timeout=15, deadline=deadline)
         
         # METHOD 1: Extract using Selenium WebElements directly
         try:
@@ -756,11 +779,29 @@ def extract_submissions_from_heatmap_selenium(driver):
         logger.error(f"[Selenium-Heatmap] Error extracting submission data: {e}")
         return result
 
-def scrape_with_beautifulsoup(url_or_username):
+def _codechef_sections_found(soup):
+    """
+    Fields whose section is present in the static HTML, so a 0 there is the
+    user's real value (unrated, nothing solved) rather than a parse miss
+    """
+    found = set()
+    if soup.find('div', class_='rating-number') or any(
+            script.string and 'allrating' in script.string.lower() for script in soup.find_all('script')):
+        found.add('rating')
+    if soup.find(class_='problems-solved') or re.search(r'problems\s+solved[:\s]+\d', soup.get_text(), re.IGNORECASE):
+        found.add('totalSolved')
+    return found
+
+def scrape_with_beautifulsoup(url_or_username, include_contest_history=False, contest_limit=10, found=None):
     """
     Primary scraping method using BeautifulSoup (fast, lightweight)
     Enhanced error handling with retries and better exception catching
     Accepts either URL or username
+    
+    Reads rating, stars, highest rating (allrating graph data), solved counts,
+    heatmap (embedded daily data) and, with include_contest_history, the
+    contest list from the static HTML of a single request. `found` (a set)
+    receives the fields whose section the page actually had.
     """
     # Normalize input to get URL and username
     profile_url, username = normalize_codechef_input(url_or_username)
@@ -1129,8 +1170,16 @@ def scrape_with_beautifulsoup(url_or_username):
         except Exception as e:
             logger.warning(f"Error extracting profile info for {username}: {e}")
         
+        # Contest history from the same HTML (allrating graph data + problems-solved section)
+        if include_contest_history:
+            result['recentContests'] = extract_contest_history_from_html(soup, username, contest_limit)
+        
+        sections = _codechef_sections_found(soup)
+        if found is not None:
+            found.update(sections)
+        
         # Validate data
-        if result['rating'] == 0 and result['totalSolved'] == 0:
+        if result['rating'] == 0 and result['totalSolved'] == 0 and not sections:
             logger.warning(f"[BeautifulSoup] No meaningful data found for CodeChef user {username} - might be invalid user or page structure changed")
             # Check if we got any data at all
             if result.get('name') or result.get('country') or result.get('institution'):
@@ -1151,11 +1200,14 @@ def scrape_with_beautifulsoup(url_or_username):
         traceback.print_exc()
         return None
 
-def scrape_with_selenium(url_or_username):
+def scrape_with_selenium(url_or_username, include_contest_history=False, contest_limit=10):
     """
     Fallback scraping method using Selenium (for JS-heavy content)
-    Enhanced with better ChromeDriver setup for Windows
+    Runs on a tab leased from the shared browser pool (browser_pool.py)
     Accepts either URL or username
+    
+    With include_contest_history the contest history is read from the same
+    page load (result['recentContests']), so no second browser/page is needed.
     """
     # Normalize input to get URL and username
     profile_url, username = normalize_codechef_input(url_or_username)
@@ -1168,85 +1220,14 @@ def scrape_with_selenium(url_or_username):
         logger.error(f"[Selenium] Cannot scrape {username} - Selenium not installed")
         return None
     
-    driver = None
+    browser = None
     try:
         logger.info(f"[Selenium] Scraping CodeChef for {username} (URL: {profile_url})")
         
-        # Setup Chrome options - Clean setup per friend's recommendation
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")  # Optional: run without GUI
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")  # Avoid GPU errors
-        
-        # Use ChromeDriverManager to automatically install and manage ChromeDriver
-        # DO NOT manually use cached paths or license files
+        # Lease a tab on a warm Chrome from the shared pool
         try:
-            logger.info(f"[Selenium] Setting up ChromeDriver using ChromeDriverManager...")
-            logger.info(f"[Selenium] System architecture: {platform.machine()}, OS: {platform.system()}")
-            
-            # Use ChromeDriverManager - it handles path resolution correctly
-            driver_path = ChromeDriverManager().install()
-            logger.info(f"[Selenium] ChromeDriver installed at: {driver_path}")
-            
-            # Verify the path points to an executable, not a license file
-            import os
-            if os.path.isdir(driver_path):
-                # If it returns a directory, find chromedriver.exe/chromedriver
-                if platform.system() == 'Windows':
-                    driver_exe = os.path.join(driver_path, 'chromedriver.exe')
-                else:
-                    driver_exe = os.path.join(driver_path, 'chromedriver')
-                
-                if os.path.exists(driver_exe):
-                    driver_path = driver_exe
-                    logger.info(f"[Selenium] Found ChromeDriver executable: {driver_path}")
-                else:
-                    # Search for executable in directory
-                    for file in os.listdir(driver_path):
-                        if file == 'chromedriver.exe' or file == 'chromedriver':
-                            driver_path = os.path.join(driver_path, file)
-                            logger.info(f"[Selenium] Found ChromeDriver executable: {driver_path}")
-                            break
-            elif not driver_path.endswith('.exe') and platform.system() == 'Windows':
-                # If path doesn't end with .exe, it might be wrong file
-                # Try to find chromedriver.exe in the same directory
-                driver_dir = os.path.dirname(driver_path)
-                driver_exe = os.path.join(driver_dir, 'chromedriver.exe')
-                if os.path.exists(driver_exe):
-                    driver_path = driver_exe
-                    logger.info(f"[Selenium] Corrected ChromeDriver path to: {driver_path}")
-            
-            # Verify the executable exists
-            if not os.path.exists(driver_path):
-                raise FileNotFoundError(f"ChromeDriver executable not found at: {driver_path}")
-            
-            logger.info(f"[Selenium] Using ChromeDriver at: {driver_path}")
-            
-            # Create service with the driver path
-            service = Service(driver_path)
-            
-            # Try to initialize Chrome with headless mode first
-            try:
-                driver = webdriver.Chrome(service=service, options=chrome_options)
-                logger.info("[Selenium] ✅ ChromeDriver initialized successfully (headless mode)")
-            except Exception as headless_error:
-                # If headless fails, try without headless as fallback
-                logger.warning(f"[Selenium] Headless mode failed: {headless_error}")
-                logger.info("[Selenium] Trying non-headless mode as fallback...")
-                
-                # Create new options without headless
-                chrome_options_no_headless = Options()
-                chrome_options_no_headless.add_argument("--no-sandbox")
-                chrome_options_no_headless.add_argument("--disable-dev-shm-usage")
-                chrome_options_no_headless.add_argument("--disable-gpu")
-                
-                try:
-                    driver = webdriver.Chrome(service=service, options=chrome_options_no_headless)
-                    logger.info("[Selenium] ✅ ChromeDriver initialized successfully (non-headless mode)")
-                except Exception as fallback_error:
-                    raise Exception(f"Both headless and non-headless modes failed. Headless: {headless_error}. Fallback: {fallback_error}")
-            
+            browser = get_browser_pool().acquire()
+            driver = browser.driver
         except Exception as e:
             error_msg = f"[Selenium] ChromeDriver initialization failed: {str(e)}"
             logger.error(error_msg)
@@ -1261,7 +1242,7 @@ def scrape_with_selenium(url_or_username):
         # Set timeouts
         driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
         driver.set_script_timeout(SCRIPT_TIMEOUT)
-        driver.implicitly_wait(10)  # Implicit wait for elements
+        driver.implicitly_wait(IMPLICIT_WAIT)
         
         # Execute script to hide webdriver
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
@@ -1269,26 +1250,21 @@ def scrape_with_selenium(url_or_username):
         # Navigate to profile (using the normalized URL)
         try:
             logger.info(f"[Selenium] Navigating to {profile_url}...")
+            get_governor().acquire(profile_url)
             driver.get(profile_url)
             logger.info(f"[Selenium] Page loaded successfully")
         except TimeoutException as page_timeout:
             logger.warning(f"[Selenium] Page load timeout after {PAGE_LOAD_TIMEOUT}s, but continuing...")
             # Continue anyway - page might have partially loaded
         
-        # Wait for key elements to load with longer timeout
-        try:
-            logger.info(f"[Selenium] Waiting for rating-number element...")
-            WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "rating-number"))
-            )
+        # Readiness budget starts once navigation returns, as in the Codolio scraper
+        deadline = PageDeadline()
+        # Wait until the rating header has rendered and the document has finished loading
+        logger.info(f"[Selenium] Waiting for rating-number element...")
+        if wait_until(driver, elements_present('.rating-number'), 'codechef.rating', timeout=20, deadline=deadline):
             logger.info(f"[Selenium] Rating element found")
-        except TimeoutException:
-            logger.warning(f"[Selenium] Timeout waiting for rating-number element, trying to continue...")
-            # Try to continue anyway - might still be able to extract some data
-        
-        # Additional wait for JS to render
-        logger.info(f"[Selenium] Waiting {SELENIUM_RENDER_WAIT}s for JavaScript to render...")
-        time.sleep(SELENIUM_RENDER_WAIT)
+        wait_until(driver, document_complete, 'codechef.document', timeout=10, deadline=deadline)
+        record_time_to_ready('codechef.profile_page', deadline.elapsed())
         
         # Get page source and parse with BeautifulSoup for universal extraction
         page_source = driver.page_source
@@ -1311,10 +1287,7 @@ def scrape_with_selenium(url_or_username):
             
             # Method 1: From rating graph JavaScript FIRST (most accurate)
             try:
-                # Wait a bit for JavaScript to render
-                time.sleep(2)
-                
-                # Extract using JavaScript execution
+                # Extract using JavaScript execution (allrating is inline in the page)
                 js_script = """
                 var maxRating = 0;
                 var scripts = document.getElementsByTagName('script');
@@ -1513,7 +1486,7 @@ def scrape_with_selenium(url_or_username):
         # Extract submission data - USING SELENIUM-SPECIFIC METHOD
         try:
             logger.info(f"[Selenium] Extracting submission data from heatmap (JS-rendered)...")
-            submission_data = extract_submissions_from_heatmap_selenium(driver)
+            submission_data = extract_submissions_from_heatmap_selenium(driver, deadline)
             result['totalSubmissions'] = submission_data['totalSubmissions']
             result['submissionHeatmap'] = submission_data['submissionHeatmap']
             result['submissionByDate'] = submission_data['submissionByDate']
@@ -1526,6 +1499,16 @@ def scrape_with_selenium(url_or_username):
         except Exception as e:
             logger.warning(f"[Selenium] Error extracting submission data: {e}")
         
+        # Extract contest history from the same page load
+        if include_contest_history:
+            try:
+                contest_history = extract_contest_history_selenium(driver, contest_limit, deadline)
+                if contest_history is None:
+                    contest_history = extract_contest_history_from_html(soup, username, contest_limit)
+                result['recentContests'] = contest_history
+            except Exception as e:
+                logger.warning(f"[Selenium] Error extracting contest history: {e}")
+        
         # Validate data
         if result['rating'] == 0 and result['totalSolved'] == 0:
             logger.warning(f"[Selenium] No meaningful data found for CodeChef user {username}")
@@ -1538,15 +1521,53 @@ def scrape_with_selenium(url_or_username):
         logger.error(f"[Selenium] Error scraping CodeChef for {username}: {e}")
         return None
     finally:
-        if driver:
-            try:
-                driver.quit()
-            except Exception as e:
-                logger.debug(f"Error closing driver: {e}")
+        if browser:
+            get_browser_pool().release(browser)
+
+# Fields the browser is asked for when the static HTML didn't have them,
+# and the result keys that travel with each of them
+SELENIUM_FIELD_GROUPS = {
+    'rating': ['rating', 'maxRating', 'stars', 'league', 'division', 'globalRank', 'countryRank'],
+    'totalSolved': ['totalSolved', 'problemsSolved', 'fullySolved', 'partiallySolved'],
+    'totalSubmissions': ['totalSubmissions', 'submissionHeatmap', 'submissionByDate', 'submissionStats'],
+    'recentContests': ['recentContests'],
+}
+
+def _missing_codechef_fields(result, include_contest_history, found=()):
+    """
+    Fields the HTTP pass could not fill and that are worth a browser load.
+    A zero is only missing when its section wasn't in the HTML (`found`).
+    """
+    missing = []
+    if not result.get('rating') and 'rating' not in found:
+        missing.append('rating')
+    if not result.get('totalSolved') and 'totalSolved' not in found:
+        missing.append('totalSolved')
+    # Anyone who solved something has submissions; zero means the heatmap wasn't in the HTML
+    if not result.get('totalSubmissions') and result.get('totalSolved'):
+        missing.append('totalSubmissions')
+    if include_contest_history and not result.get('recentContests') and result.get('contestsAttended'):
+        missing.append('recentContests')
+    return missing
+
+def _merge_missing_fields(result, browser_result, missing):
+    """Copy only the missing field groups (when the browser found them) into the HTTP result"""
+    filled = []
+    for field in missing:
+        if not browser_result.get(field):
+            continue
+        for key in SELENIUM_FIELD_GROUPS[field]:
+            if key in browser_result:
+                result[key] = browser_result[key]
+        filled.append(field)
+    if filled:
+        result['dataSource'] = 'codechef_bs4+selenium'
+    return filled
 
 def scrape_codechef_user(url_or_username, include_contest_history=True):
     """
-    Main scraping function - tries BeautifulSoup first, falls back to Selenium
+    Main scraping function - plain HTTP + BeautifulSoup first; a browser load
+    only when fields are still missing (and then only those fields are taken)
     Returns: dict with rating, solved problems, contests, etc.
     
     Args:
@@ -1564,41 +1585,56 @@ def scrape_codechef_user(url_or_username, include_contest_history=True):
     
     try:
         result = None
+        found = set()
         bs4_error = None
         selenium_error = None
         
-        # For CodeChef, skip BeautifulSoup since it's JS-heavy and can't extract data reliably
-        # Go directly to Selenium for better results
-        logger.info(f"[Main] Using Selenium directly for CodeChef (JS-heavy site)")
-        result = None
-        bs4_error = None
-        selenium_error = None
-        
-        # Try Selenium directly for CodeChef (primary method since it's JS-heavy)
-        if SELENIUM_AVAILABLE:
+        # Fast path: one HTTP request, parse the static HTML and embedded JSON
+        try:
+            result = scrape_with_beautifulsoup(url_or_username, include_contest_history=include_contest_history,
+                                               found=found)
+        except Exception as e:
+            bs4_error = str(e)
+            logger.error(f"[Main] ❌ BeautifulSoup failed: {e}")
+            result = None
+        
+        missing = _missing_codechef_fields(result, include_contest_history, found) if result else list(SELENIUM_FIELD_GROUPS)
+        if result and not missing:
+            logger.info(f"[Main] ✅ HTTP pass complete, no browser needed")
+        elif SELENIUM_AVAILABLE:
+            # Escalate to the browser only for what the static HTML lacked
+            logger.info(f"[Main] Escalating to Selenium for: {', '.join(missing)}")
             try:
-                result = scrape_with_selenium(url_or_username)
+                selenium_result = scrape_with_selenium(
+                    url_or_username,
+                    include_contest_history=include_contest_history and 'recentContests' in missing
+                )
                 
                 # Check if result contains an error
-                if isinstance(result, dict) and 'error' in result:
-                    selenium_error = result.get('error_message', result.get('error', 'Unknown error'))
+                if isinstance(selenium_result, dict) and 'error' in selenium_result:
+                    selenium_error = selenium_result.get('error_message', selenium_result.get('error', 'Unknown error'))
                     logger.error(f"[Main] ❌ Selenium driver error: {selenium_error}")
-                    result = None
-                elif result:
-                    logger.info(f"[Main] ✅ Selenium succeeded")
+                elif selenium_result:
+                    if result:
+                        filled = _merge_missing_fields(result, selenium_result, missing)
+                        logger.info(f"[Main] ✅ Selenium filled: {', '.join(filled) or 'nothing new'}")
+                    else:
+                        result = selenium_result
+                        logger.info(f"[Main] ✅ Selenium succeeded")
                 else:
                     logger.warning(f"[Main] ⚠️ Selenium returned None")
             except Exception as e:
                 selenium_error = str(e)
                 logger.error(f"[Main] ❌ Selenium failed: {e}")
                 logger.exception("Selenium error traceback:")
-                result = None
         else:
-            logger.warning(f"[Main] Selenium not available")
+            logger.warning(f"[Main] Selenium not available, keeping HTTP result")
         
         if not result:
             # If scraping failed, return structured error information
             error_summary = f"CodeChef scraping failed for {username}"
+            if bs4_error:
+                error_summary += f" | BeautifulSoup: {bs4_error[:100]}"
             if selenium_error:
                 error_summary += f" | Selenium: {selenium_error[:100]}"
             
@@ -1609,6 +1645,7 @@ def scrape_codechef_user(url_or_username, include_contest_history=True):
                 'error': 'scraping_failed',
                 'error_message': error_summary,
                 'username': username,
+                'bs4_error': bs4_error[:200] if bs4_error else None,
                 'selenium_error': selenium_error[:200] if selenium_error else None,
                 'selenium_available': SELENIUM_AVAILABLE
             }
@@ -1616,10 +1653,8 @@ def scrape_codechef_user(url_or_username, include_contest_history=True):
         # Add contest history with dates if requested
         if include_contest_history:
             try:
-                logger.info(f"[Main] Fetching contest history for {username}...")
-                # Always try Selenium for contest history if available (more reliable for CodeChef)
-                use_selenium_for_contests = SELENIUM_AVAILABLE
-                contest_history = get_codechef_contest_history(username, limit=10, use_selenium=use_selenium_for_contests)
+                # Already extracted from the profile page fetched above
+                contest_history = result.get('recentContests') or []
                 if contest_history:
                     result['recentContests'] = contest_history
                     result['contestHistory'] = contest_history  # Alias for compatibility
@@ -1674,493 +1709,420 @@ def scrape_codechef_user(url_or_username, include_contest_history=True):
         traceback.print_exc()
         return None
 
-def get_codechef_contest_history(username, limit=8, use_selenium=False):
+def extract_contest_history_selenium(driver, limit=8, deadline=None):
     """
-    Get detailed contest history for a user with dates and problems solved
-    Returns last 8 most recent contests in descending order (newest first)
+    Contest history (newest first) from an already loaded profile page in Selenium.
+    Returns a list, or None when neither the problems-solved section nor the
+    contest table could be read (callers then parse page_source instead).
     """
     try:
-        logger.info(f"Fetching contest history with dates and problems solved for {username} (limit: {limit}, use_selenium: {use_selenium})")
+        # Wait for the contest table (JS-rendered) or the problems-solved section,
+        # then for the rows to stop changing
+        contest_rows = ("table.user-contests tbody tr, table.dataTable tbody tr, "
+                        ".user-contests-table tbody tr, section.problems-solved div.content")
+        if wait_until(driver, elements_present(contest_rows), 'codechef.contests', timeout=15, deadline=deadline):
+            wait_until(driver, count_stable(contest_rows), 'codechef.contest_rows', timeout=5, deadline=deadline)
+            logger.info(f"[Contest History-Selenium] ✅ Contest table found")
+        else:
+            logger.warning(f"[Contest History-Selenium] Contest table not found, trying alternative selectors")
+        
+        # Try multiple table selectors
+        table = None
+        table_selectors = [
+            "table.user-contests",
+            "table.dataTable",
+            ".user-contests-table",
+            "table[class*='contest']",
+            "table tbody"
+        ]
         
-        # Try Selenium first if requested and available
-        if use_selenium and SELENIUM_AVAILABLE:
+        for selector in table_selectors:
             try:
-                logger.info(f"[Contest History] Attempting Selenium extraction for {username}")
-                driver = None
-                try:
-                    # Setup ChromeDriver (reuse logic from scrape_with_selenium)
-                    from selenium.webdriver.chrome.service import Service
-                    from selenium.webdriver.chrome.options import Options
-                    from webdriver_manager.chrome import ChromeDriverManager
-                    from selenium.webdriver.common.by import By
-                    from selenium.webdriver.support.ui import WebDriverWait
-                    from selenium.webdriver.support import expected_conditions as EC
-                    
-                    chrome_options = Options()
-                    chrome_options.add_argument("--headless")
-                    chrome_options.add_argument("--no-sandbox")
-                    chrome_options.add_argument("--disable-dev-shm-usage")
-                    chrome_options.add_argument("--disable-gpu")
-                    
-                    driver_path = ChromeDriverManager().install()
-                    # Handle path resolution (same logic as in scrape_with_selenium)
-                    import os
-                    if os.path.isdir(driver_path):
-                        if platform.system() == 'Windows':
-                            driver_exe = os.path.join(driver_path, 'chromedriver.exe')
-                        else:
-                            driver_exe = os.path.join(driver_path, 'chromedriver')
-                        if os.path.exists(driver_exe):
-                            driver_path = driver_exe
-                    elif not driver_path.endswith('.exe') and platform.system() == 'Windows':
-                        driver_dir = os.path.dirname(driver_path)
-                        driver_exe = os.path.join(driver_dir, 'chromedriver.exe')
-                        if os.path.exists(driver_exe):
-                            driver_path = driver_exe
-                    
-                    service = Service(driver_path)
-                    driver = webdriver.Chrome(service=service, options=chrome_options)
-                    
-                    # Set timeouts for contest history extraction
-                    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
-                    driver.set_script_timeout(SCRIPT_TIMEOUT)
-                    driver.implicitly_wait(10)
-                    
-                    profile_url = f"https://www.codechef.com/users/{username}"
-                    try:
-                        logger.info(f"[Contest History-Selenium] Navigating to {profile_url}...")
-                        driver.get(profile_url)
-                    except TimeoutException:
-                        logger.warning(f"[Contest History-Selenium] Page load timeout, but continuing...")
-                    
-                    # Wait for page to load with longer timeout
-                    try:
-                        WebDriverWait(driver, 25).until(
-                            EC.presence_of_element_located((By.CLASS_NAME, "rating-number"))
-                        )
-                    except TimeoutException:
-                        logger.warning(f"[Contest History-Selenium] Timeout waiting for rating-number, continuing anyway...")
-                    
-                    # Wait for contest table to render (JS-rendered)
-                    try:
-                        WebDriverWait(driver, 15).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "table.user-contests, table.dataTable, .user-contests-table"))
-                        )
-                        logger.info(f"[Contest History-Selenium] ✅ Contest table found")
-                    except TimeoutException:
-                        logger.warning(f"[Contest History-Selenium] Contest table not found, trying alternative selectors")
-                        # Try waiting a bit more for JS to render
-                        time.sleep(3)
-                    
-                    # Try multiple table selectors
-                    table = None
-                    table_selectors = [
-                        "table.user-contests",
-                        "table.dataTable",
-                        ".user-contests-table",
-                        "table[class*='contest']",
-                        "table tbody"
-                    ]
-                    
-                    for selector in table_selectors:
-                        try:
-                            table = driver.find_element(By.CSS_SELECTOR, selector)
-                            tbody = table.find_element(By.TAG_NAME, "tbody")
-                            if tbody:
-                                logger.info(f"[Contest History-Selenium] Found table with selector: {selector}")
-                                break
-                        except:
-                            continue
-                    
-                    if not table:
-                        logger.warning(f"[Contest History-Selenium] Could not find contest table, trying JavaScript extraction")
-                        # Fallback to JavaScript extraction
-                        js_script = """
-                        var contests = [];
-                        try {
-                            var scripts = document.getElementsByTagName('script');
-                            for (var i = 0; i < scripts.length; i++) {
-                                var scriptText = scripts[i].innerHTML || scripts[i].textContent || '';
-                                if (scriptText.indexOf('allrating') !== -1) {
-                                    var match = scriptText.match(/allrating\\s*=\\s*(\\[[\\s\\S]*?\\])/);
-                                    if (match) {
-                                        var jsonStr = match[1].replace(/'/g, '"').replace(/(\\w+):/g, '"$1":');
-                                        try {
-                                            var data = JSON.parse(jsonStr);
-                                            for (var j = 0; j < data.length && j < 10; j++) {
-                                                contests.push({
-                                                    contestCode: data[j].contest_code || data[j].code || '',
-                                                    name: data[j].contest_code ? data[j].contest_code.replace('START', 'Starters ').replace('COOK', 'Cook-Off ').replace('LTIME', 'Lunchtime ') : '',
-                                                    date: data[j].getdate || data[j].date || '',
-                                                    rating: data[j].rating || data[j].getrating || 0,
-                                                    rank: data[j].rank || data[j].getrank || 0,
-                                                    ratingChange: data[j].rating_change || data[j].change || 0
-                                                });
-                                            }
-                                            break;
-                                        } catch(e) {
-                                            console.log('JSON parse error:', e);
-                                        }
-                                    }
+                table = driver.find_element(By.CSS_SELECTOR, selector)
+                tbody = table.find_element(By.TAG_NAME, "tbody")
+                if tbody:
+                    logger.info(f"[Contest History-Selenium] Found table with selector: {selector}")
+                    break
+            except:
+                continue
+        
+        if not table:
+            logger.warning(f"[Contest History-Selenium] Could not find contest table, trying JavaScript extraction")
+            # Fallback to JavaScript extraction
+            js_script = """
+            var contests = [];
+            try {
+                var scripts = document.getElementsByTagName('script');
+                for (var i = 0; i < scripts.length; i++) {
+                    var scriptText = scripts[i].innerHTML || scripts[i].textContent || '';
+                    if (scriptText.indexOf('allrating') !== -1) {
+                        var match = scriptText.match(/allrating\\s*=\\s*(\\[[\\s\\S]*?\\])/);
+                        if (match) {
+                            var jsonStr = match[1].replace(/'/g, '"').replace(/(\\w+):/g, '"$1":');
+                            try {
+                                var data = JSON.parse(jsonStr);
+                                for (var j = 0; j < data.length && j < 10; j++) {
+                                    contests.push({
+                                        contestCode: data[j].contest_code || data[j].code || '',
+                                        name: data[j].contest_code ? data[j].contest_code.replace('START', 'Starters ').replace('COOK', 'Cook-Off ').replace('LTIME', 'Lunchtime ') : '',
+                                        date: data[j].getdate || data[j].date || '',
+                                        rating: data[j].rating || data[j].getrating || 0,
+                                        rank: data[j].rank || data[j].getrank || 0,
+                                        ratingChange: data[j].rating_change || data[j].change || 0
+                                    });
                                 }
+                                break;
+                            } catch(e) {
+                                console.log('JSON parse error:', e);
                             }
-                        } catch(e) {
-                            console.log('Error:', e);
                         }
-                        return contests;
-                        """
-                        selenium_contests = driver.execute_script(js_script)
-                        driver.quit()
-                        
-                        if selenium_contests and len(selenium_contests) > 0:
-                            logger.info(f"[Contest History-Selenium-JS] ✅ Found {len(selenium_contests)} contests from JavaScript")
-                            formatted_contests = []
-                            for contest in selenium_contests:
-                                date_str = contest.get('date', '')
-                                contest_date = None
-                                if date_str:
-                                    try:
-                                        if isinstance(date_str, (int, float)):
-                                            if date_str > 1e10:
-                                                contest_date = datetime.fromtimestamp(date_str / 1000, tz=timezone.utc).isoformat()
-                                            else:
-                                                contest_date = datetime.fromtimestamp(date_str, tz=timezone.utc).isoformat()
-                                        elif isinstance(date_str, str):
-                                            if '+' in date_str or date_str.count('-') >= 2:
-                                                contest_date = datetime.fromisoformat(date_str).isoformat()
-                                    except:
-                                        pass
-                                
-                                formatted_contests.append({
-                                    'contestCode': contest.get('contestCode', ''),
-                                    'name': contest.get('name', ''),
-                                    'date': contest_date or (datetime.now(timezone.utc) - timedelta(weeks=len(formatted_contests))).isoformat(),
-                                    'rating': int(contest.get('rating', 0)) if contest.get('rating') else 0,
-                                    'rank': int(contest.get('rank', 0)) if contest.get('rank') else 0,
-                                    'ratingChange': int(contest.get('ratingChange', 0)) if contest.get('ratingChange') else 0,
-                                    'problemsSolved': [],
-                                    'problemsCount': 0,
-                                    'attended': True
-                                })
-                            
-                            return formatted_contests[:limit]
-                        else:
-                            driver.quit()
-                            return []
+                    }
+                }
+            } catch(e) {
+                console.log('Error:', e);
+            }
+            return contests;
+            """
+            selenium_contests = driver.execute_script(js_script)
+            
+            if selenium_contests and len(selenium_contests) > 0:
+                logger.info(f"[Contest History-Selenium-JS] ✅ Found {len(selenium_contests)} contests from JavaScript")
+                formatted_contests = []
+                for contest in selenium_contests:
+                    date_str = contest.get('date', '')
+                    contest_date = None
+                    if date_str:
+                        try:
+                            if isinstance(date_str, (int, float)):
+                                if date_str > 1e10:
+                                    contest_date = datetime.fromtimestamp(date_str / 1000, tz=timezone.utc).isoformat()
+                                else:
+                                    contest_date = datetime.fromtimestamp(date_str, tz=timezone.utc).isoformat()
+                            elif isinstance(date_str, str):
+                                if '+' in date_str or date_str.count('-') >= 2:
+                                    contest_date = datetime.fromisoformat(date_str).isoformat()
+                        except:
+                            pass
                     
-                    # Extract problems solved from problems-solved section
-                    # OPTIMIZATION: Build contest history directly from problems-solved section (faster, more reliable)
-                    formatted_contests = []
+                    formatted_contests.append({
+                        'contestCode': contest.get('contestCode', ''),
+                        'name': contest.get('name', ''),
+                        'date': (contest_date
+                                 or get_contest_index().start_date('codechef', contest.get('contestCode'), contest.get('name'))
+                                 or estimate_codechef_contest_date(contest.get('contestCode'), contest.get('name'))
+                                 or (datetime.now(timezone.utc) - timedelta(weeks=len(formatted_contests))).isoformat()),
+                        'rating': int(contest.get('rating', 0)) if contest.get('rating') else 0,
+                        'rank': int(contest.get('rank', 0)) if contest.get('rank') else 0,
+                        'ratingChange': int(contest.get('ratingChange', 0)) if contest.get('ratingChange') else 0,
+                        'problemsSolved': [],
+                        'problemsCount': 0,
+                        'attended': True
+                    })
+                
+                return formatted_contests[:limit]
+            else:
+                return []
+        
+        # Extract problems solved from problems-solved section
+        # OPTIMIZATION: Build contest history directly from problems-solved section (faster, more reliable)
+        formatted_contests = []
+        try:
+            # Problems-solved section is covered by the contest readiness wait above
+            # Try multiple selectors for problems-solved section
+            problems_section = None
+            section_selectors = [
+                "section.problems-solved",
+                ".problems-solved",
+                "div[class*='problems-solved']",
+                "section[class*='problems']"
+            ]
+            
+            for selector in section_selectors:
+                try:
+                    problems_section = driver.find_element(By.CSS_SELECTOR, selector)
+                    logger.info(f"[Contest History-Selenium] Found problems-solved section with selector: {selector}")
+                    break
+                except:
+                    continue
+            
+            if problems_section:
+                # Find all contest divs (usually div.content or similar)
+                contest_divs = problems_section.find_elements(By.CSS_SELECTOR, "div.content, div[class*='content']")
+                total_contests_found = len(contest_divs)
+                logger.info(f"[Contest History-Selenium] Found {total_contests_found} contest divs in problems-solved section")
+                
+                # OPTIMIZATION: Only process the most recent contests (first N divs, where N = limit)
+                # The divs are usually in reverse chronological order (newest first)
+                contests_to_process = min(limit, total_contests_found)
+                logger.info(f"[Contest History-Selenium] Processing only the most recent {contests_to_process} contests (total: {total_contests_found})")
+                
+                for i, div in enumerate(contest_divs[:contests_to_process]):
                     try:
-                        # Wait for problems-solved section to load
-                        time.sleep(2)  # Give JS time to render
-                        
-                        # Try multiple selectors for problems-solved section
-                        problems_section = None
-                        section_selectors = [
-                            "section.problems-solved",
-                            ".problems-solved",
-                            "div[class*='problems-solved']",
-                            "section[class*='problems']"
-                        ]
+                        # Extract contest name from h5 tag
+                        contest_name_elem = div.find_element(By.TAG_NAME, "h5")
+                        contest_name = contest_name_elem.text.strip()
                         
-                        for selector in section_selectors:
+                        # Extract problems solved from p tag or spans
+                        problems_solved = []
+                        try:
+                            # Try p tag first
+                            problems_p = div.find_element(By.TAG_NAME, "p")
+                            problems_text = problems_p.text.strip()
+                            if problems_text:
+                                # Split by comma and clean up
+                                problems = [p.strip() for p in problems_text.split(',') if p.strip()]
+                                problems_solved = [p for p in problems if p and p not in [',', '', ' ']]
+                        except:
+                            # Try spans if p tag doesn't work
                             try:
-                                problems_section = driver.find_element(By.CSS_SELECTOR, selector)
-                                logger.info(f"[Contest History-Selenium] Found problems-solved section with selector: {selector}")
-                                break
+                                problem_spans = div.find_elements(By.TAG_NAME, "span")
+                                for span in problem_spans:
+                                    problem_text = span.text.strip()
+                                    if problem_text and problem_text not in [',', '', ' ']:
+                                        problems_solved.append(problem_text)
                             except:
-                                continue
+                                pass
                         
-                        if problems_section:
-                            # Find all contest divs (usually div.content or similar)
-                            contest_divs = problems_section.find_elements(By.CSS_SELECTOR, "div.content, div[class*='content']")
-                            total_contests_found = len(contest_divs)
-                            logger.info(f"[Contest History-Selenium] Found {total_contests_found} contest divs in problems-solved section")
+                        if contest_name:
+                            # Extract contest code from name
+                            contest_code = ''
+                            contest_code_match = re.search(r'(START|COOK|LTIME)(\d+)', contest_name, re.IGNORECASE)
+                            if contest_code_match:
+                                contest_code = f"{contest_code_match.group(1).upper()}{contest_code_match.group(2)}"
+                            
+                            # Build contest entry directly from problems-solved section
+                            formatted_contests.append({
+                                'name': contest_name,  # Contest name
+                                'problemsSolved': problems_solved,  # List of problem names
+                                'problemsCount': len(problems_solved),    # Count of solved problems
+                                'contestCode': contest_code,  # Keep for reference
+                                'date': (get_contest_index().start_date('codechef', contest_code, contest_name)
+                                         or estimate_codechef_contest_date(contest_code, contest_name)
+                                         or (datetime.now(timezone.utc) - timedelta(weeks=i)).isoformat()),
+                                'rank': 0,
+                                'attended': len(problems_solved) > 0
+                            })
+                    except Exception as div_error:
+                        logger.debug(f"[Contest History-Selenium] Error parsing contest div {i}: {div_error}")
+                        continue
+                
+                if formatted_contests:
+                    logger.info(f"[Contest History-Selenium] ✅ Extracted {len(formatted_contests)} contests from problems-solved section")
+                    return formatted_contests
+            else:
+                logger.warning(f"[Contest History-Selenium] Problems-solved section not found")
+        except Exception as e:
+            logger.warning(f"[Contest History-Selenium] Error extracting problems-solved section: {e}")
+        
+        # Parse table rows (fallback if problems-solved section didn't work)
+        if not formatted_contests and table:
+            try:
+                tbody = table.find_element(By.TAG_NAME, "tbody")
+                rows = tbody.find_elements(By.TAG_NAME, "tr")
+                logger.info(f"[Contest History-Selenium] Found {len(rows)} contest rows in table (fallback)")
+                
+                # Build problems_by_contest mapping for table matching
+                problems_by_contest = {}
+                if problems_section:
+                    contest_divs = problems_section.find_elements(By.CSS_SELECTOR, "div.content, div[class*='content']")
+                    for div in contest_divs[:limit]:
+                        try:
+                            contest_name_elem = div.find_element(By.TAG_NAME, "h5")
+                            contest_name = contest_name_elem.text.strip()
+                            problems_p = div.find_element(By.TAG_NAME, "p")
+                            problems_text = problems_p.text.strip()
+                            if problems_text:
+                                problems = [p.strip() for p in problems_text.split(',') if p.strip()]
+                                problems_by_contest[contest_name] = problems
+                        except:
+                            continue
+                
+                formatted_contests = []
+                for i, row in enumerate(rows[:limit]):
+                    try:
+                        cols = row.find_elements(By.TAG_NAME, "td")
+                        if len(cols) >= 1:
+                            # Extract contest name (try multiple methods)
+                            contest_name = ''
                             
-                            # OPTIMIZATION: Only process the most recent contests (first N divs, where N = limit)
-                            # The divs are usually in reverse chronological order (newest first)
-                            contests_to_process = min(limit, total_contests_found)
-                            logger.info(f"[Contest History-Selenium] Processing only the most recent {contests_to_process} contests (total: {total_contests_found})")
+                            # Method 1: Try to get from link text (most reliable)
+                            try:
+                                link = cols[0].find_element(By.TAG_NAME, "a")
+                                contest_name = link.text.strip()
+                                if not contest_name:
+                                    # Try title attribute
+                                    contest_name = link.get_attribute('title') or link.get_attribute('textContent') or ''
+                            except:
+                                # Method 2: Get from column text
+                                contest_name = cols[0].text.strip()
                             
-                            for i, div in enumerate(contest_divs[:contests_to_process]):
-                                try:
-                                    # Extract contest name from h5 tag
-                                    contest_name_elem = div.find_element(By.TAG_NAME, "h5")
-                                    contest_name = contest_name_elem.text.strip()
-                                    
-                                    # Extract problems solved from p tag or spans
-                                    problems_solved = []
-                                    try:
-                                        # Try p tag first
-                                        problems_p = div.find_element(By.TAG_NAME, "p")
-                                        problems_text = problems_p.text.strip()
-                                        if problems_text:
-                                            # Split by comma and clean up
-                                            problems = [p.strip() for p in problems_text.split(',') if p.strip()]
-                                            problems_solved = [p for p in problems if p and p not in [',', '', ' ']]
-                                    except:
-                                        # Try spans if p tag doesn't work
-                                        try:
-                                            problem_spans = div.find_elements(By.TAG_NAME, "span")
-                                            for span in problem_spans:
-                                                problem_text = span.text.strip()
-                                                if problem_text and problem_text not in [',', '', ' ']:
-                                                    problems_solved.append(problem_text)
-                                        except:
-                                            pass
-                                    
-                                    if contest_name:
-                                        # Extract contest code from name
-                                        contest_code = ''
-                                        contest_code_match = re.search(r'(START|COOK|LTIME)(\d+)', contest_name, re.IGNORECASE)
-                                        if contest_code_match:
-                                            contest_code = f"{contest_code_match.group(1).upper()}{contest_code_match.group(2)}"
-                                        
-                                        # Build contest entry directly from problems-solved section
-                                        formatted_contests.append({
-                                            'name': contest_name,  # Contest name
-                                            'problemsSolved': problems_solved,  # List of problem names
-                                            'problemsCount': len(problems_solved),    # Count of solved problems
-                                            'contestCode': contest_code,  # Keep for reference
-                                            'date': (datetime.now(timezone.utc) - timedelta(weeks=i)).isoformat(),  # Estimate date
-                                            'rank': 0,
-                                            'attended': len(problems_solved) > 0
-                                        })
-                                except Exception as div_error:
-                                    logger.debug(f"[Contest History-Selenium] Error parsing contest div {i}: {div_error}")
-                                    continue
+                            # If still empty, try other columns
+                            if not contest_name and len(cols) > 1:
+                                for col_idx in range(1, min(4, len(cols))):
+                                    col_text = cols[col_idx].text.strip()
+                                    # Check if this looks like a contest name (contains "Starters", "Cook", etc.)
+                                    if any(keyword in col_text for keyword in ['Starters', 'Cook', 'Lunchtime', 'Contest']):
+                                        contest_name = col_text
+                                        break
                             
-                            if formatted_contests:
-                                driver.quit()
-                                logger.info(f"[Contest History-Selenium] ✅ Extracted {len(formatted_contests)} contests from problems-solved section")
-                                return formatted_contests
-                        else:
-                            logger.warning(f"[Contest History-Selenium] Problems-solved section not found")
-                    except Exception as e:
-                        logger.warning(f"[Contest History-Selenium] Error extracting problems-solved section: {e}")
-                    
-                    # Parse table rows (fallback if problems-solved section didn't work)
-                    if not formatted_contests and table:
-                        try:
-                            tbody = table.find_element(By.TAG_NAME, "tbody")
-                            rows = tbody.find_elements(By.TAG_NAME, "tr")
-                            logger.info(f"[Contest History-Selenium] Found {len(rows)} contest rows in table (fallback)")
+                            # Extract date (usually second column, but might vary)
+                            date_text = ''
+                            for col_idx in range(1, min(5, len(cols))):
+                                col_text = cols[col_idx].text.strip()
+                                # Check if it looks like a date (contains numbers and separators)
+                                if re.search(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', col_text) or re.search(r'\d{1,2}\s+\w{3}', col_text):
+                                    date_text = col_text
+                                    break
                             
-                            # Build problems_by_contest mapping for table matching
-                            problems_by_contest = {}
-                            if problems_section:
-                                contest_divs = problems_section.find_elements(By.CSS_SELECTOR, "div.content, div[class*='content']")
-                                for div in contest_divs[:limit]:
+                            # Extract rank (look for column with rank-like text)
+                            rank_text = '0'
+                            rank_value = 0
+                            for col_idx in range(1, min(5, len(cols))):
+                                col_text = cols[col_idx].text.strip()
+                                # Check if it looks like a rank (just numbers, possibly with # or commas)
+                                if re.match(r'^[#\d,\s-]+$', col_text) and any(c.isdigit() for c in col_text):
+                                    rank_text = col_text
                                     try:
-                                        contest_name_elem = div.find_element(By.TAG_NAME, "h5")
-                                        contest_name = contest_name_elem.text.strip()
-                                        problems_p = div.find_element(By.TAG_NAME, "p")
-                                        problems_text = problems_p.text.strip()
-                                        if problems_text:
-                                            problems = [p.strip() for p in problems_text.split(',') if p.strip()]
-                                            problems_by_contest[contest_name] = problems
+                                        rank_text_clean = rank_text.replace(',', '').replace('#', '').replace('-', '0').replace('N/A', '0').strip()
+                                        rank_value = int(rank_text_clean) if rank_text_clean.isdigit() else 0
                                     except:
-                                        continue
+                                        rank_value = 0
+                                    break
+                            
+                            # Extract score/rating (usually last column or one with score-like text)
+                            score_text = ''
+                            if len(cols) > 3:
+                                score_text = cols[-1].text.strip()  # Try last column
+                            elif len(cols) > 2:
+                                score_text = cols[2].text.strip()
                             
-                            formatted_contests = []
-                            for i, row in enumerate(rows[:limit]):
+                            # Parse date
+                            contest_date = None
+                            if date_text:
                                 try:
-                                    cols = row.find_elements(By.TAG_NAME, "td")
-                                    if len(cols) >= 1:
-                                        # Extract contest name (try multiple methods)
-                                        contest_name = ''
-                                        
-                                        # Method 1: Try to get from link text (most reliable)
+                                    # Try common date formats
+                                    for fmt in ['%d %b %Y', '%Y-%m-%d', '%d-%m-%Y', '%m/%d/%Y']:
                                         try:
-                                            link = cols[0].find_element(By.TAG_NAME, "a")
-                                            contest_name = link.text.strip()
-                                            if not contest_name:
-                                                # Try title attribute
-                                                contest_name = link.get_attribute('title') or link.get_attribute('textContent') or ''
-                                        except:
-                                            # Method 2: Get from column text
-                                            contest_name = cols[0].text.strip()
-                                        
-                                        # If still empty, try other columns
-                                        if not contest_name and len(cols) > 1:
-                                            for col_idx in range(1, min(4, len(cols))):
-                                                col_text = cols[col_idx].text.strip()
-                                                # Check if this looks like a contest name (contains "Starters", "Cook", etc.)
-                                                if any(keyword in col_text for keyword in ['Starters', 'Cook', 'Lunchtime', 'Contest']):
-                                                    contest_name = col_text
-                                                    break
-                                        
-                                        # Extract date (usually second column, but might vary)
-                                        date_text = ''
-                                        for col_idx in range(1, min(5, len(cols))):
-                                            col_text = cols[col_idx].text.strip()
-                                            # Check if it looks like a date (contains numbers and separators)
-                                            if re.search(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', col_text) or re.search(r'\d{1,2}\s+\w{3}', col_text):
-                                                date_text = col_text
-                                                break
-                                        
-                                        # Extract rank (look for column with rank-like text)
-                                        rank_text = '0'
-                                        rank_value = 0
-                                        for col_idx in range(1, min(5, len(cols))):
-                                            col_text = cols[col_idx].text.strip()
-                                            # Check if it looks like a rank (just numbers, possibly with # or commas)
-                                            if re.match(r'^[#\d,\s-]+$', col_text) and any(c.isdigit() for c in col_text):
-                                                rank_text = col_text
-                                                try:
-                                                    rank_text_clean = rank_text.replace(',', '').replace('#', '').replace('-', '0').replace('N/A', '0').strip()
-                                                    rank_value = int(rank_text_clean) if rank_text_clean.isdigit() else 0
-                                                except:
-                                                    rank_value = 0
-                                                break
-                                        
-                                        # Extract score/rating (usually last column or one with score-like text)
-                                        score_text = ''
-                                        if len(cols) > 3:
-                                            score_text = cols[-1].text.strip()  # Try last column
-                                        elif len(cols) > 2:
-                                            score_text = cols[2].text.strip()
-                                        
-                                        # Parse date
-                                        contest_date = None
-                                        if date_text:
-                                            try:
-                                                # Try common date formats
-                                                for fmt in ['%d %b %Y', '%Y-%m-%d', '%d-%m-%Y', '%m/%d/%Y']:
-                                                    try:
-                                                        contest_date = datetime.strptime(date_text, fmt).replace(tzinfo=timezone.utc).isoformat()
-                                                        break
-                                                    except:
-                                                        continue
-                                            except:
-                                                pass
-                                        
-                                        # Extract contest code from name or link
-                                        contest_code = ''
-                                        try:
-                                            # Try to get from link href first
-                                            link = cols[0].find_element(By.TAG_NAME, "a")
-                                            href = link.get_attribute('href')
-                                            if href and '/contests/' in href:
-                                                contest_code = href.split('/contests/')[-1].split('/')[0]
+                                            contest_date = datetime.strptime(date_text, fmt).replace(tzinfo=timezone.utc).isoformat()
+                                            break
                                         except:
-                                            pass
-                                        
-                                        # If no code from link, try to extract from contest name
-                                        if not contest_code and contest_name:
-                                            contest_name_upper = contest_name.upper()
-                                            if 'STARTERS' in contest_name_upper or 'START' in contest_name_upper:
-                                                match = re.search(r'(\d+)', contest_name)
-                                                if match:
-                                                    contest_code = f"START{match.group(1)}"
-                                            elif 'COOK' in contest_name_upper:
-                                                match = re.search(r'(\d+)', contest_name)
-                                                if match:
-                                                    contest_code = f"COOK{match.group(1)}"
-                                            elif 'LUNCHTIME' in contest_name_upper or 'LTIME' in contest_name_upper:
-                                                match = re.search(r'(\d+)', contest_name)
-                                                if match:
-                                                    contest_code = f"LTIME{match.group(1)}"
-                                        
-                                        # Get problems solved for this contest
-                                        problems_solved = []
-                                        problems_count = 0
-                                        
-                                        # Try to match by contest code first
-                                        if contest_code and contest_code in problems_by_contest:
-                                            problems_solved = problems_by_contest[contest_code]
-                                            problems_count = len(problems_solved)
-                                        # Try to match by contest name
-                                        elif contest_name in problems_by_contest:
-                                            problems_solved = problems_by_contest[contest_name]
-                                            problems_count = len(problems_solved)
-                                        
-                                        # Only add if we have a contest name
-                                        if contest_name:
-                                            formatted_contests.append({
-                                                'name': contest_name,  # Contest name
-                                                'problemsSolved': problems_solved,  # List of problem names
-                                                'problemsCount': problems_count,    # Count of solved problems
-                                                'contestCode': contest_code,  # Keep for reference
-                                                'date': contest_date or (datetime.now(timezone.utc) - timedelta(weeks=i)).isoformat(),
-                                                'rank': rank_value,
-                                                'attended': True
-                                            })
-                                            logger.info(f"[Contest History-Selenium] Added contest: {contest_name} - {problems_count} problems")
-                                        else:
-                                            logger.warning(f"[Contest History-Selenium] Skipping row {i} - no contest name found. Columns: {[col.text.strip()[:50] for col in cols]}")
-                                except Exception as row_error:
-                                    logger.warning(f"[Contest History-Selenium] Error parsing row {i}: {row_error}")
-                                    continue
+                                            continue
+                                except:
+                                    pass
                             
-                            driver.quit()
-                            logger.info(f"[Contest History-Selenium] ✅ Extracted {len(formatted_contests)} contests from table")
-                            return formatted_contests
-                        except Exception as table_error:
-                            logger.warning(f"[Contest History-Selenium] Error parsing table: {table_error}")
-                            if driver:
-                                driver.quit()
-                            return []
-                except Exception as selenium_error:
-                    logger.warning(f"[Contest History-Selenium] Failed: {selenium_error}, falling back to BeautifulSoup")
-                    if driver:
-                        try:
-                            driver.quit()
-                        except:
-                            pass
-            except Exception as e:
-                logger.warning(f"[Contest History-Selenium] Error: {e}, falling back to BeautifulSoup")
-        
-        # Continue with existing BeautifulSoup extraction
-        profile_url = f"https://www.codechef.com/users/{username}"
-        response = safe_request(profile_url)
-        
-        if not response:
-            logger.warning(f"Failed to get contest history for {username}")
-            return []
-        
-        # Handle encoding properly to avoid REPLACEMENT CHARACTER errors
-        try:
-            html_content = response.text
-        except (UnicodeDecodeError, AttributeError):
-            html_content = response.content.decode('utf-8', errors='ignore')
-        
-        soup = BeautifulSoup(html_content, 'html.parser')
+                            # Extract contest code from name or link
+                            contest_code = ''
+                            try:
+                                # Try to get from link href first
+                                link = cols[0].find_element(By.TAG_NAME, "a")
+                                href = link.get_attribute('href')
+                                if href and '/contests/' in href:
+                                    contest_code = href.split('/contests/')[-1].split('/')[0]
+                            except:
+                                pass
+                            
+                            # If no code from link, try to extract from contest name
+                            if not contest_code and contest_name:
+                                contest_name_upper = contest_name.upper()
+                                if 'STARTERS' in contest_name_upper or 'START' in contest_name_upper:
+                                    match = re.search(r'(\d+)', contest_name)
+                                    if match:
+                                        contest_code = f"START{match.group(1)}"
+                                elif 'COOK' in contest_name_upper:
+                                    match = re.search(r'(\d+)', contest_name)
+                                    if match:
+                                        contest_code = f"COOK{match.group(1)}"
+                                elif 'LUNCHTIME' in contest_name_upper or 'LTIME' in contest_name_upper:
+                                    match = re.search(r'(\d+)', contest_name)
+                                    if match:
+                                        contest_code = f"LTIME{match.group(1)}"
+                            
+                            # Get problems solved for this contest
+                            problems_solved = []
+                            problems_count = 0
+                            
+                            # Try to match by contest code first
+                            if contest_code and contest_code in problems_by_contest:
+                                problems_solved = problems_by_contest[contest_code]
+                                problems_count = len(problems_solved)
+                            # Try to match by contest name
+                            elif contest_name in problems_by_contest:
+                                problems_solved = problems_by_contest[contest_name]
+                                problems_count = len(problems_solved)
+                            
+                            # Only add if we have a contest name
+                            if contest_name:
+                                formatted_contests.append({
+                                    'name': contest_name,  # Contest name
+                                    'problemsSolved': problems_solved,  # List of problem names
+                                    'problemsCount': problems_count,    # Count of solved problems
+                                    'contestCode': contest_code,  # Keep for reference
+                                    'date': (contest_date
+                                             or get_contest_index().start_date('codechef', contest_code, contest_name)
+                                             or estimate_codechef_contest_date(contest_code, contest_name)
+                                             or (datetime.now(timezone.utc) - timedelta(weeks=i)).isoformat()),
+                                    'rank': rank_value,
+                                    'attended': True
+                                })
+                                logger.info(f"[Contest History-Selenium] Added contest: {contest_name} - {problems_count} problems")
+                            else:
+                                logger.warning(f"[Contest History-Selenium] Skipping row {i} - no contest name found. Columns: {[col.text.strip()[:50] for col in cols]}")
+                    except Exception as row_error:
+                        logger.warning(f"[Contest History-Selenium] Error parsing row {i}: {row_error}")
+                        continue
+                
+                logger.info(f"[Contest History-Selenium] ✅ Extracted {len(formatted_contests)} contests from table")
+                return formatted_contests
+            except Exception as table_error:
+                logger.warning(f"[Contest History-Selenium] Error parsing table: {table_error}")
+                return []
+    except Exception as e:
+        logger.warning(f"[Contest History-Selenium] Error extracting from DOM: {e}")
+    return None
+
+def estimate_codechef_contest_date(contest_code, contest_name):
+    """
+    Rough start date from the contest number, for contests the index doesn't
+    know (index refresh failed, very old or brand-new contest): Starters run
+    weekly, Cook-Off and Lunchtime ran monthly. Returns None for other contests.
+    """
+    contest_code = (contest_code or '').upper()
+    contest_name = (contest_name or '').lower()
+    match = re.search(r'(\d+)', contest_code or contest_name)
+    if not match:
+        return None
+    contest_num = int(match.group(1))
+    # (anchor contest number, its approximate date, days between contests)
+    if 'START' in contest_code or 'starters' in contest_name:
+        anchor, anchor_date, step = 219, datetime(2025, 12, 31, tzinfo=timezone.utc), 7
+    elif 'COOK' in contest_code or 'cook' in contest_name:
+        anchor, anchor_date, step = 140, datetime(2022, 2, 20, tzinfo=timezone.utc), 30
+    elif 'LTIME' in contest_code or 'lunchtime' in contest_name:
+        anchor, anchor_date, step = 105, datetime(2022, 4, 30, tzinfo=timezone.utc), 30
+    else:
+        return None
+    estimate = anchor_date + timedelta(days=(contest_num - anchor) * step)
+    return min(estimate, datetime.now(timezone.utc)).isoformat()
+
+def extract_contest_history_from_html(soup, username, limit=8):
+    """
+    Contest history (newest first) from a parsed profile page.
+    Works on the static HTML as well as Selenium's page_source.
+    """
+    try:
         contests = []
         
-        # Helper function to estimate date from contest name/code
-        def estimate_contest_date(contest_code, contest_name):
-            """Estimate contest date from contest code/name"""
-            try:
-                # Extract number from contest name (e.g., "Starters 219" -> 219)
-                match = re.search(r'(\d+)', contest_code or contest_name)
-                if match:
-                    contest_num = int(match.group(1))
-                    
-                    # Starters contests happen weekly (roughly)
-                    # Starters 1 was around Jan 2021, estimate from there
-                    if 'START' in contest_code or 'starters' in contest_name.lower():
-                        base_date = datetime(2021, 1, 1, tzinfo=timezone.utc)
-                        weeks_since = contest_num * 7
-                        estimated_date = base_date + timedelta(days=weeks_since)
-                        return estimated_date.isoformat()
-                    # Cook-Off happens monthly
-                    elif 'COOK' in contest_code or 'cook' in contest_name.lower():
-                        base_date = datetime(2021, 1, 1, tzinfo=timezone.utc)
-                        months_since = contest_num
-                        estimated_date = base_date + timedelta(days=months_since * 30)
-                        return estimated_date.isoformat()
-                    # Lunchtime happens monthly
-                    elif 'LTIME' in contest_code or 'lunchtime' in contest_name.lower():
-                        base_date = datetime(2021, 1, 1, tzinfo=timezone.utc)
-                        months_since = contest_num
-                        estimated_date = base_date + timedelta(days=months_since * 30)
-                        return estimated_date.isoformat()
-            except Exception as e:
-                logger.debug(f"Date estimation failed: {e}")
-            
-            # Fallback: use current date minus weeks based on position
+        contest_index = get_contest_index()
+        
+        def contest_start_date(contest_code, contest_name):
+            """Contest start date from the cached contest index, else estimated from the contest number"""
+            start = contest_index.start_date('codechef', contest_code, contest_name)
+            if start:
+                return start
+            estimate = estimate_codechef_contest_date(contest_code, contest_name)
+            if estimate:
+                return estimate
+            # Unknown contest: keep the list order with one-week steps
             return (datetime.now(timezone.utc) - timedelta(weeks=len(contests))).isoformat()
         
         # STEP 1: Extract problems solved from rating-data-section (most reliable for problems)
@@ -2285,12 +2247,12 @@ def get_codechef_contest_history(username, limit=8, use_selenium=False):
                                         
                                         if not contest_date:
                                             # Fallback: estimate from contest code
-                                            contest_date = estimate_contest_date(contest_code, '')
+                                            contest_date = contest_start_date(contest_code, '')
                                     except (ValueError, TypeError) as date_error:
                                         logger.debug(f"Date parsing failed for '{date_str}': {date_error}")
-                                        contest_date = estimate_contest_date(contest_code, '')
+                                        contest_date = contest_start_date(contest_code, '')
                                 else:
-                                    contest_date = estimate_contest_date(contest_code, '')
+                                    contest_date = contest_start_date(contest_code, '')
                                 
                                 rating_change = entry.get('rating_change', 0) or entry.get('change', 0)
                                 
@@ -2348,9 +2310,9 @@ def get_codechef_contest_history(username, limit=8, use_selenium=False):
                                         try:
                                             contest_date = datetime.fromisoformat(date_str).isoformat()
                                         except:
-                                            contest_date = estimate_contest_date(contest_code, contest_name)
+                                            contest_date = contest_start_date(contest_code, contest_name)
                                     else:
-                                        contest_date = estimate_contest_date(contest_code, contest_name)
+                                        contest_date = contest_start_date(contest_code, contest_name)
                                     
                                     # Find problems solved
                                     problems_solved = problems_by_contest.get(contest_name, problems_by_contest.get(contest_code, []))
@@ -2416,25 +2378,10 @@ def get_codechef_contest_history(username, limit=8, use_selenium=False):
                                 href = contest_link.get('href', '')
                                 contest_code = href.split('/')[-1] if href and '/contests/' in href else contest_code
                             
-                            # Extract contest number for better date estimation
-                            contest_num_match = re.search(r'(\d+)', contest_name)
-                            if contest_num_match:
-                                contest_num = int(contest_num_match.group(1))
-                                # Better estimation: Starters contests happen weekly
-                                # Starters 219 was around Dec 2025, estimate backwards
-                                if 'starters' in contest_name.lower() or 'START' in contest_code:
-                                    # Estimate: Starters 219 = Dec 2025, so calculate backwards
-                                    base_starters = 219
-                                    base_date = datetime(2025, 12, 31, tzinfo=timezone.utc)
-                                    weeks_diff = (base_starters - contest_num) * 7
-                                    contest_date = (base_date - timedelta(days=weeks_diff)).isoformat()
-                                else:
-                                    contest_date = estimate_contest_date(contest_code, contest_name)
-                            else:
-                                # Get date - prefer from HTML, then estimate
-                                contest_date = contest_dates_from_html.get(contest_name)
-                                if not contest_date:
-                                    contest_date = estimate_contest_date(contest_code, contest_name)
+                            # Get date - prefer from HTML, then the contest index
+                            contest_date = contest_dates_from_html.get(contest_name)
+                            if not contest_date:
+                                contest_date = contest_start_date(contest_code, contest_name)
                             
                             contests.append({
                                 'contestCode': contest_code,
@@ -2460,7 +2407,7 @@ def get_codechef_contest_history(username, limit=8, use_selenium=False):
             if 'problemsCount' not in contest:
                 contest['problemsCount'] = len(contest.get('problemsSolved', []))
             if 'date' not in contest or not contest['date']:
-                contest['date'] = estimate_contest_date(contest.get('contestCode', ''), contest.get('name', ''))
+                contest['date'] = contest_start_date(contest.get('contestCode', ''), contest.get('name', ''))
         
         # STEP 6: Return top N contests (limit=8)
         result = contests[:limit] if len(contests) >= limit else contests
@@ -2472,6 +2419,74 @@ def get_codechef_contest_history(username, limit=8, use_selenium=False):
         
         return result
         
+    except Exception as e:
+        logger.error(f"Error parsing contest history for {username}: {e}")
+        traceback.print_exc()
+        return []
+
+def get_codechef_contest_history(username, limit=8, use_selenium=False):
+    """
+    Get detailed contest history for a user with dates and problems solved
+    Returns last 8 most recent contests in descending order (newest first)
+    """
+    try:
+        logger.info(f"Fetching contest history with dates and problems solved for {username} (limit: {limit}, use_selenium: {use_selenium})")
+        
+        # Try Selenium first if requested and available
+        if use_selenium and SELENIUM_AVAILABLE:
+            try:
+                logger.info(f"[Contest History] Attempting Selenium extraction for {username}")
+                browser = None
+                try:
+                    # Lease a tab on a warm Chrome from the shared pool
+                    browser = get_browser_pool().acquire()
+                    driver = browser.driver
+                    
+                    # Set timeouts for contest history extraction
+                    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+                    driver.set_script_timeout(SCRIPT_TIMEOUT)
+                    driver.implicitly_wait(IMPLICIT_WAIT)
+                    
+                    profile_url = f"https://www.codechef.com/users/{username}"
+                    try:
+                        logger.info(f"[Contest History-Selenium] Navigating to {profile_url}...")
+                        get_governor().acquire(profile_url)
+                        driver.get(profile_url)
+                    except TimeoutException:
+                        logger.warning(f"[Contest History-Selenium] Page load timeout, but continuing...")
+                    deadline = PageDeadline()
+                    
+                    # Wait for page to load
+                    wait_until(driver, elements_present('.rating-number'), 'codechef.rating', timeout=25, deadline=deadline)
+                    
+                    selenium_contests = extract_contest_history_selenium(driver, limit, deadline)
+                    if selenium_contests is not None:
+                        return selenium_contests
+                except Exception as selenium_error:
+                    logger.warning(f"[Contest History-Selenium] Failed: {selenium_error}, falling back to BeautifulSoup")
+                finally:
+                    if browser:
+                        get_browser_pool().release(browser)
+            except Exception as e:
+                logger.warning(f"[Contest History-Selenium] Error: {e}, falling back to BeautifulSoup")
+        
+        # Continue with existing BeautifulSoup extraction
+        profile_url = f"https://www.codechef.com/users/{username}"
+        response = safe_request(profile_url)
+        
+        if not response:
+            logger.warning(f"Failed to get contest history for {username}")
+            return []
+        
+        # Handle encoding properly to avoid REPLACEMENT CHARACTER errors
+        try:
+            html_content = response.text
+        except (UnicodeDecodeError, AttributeError):
+            html_content = response.content.decode('utf-8', errors='ignore')
+        
+        soup = BeautifulSoup(html_content, 'html.parser')
+        return extract_contest_history_from_html(soup, username, limit)
+        
     except Exception as e:
         logger.error(f"Error getting contest history for {username}: {e}")
         traceback.print_exc()
@@ -7,34 +7,56 @@ Based on CodeChef scraper structure
 
 import requests
 import time
-import random
 import logging
+import os
 import re
 import json
 import traceback
 from datetime import datetime, timezone, timedelta
 
+import http_client
+from rate_governor import get_governor
+from submission_watermarks import get_watermark_store
+from contest_index import get_contest_index
+
 logger = logging.getLogger(__name__)
 
 # Constants
 CODEFORCES_API_BASE = 'https://codeforces.com/api'
 DEFAULT_TIMEOUT = 15
 DEFAULT_RETRIES = 3
-API_RATE_LIMIT_DELAY = 1.5  # Codeforces: 5 requests per second
 
-def safe_codeforces_request(endpoint, params=None, timeout=15, retries=3):
-    """Make a safe Codeforces API request with rate limiting"""
+# Handles per user.info call in the cohort prefetch (semicolon-separated, keeps the URL short)
+USER_INFO_CHUNK_SIZE = int(os.getenv('CODEFORCES_USER_INFO_CHUNK', '300'))
+# Max students per cohort job in the scheduler
+CODEFORCES_COHORT_SIZE = int(os.getenv('CODEFORCES_COHORT_SIZE', '100'))
+# Unchanged profiles still get a full user.rating/user.status scrape this often
+CODEFORCES_FULL_SCRAPE_HOURS = float(os.getenv('CODEFORCES_FULL_SCRAPE_HOURS', '24'))
+
+# Incremental user.status: page size and how many pages to read before re-downloading everything
+SUBMISSION_PAGE_SIZE = int(os.getenv('CODEFORCES_SUBMISSION_PAGE_SIZE', '50'))
+MAX_INCREMENTAL_PAGES = int(os.getenv('CODEFORCES_MAX_INCREMENTAL_PAGES', '20'))
+FULL_SUBMISSION_COUNT = 10000
+# Verdicts that can still change; submissions from the oldest of these on are not counted yet
+PENDING_VERDICTS = (None, 'TESTING')
+# Bump when merge_submissions starts tracking something new; older states are rebuilt
+SUBMISSION_STATE_VERSION = 2
+
+def safe_codeforces_request(endpoint, params=None, timeout=15, retries=3, errors=None):
+    """
+    Make a safe Codeforces API request with rate limiting.
+    API error comments are appended to `errors` when a list is given.
+    """
     url = f"{CODEFORCES_API_BASE}/{endpoint}"
+    governor = get_governor()
     
     for attempt in range(retries):
         try:
-            # Codeforces API rate limit: 5 requests per second
-            if attempt > 0:
-                time.sleep(random.uniform(API_RATE_LIMIT_DELAY, API_RATE_LIMIT_DELAY + 1))
-            else:
-                time.sleep(random.uniform(0.2, 0.5))  # Small delay even on first attempt
+            # Codeforces pacing is handled by the shared rate governor
+            governor.acquire(url)
             
-            response = requests.get(url, params=params, timeout=timeout)
+            response = http_client.get(url, params=params, timeout=timeout)
+            paused = governor.observe(url, response)
             
             if response.status_code == 200:
                 data = response.json()
@@ -43,11 +65,21 @@ def safe_codeforces_request(endpoint, params=None, timeout=15, retries=3):
                 else:
                     error_comment = data.get('comment', 'Unknown error')
                     logger.warning(f"Codeforces API error: {error_comment}")
+                    if errors is not None:
+                        errors.append(error_comment)
                     return None
+            elif response.status_code == 400 and errors is not None:
+                # user.info answers an unknown handle with 400 + FAILED comment
+                try:
+                    errors.append(response.json().get('comment', ''))
+                except ValueError:
+                    pass
+                logger.warning(f"Codeforces HTTP 400 for {url}: {errors[-1] if errors else ''}")
+                return None
             elif response.status_code == 429:  # Rate limited
-                wait_time = 2 ** attempt * 2
-                logger.warning(f"Codeforces rate limited, waiting {wait_time}s before retry {attempt + 1}")
-                time.sleep(wait_time)
+                logger.warning(f"Codeforces rate limited, retry {attempt + 1} after the governor's pause")
+                if not paused:
+                    governor.backoff(url, attempt)
                 continue
             else:
                 logger.warning(f"Codeforces HTTP {response.status_code} for {url}")
@@ -96,7 +128,7 @@ def _create_result_dict(username, data_source='codeforces_api'):
         'friendOfCount': 0,
         'lastOnlineTime': 0,
         'registrationTime': 0,
-        'lastUpdated': datetime.now(timezone.utc),
+        'lastUpdated': datetime.utcnow(),
         'dataSource': data_source
     }
 
@@ -105,6 +137,22 @@ def extract_submissions_heatmap(submissions):
     Extract submission heatmap from Codeforces submissions
     Similar to CodeChef heatmap extraction
     """
+    submissions_by_date = {}
+    try:
+        for submission in submissions:
+            # Convert timestamp to date
+            timestamp = submission.get('creationTimeSeconds', 0)
+            if timestamp:
+                date_obj = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+                date_str = date_obj.strftime('%Y-%m-%d')
+                submissions_by_date[date_str] = submissions_by_date.get(date_str, 0) + 1
+    except Exception as e:
+        logger.warning(f"Error extracting submission heatmap: {e}")
+    
+    return build_submission_heatmap(submissions_by_date, len(submissions))
+
+def build_submission_heatmap(submissions_by_date, total_submissions):
+    """Heatmap + stats from {YYYY-MM-DD: count} (also used for merged incremental totals)"""
     result = {
         'totalSubmissions': 0,
         'submissionHeatmap': [],
@@ -117,21 +165,9 @@ def extract_submissions_heatmap(submissions):
     }
     
     try:
-        submissions_by_date = {}
-        max_daily = 0
-        
-        for submission in submissions:
-            # Convert timestamp to date
-            timestamp = submission.get('creationTimeSeconds', 0)
-            if timestamp:
-                date_obj = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-                date_str = date_obj.strftime('%Y-%m-%d')
-                
-                submissions_by_date[date_str] = submissions_by_date.get(date_str, 0) + 1
-                max_daily = max(max_daily, submissions_by_date[date_str])
+        max_daily = max(submissions_by_date.values(), default=0)
         
         # Convert to heatmap format
-        total_submissions = len(submissions)
         heatmap_data = []
         
         for date_str, count in sorted(submissions_by_date.items()):
@@ -158,7 +194,155 @@ def extract_submissions_heatmap(submissions):
     
     return result
 
-def scrape_codeforces_user(username, include_contest_history=True):
+def _empty_submission_state():
+    return {
+        'version': SUBMISSION_STATE_VERSION,
+        'watermark': 0,
+        'totalSubmissions': 0,
+        'acceptedSubmissions': 0,
+        'solvedProblemIds': [],
+        'submissionByDate': {},
+        'verdictCounts': {},
+        'solvedByRating': {},   # str(rating bucket) -> first solves
+        'solvedByTags': {},
+    }
+
+def merge_submissions(state, submissions):
+    """
+    Fold submissions newer than state['watermark'] into the running totals in
+    one pass: counts, solved set, per-day counts, verdicts and first-solve
+    rating/tag buckets. Everything else (heatmap, contest history, problem
+    stats) is derived from the state, so user.status is read once per scrape.
+    
+    Submissions still being judged (and anything newer) are left for the next
+    scrape, so the watermark never passes a verdict that can still change.
+    """
+    watermark = state.get('watermark', 0)
+    new = [s for s in submissions if s.get('id', 0) > watermark]
+    if not new:
+        return state
+    
+    pending = [s['id'] for s in new if s.get('verdict') in PENDING_VERDICTS]
+    cutoff = min(pending) - 1 if pending else max(s['id'] for s in new)
+    
+    solved = set(state.get('solvedProblemIds') or [])
+    by_date = dict(state.get('submissionByDate') or {})
+    verdicts = dict(state.get('verdictCounts') or {})
+    by_rating = dict(state.get('solvedByRating') or {})
+    by_tags = dict(state.get('solvedByTags') or {})
+    counted = 0
+    accepted = 0
+    # Oldest first, so a problem's first accepted submission is the one bucketed
+    for submission in sorted(new, key=lambda s: s['id']):
+        if submission['id'] > cutoff:
+            continue
+        counted += 1
+        verdict = submission.get('verdict', 'UNKNOWN')
+        verdicts[verdict] = verdicts.get(verdict, 0) + 1
+        if verdict == 'OK':
+            accepted += 1
+            problem = submission.get('problem', {})
+            problem_id = f"{problem.get('contestId', '')}{problem.get('index', '')}"
+            if problem_id not in solved:
+                solved.add(problem_id)
+                rating = problem.get('rating', 0)
+                if rating > 0:
+                    bucket = str((rating // 100) * 100)
+                    by_rating[bucket] = by_rating.get(bucket, 0) + 1
+                for tag in problem.get('tags', []):
+                    by_tags[tag] = by_tags.get(tag, 0) + 1
+        timestamp = submission.get('creationTimeSeconds', 0)
+        if timestamp:
+            date_str = datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%d')
+            by_date[date_str] = by_date.get(date_str, 0) + 1
+    
+    state['watermark'] = max(watermark, cutoff)
+    state['totalSubmissions'] = state.get('totalSubmissions', 0) + counted
+    state['acceptedSubmissions'] = state.get('acceptedSubmissions', 0) + accepted
+    state['solvedProblemIds'] = sorted(solved)
+    state['submissionByDate'] = by_date
+    state['verdictCounts'] = verdicts
+    state['solvedByRating'] = by_rating
+    state['solvedByTags'] = by_tags
+    return state
+
+def solved_problems_by_contest(submission_state):
+    """{contestId: {problem ids}} from the solved set ('1850A' -> 1850)"""
+    problems_by_contest = {}
+    for problem_id in submission_state.get('solvedProblemIds') or []:
+        match = re.match(r'(\d+)', problem_id)
+        if match:
+            problems_by_contest.setdefault(int(match.group(1)), set()).add(problem_id)
+    return problems_by_contest
+
+def fetch_new_submissions(username, watermark):
+    """
+    Page user.status newest-first in SUBMISSION_PAGE_SIZE steps until the
+    watermark is reached. Returns the submissions newer than it, or None when
+    a page failed or the gap is too large (caller re-downloads everything).
+    """
+    new = []
+    for page in range(MAX_INCREMENTAL_PAGES):
+        batch = safe_codeforces_request('user.status', {
+            'handle': username,
+            'from': page * SUBMISSION_PAGE_SIZE + 1,
+            'count': SUBMISSION_PAGE_SIZE
+        })
+        if batch is None:
+            return None
+        new.extend(s for s in batch if s.get('id', 0) > watermark)
+        if len(batch) < SUBMISSION_PAGE_SIZE or any(s.get('id', 0) <= watermark for s in batch):
+            return new
+    logger.info(f"[Submissions] {username}: more than {MAX_INCREMENTAL_PAGES} pages since watermark, full download")
+    return None
+
+def ingest_submissions(username):
+    """
+    Current submission totals for a handle, downloading only what is newer than
+    its stored watermark. Returns the state dict (see merge_submissions).
+    """
+    store = get_watermark_store()
+    state = store.get('codeforces', username)
+    
+    if state and state.get('watermark') and state.get('version') == SUBMISSION_STATE_VERSION:
+        new = fetch_new_submissions(username, state['watermark'])
+        if new is not None:
+            logger.info(f"[Submissions] {username}: {len(new)} new since watermark {state['watermark']}")
+            state = merge_submissions(state, new)
+            store.save('codeforces', username, state)
+            return state
+    
+    logger.info(f"[API] Fetching submissions for {username}...")
+    submissions = safe_codeforces_request('user.status', {'handle': username, 'from': 1, 'count': FULL_SUBMISSION_COUNT})
+    if submissions is None:
+        return _empty_submission_state()
+    
+    state = merge_submissions(_empty_submission_state(), submissions)
+    if len(submissions) < FULL_SUBMISSION_COUNT:
+        store.save('codeforces', username, state)
+    else:
+        # Truncated history: older submissions are missing, keep counting from scratch each time
+        store.reset('codeforces', username)
+    return state
+
+def apply_user_info(result, user_data):
+    """Copy the user.info fields into a result dict"""
+    result['rating'] = user_data.get('rating', 0)
+    result['currentRating'] = result['rating']
+    result['maxRating'] = user_data.get('maxRating', result['rating'])
+    result['highestRating'] = result['maxRating']
+    result['rank'] = user_data.get('rank', 'unrated')
+    result['maxRank'] = user_data.get('maxRank', result['rank'])
+    result['country'] = user_data.get('country', '')
+    result['city'] = user_data.get('city', '')
+    result['organization'] = user_data.get('organization', '')
+    result['contribution'] = user_data.get('contribution', 0)
+    result['friendOfCount'] = user_data.get('friendOfCount', 0)
+    result['lastOnlineTime'] = user_data.get('lastOnlineTimeSeconds', 0)
+    result['registrationTime'] = user_data.get('registrationTimeSeconds', 0)
+    return result
+
+def scrape_codeforces_user(username, include_contest_history=True, user_info=None):
     """
     Main scraping function - Enhanced version based on CodeChef structure
     Returns: dict with rating, solved problems, contests, heatmap, etc.
@@ -166,6 +350,7 @@ def scrape_codeforces_user(username, include_contest_history=True):
     Args:
         username: Codeforces handle
         include_contest_history: If True, fetches recent contest history with details (default: True)
+        user_info: user.info object from fetch_codeforces_user_infos (skips that request)
     """
     try:
         logger.info(f"[Main] Starting scraping for username: {username}")
@@ -173,29 +358,18 @@ def scrape_codeforces_user(username, include_contest_history=True):
         # Initialize result
         result = _create_result_dict(username, 'codeforces_api')
         
-        # Get user info
-        logger.info(f"[API] Fetching user info for {username}...")
-        user_info = safe_codeforces_request('user.info', {'handles': username})
-        if not user_info or len(user_info) == 0:
-            logger.warning(f"No Codeforces user found: {username}")
-            return None
-        
-        user_data = user_info[0]
+        # Get user info (already fetched when called from the cohort prefetch)
+        user_data = user_info
+        if user_data is None:
+            logger.info(f"[API] Fetching user info for {username}...")
+            user_info = safe_codeforces_request('user.info', {'handles': username})
+            if not user_info or len(user_info) == 0:
+                logger.warning(f"No Codeforces user found: {username}")
+                return None
+            user_data = user_info[0]
         
         # Extract basic user info
-        result['rating'] = user_data.get('rating', 0)
-        result['currentRating'] = result['rating']
-        result['maxRating'] = user_data.get('maxRating', result['rating'])
-        result['highestRating'] = result['maxRating']
-        result['rank'] = user_data.get('rank', 'unrated')
-        result['maxRank'] = user_data.get('maxRank', result['rank'])
-        result['country'] = user_data.get('country', '')
-        result['city'] = user_data.get('city', '')
-        result['organization'] = user_data.get('organization', '')
-        result['contribution'] = user_data.get('contribution', 0)
-        result['friendOfCount'] = user_data.get('friendOfCount', 0)
-        result['lastOnlineTime'] = user_data.get('lastOnlineTimeSeconds', 0)
-        result['registrationTime'] = user_data.get('registrationTimeSeconds', 0)
+        apply_user_info(result, user_data)
         
         # Get user rating history (for contests)
         logger.info(f"[API] Fetching rating history for {username}...")
@@ -205,37 +379,18 @@ def scrape_codeforces_user(username, include_contest_history=True):
         
         result['contestsAttended'] = len(rating_history)
         
-        # Get user submissions (for problems solved and heatmap)
-        logger.info(f"[API] Fetching submissions for {username}...")
-        submissions = safe_codeforces_request('user.status', {'handle': username, 'from': 1, 'count': 10000})
-        if submissions is None:
-            submissions = []
-        
-        # Calculate problem solving stats
-        solved_problems = set()
-        total_submissions = len(submissions)
-        accepted_submissions = 0
-        problem_ratings = []
-        
-        for submission in submissions:
-            if submission.get('verdict') == 'OK':
-                accepted_submissions += 1
-                problem = submission.get('problem', {})
-                problem_id = f"{problem.get('contestId', '')}{problem.get('index', '')}"
-                solved_problems.add(problem_id)
-                
-                # Track problem ratings
-                if 'rating' in problem:
-                    problem_ratings.append(problem['rating'])
+        # Submission totals (only what is newer than the stored watermark is downloaded)
+        submission_state = ingest_submissions(username)
         
-        result['totalSolved'] = len(solved_problems)
+        result['totalSolved'] = len(submission_state['solvedProblemIds'])
         result['problemsSolved'] = result['totalSolved']
-        result['totalSubmissions'] = total_submissions
-        result['acceptedSubmissions'] = accepted_submissions
+        result['totalSubmissions'] = submission_state['totalSubmissions']
+        result['acceptedSubmissions'] = submission_state['acceptedSubmissions']
         
         # Extract submission heatmap
         logger.info(f"[Heatmap] Extracting submission heatmap...")
-        heatmap_data = extract_submissions_heatmap(submissions)
+        heatmap_data = build_submission_heatmap(submission_state['submissionByDate'],
+                                                submission_state['totalSubmissions'])
         result['submissionHeatmap'] = heatmap_data['submissionHeatmap']
         result['submissionByDate'] = heatmap_data['submissionByDate']
         result['submissionStats'] = heatmap_data['submissionStats']
@@ -243,7 +398,8 @@ def scrape_codeforces_user(username, include_contest_history=True):
         # Extract contest history with details
         if include_contest_history:
             logger.info(f"[Contests] Fetching contest history for {username}...")
-            contest_history = get_codeforces_contest_history(username, rating_history, limit=10)
+            contest_history = get_codeforces_contest_history(username, rating_history, limit=10,
+                                                             submission_state=submission_state)
             if contest_history:
                 result['recentContests'] = contest_history
                 result['contestHistory'] = contest_history
@@ -252,6 +408,9 @@ def scrape_codeforces_user(username, include_contest_history=True):
                 result['recentContests'] = []
                 result['contestHistory'] = []
         
+        # user.rating / user.status ran; the cohort path reuses this data until the next full scrape
+        result['lastFullScrapeAt'] = datetime.utcnow()
+        
         logger.info(f"[Main] SUCCESS Codeforces data for {username}: {result['totalSolved']} solved, {result['rating']} rating, {result['contestsAttended']} contests, {result['totalSubmissions']} submissions")
         return result
         
@@ -260,11 +419,110 @@ def scrape_codeforces_user(username, include_contest_history=True):
         logger.exception("Full traceback:")
         return None
 
-def get_codeforces_contest_history(username, rating_history, limit=10):
+def fetch_codeforces_user_infos(handles):
+    """
+    user.info for many handles with one request per USER_INFO_CHUNK_SIZE handles.
+    Returns {handle.lower(): user object or None}; None marks a handle Codeforces
+    doesn't know. Handles missing from the dict could not be fetched at all.
+    """
+    infos = {}
+    unique = list(dict.fromkeys(h.strip() for h in handles if h and h.strip()))
+    
+    for start in range(0, len(unique), USER_INFO_CHUNK_SIZE):
+        chunk = unique[start:start + USER_INFO_CHUNK_SIZE]
+        while chunk:
+            errors = []
+            users = safe_codeforces_request('user.info', {'handles': ';'.join(chunk)}, errors=errors)
+            if users is not None:
+                for user in users:
+                    infos[user.get('handle', '').lower()] = user
+                # Renamed handles come back under their new name; remember the requested one too
+                for handle, user in zip(chunk, users):
+                    infos.setdefault(handle.lower(), user)
+                break
+            
+            # One unknown handle fails the whole call: drop it and retry the rest
+            missing = re.search(r'handle\s+(\S+)\s+not found', errors[-1] if errors else '', re.IGNORECASE)
+            if not missing:
+                logger.warning(f"[Cohort] user.info failed for {len(chunk)} handles")
+                break
+            bad = missing.group(1).lower()
+            infos[bad] = None
+            chunk = [h for h in chunk if h.lower() != bad]
+    
+    found = sum(1 for info in infos.values() if info)
+    logger.info(f"[Cohort] user.info: {found}/{len(unique)} handles in "
+                f"{max(1, -(-len(unique) // USER_INFO_CHUNK_SIZE))} chunk(s)")
+    return infos
+
+def codeforces_needs_full_scrape(user_info, previous):
+    """
+    Whether user.rating / user.status must be fetched again, judged from the
+    cheap user.info result against the stored platform data.
+    """
+    if not previous or previous.get('dataSource') != 'codeforces_api' or 'totalSubmissions' not in previous:
+        return True
+    if user_info.get('rating', 0) != previous.get('rating'):
+        return True
+    if user_info.get('lastOnlineTimeSeconds', 0) != previous.get('lastOnlineTime'):
+        return True  # any submission also moves last-online time
+    # updatedAt moves on every write, including user.info-only refreshes; this only on full scrapes
+    full_scrape_at = previous.get('lastFullScrapeAt')
+    if not isinstance(full_scrape_at, datetime):
+        return True
+    if full_scrape_at.tzinfo is not None:
+        full_scrape_at = full_scrape_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return datetime.utcnow() - full_scrape_at >= timedelta(hours=CODEFORCES_FULL_SCRAPE_HOURS)
+
+def scrape_codeforces_cohort(usernames, previous=None):
+    """
+    Cohort scrape: one or two user.info calls for everyone, then the expensive
+    user.rating / user.status follow-ups only for handles whose rating or
+    last-online time changed. Unchanged handles get their stored data back with
+    the fresh user.info fields.
+    
+    previous: {username: stored platforms.codeforces dict}
+    Returns {username: result dict or None}
+    """
+    previous = previous or {}
+    infos = fetch_codeforces_user_infos(usernames)
+    results = {}
+    full_scrapes = 0
+    
+    for username in dict.fromkeys(u for u in usernames if u):
+        key = username.strip().lower()
+        if key not in infos:
+            # Prefetch failed for this chunk; fall back to the standalone scrape
+            results[username] = scrape_codeforces_user(username)
+            full_scrapes += 1
+            continue
+        info = infos[key]
+        if info is None:
+            logger.warning(f"No Codeforces user found: {username}")
+            results[username] = None
+            continue
+        
+        stored = previous.get(username)
+        if codeforces_needs_full_scrape(info, stored):
+            results[username] = scrape_codeforces_user(username, user_info=info)
+            full_scrapes += 1
+        else:
+            result = {k: v for k, v in stored.items() if k != 'updatedAt'}
+            apply_user_info(result, info)
+            result['lastUpdated'] = datetime.utcnow()
+            results[username] = result
+    
+    logger.info(f"[Cohort] Codeforces: {full_scrapes} full scrapes, "
+                f"{len(results) - full_scrapes} refreshed from user.info only")
+    return results
+
+def get_codeforces_contest_history(username, rating_history, limit=10, submission_state=None):
     """
     Get detailed contest history for a user with dates, ranks, and problems solved
     Returns last N most recent contests in descending order (newest first)
     Similar structure to CodeChef contest history
+    
+    submission_state: the scrape's ingest_submissions() result (ingested here if omitted)
     """
     try:
         logger.info(f"[Contest History] Fetching contest history for {username} (limit: {limit})")
@@ -273,25 +531,14 @@ def get_codeforces_contest_history(username, rating_history, limit=10):
             logger.warning(f"No rating history found for {username}")
             return []
         
-        # Get recent submissions to find problems solved in contests
-        submissions = safe_codeforces_request('user.status', {'handle': username, 'from': 1, 'count': 5000})
-        if submissions is None:
-            submissions = []
-        
         # Map contest ID to problems solved
-        problems_by_contest = {}
-        for submission in submissions:
-            if submission.get('verdict') == 'OK':
-                problem = submission.get('problem', {})
-                contest_id = problem.get('contestId')
-                if contest_id:
-                    problem_id = f"{contest_id}{problem.get('index', '')}"
-                    if contest_id not in problems_by_contest:
-                        problems_by_contest[contest_id] = set()
-                    problems_by_contest[contest_id].add(problem_id)
+        if submission_state is None:
+            submission_state = ingest_submissions(username)
+        problems_by_contest = solved_problems_by_contest(submission_state)
         
         # Build contest history
         contests = []
+        contest_index = get_contest_index()
         for i, contest in enumerate(reversed(rating_history[-limit:])):  # Reverse to get newest first
             contest_id = contest.get('contestId')
             old_rating = contest.get('oldRating', 0)
@@ -299,13 +546,14 @@ def get_codeforces_contest_history(username, rating_history, limit=10):
             rating_change = new_rating - old_rating
             
             # Get problems solved for this contest
-            problems_solved = list(problems_by_contest.get(contest_id, set()))
+            problems_solved = sorted(problems_by_contest.get(contest_id, set()))
             problems_count = len(problems_solved)
             
-            # Convert timestamp to ISO date
+            # Contest start from the index; rating update time when the contest isn't indexed yet
+            info = contest_index.lookup('codeforces', contest_id) or {}
+            contest_date = info.get('start')
             timestamp = contest.get('ratingUpdateTimeSeconds', 0)
-            contest_date = None
-            if timestamp:
+            if not contest_date and timestamp:
                 contest_date = datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
             
             contests.append({
@@ -320,6 +568,7 @@ def get_codeforces_contest_history(username, rating_history, limit=10):
                 'newRating': new_rating,
                 'problemsSolved': problems_solved,
                 'problemsCount': problems_count,
+                'division': info.get('division', ''),
                 'attended': True
             })
         
@@ -331,10 +580,11 @@ def get_codeforces_contest_history(username, rating_history, limit=10):
         logger.exception("Full traceback:")
         return []
 
-def get_codeforces_contest_performance(username, limit=10):
-    """Get recent contest performance details"""
+def get_codeforces_contest_performance(username, limit=10, rating_history=None):
+    """Get recent contest performance details (pass the scrape's user.rating result to skip the request)"""
     try:
-        rating_history = safe_codeforces_request('user.rating', {'handle': username})
+        if rating_history is None:
+            rating_history = safe_codeforces_request('user.rating', {'handle': username})
         if not rating_history:
             return []
         
@@ -363,48 +613,22 @@ def get_codeforces_contest_performance(username, limit=10):
         logger.error(f"Error getting contest performance for {username}: {e}")
         return []
 
-def get_codeforces_problem_stats(username):
-    """Get detailed problem solving statistics"""
+def get_codeforces_problem_stats(username, submission_state=None):
+    """Get detailed problem solving statistics (from the scrape's submission state when given)"""
     try:
-        submissions = safe_codeforces_request('user.status', {'handle': username, 'from': 1, 'count': 2000})
-        if not submissions:
+        if submission_state is None:
+            submission_state = ingest_submissions(username)
+        if not submission_state.get('totalSubmissions'):
             return {}
         
-        stats = {
+        return {
             'by_rating': {},
-            'by_tags': {},
-            'by_verdict': {},
-            'solved_by_rating': {}
+            'by_tags': dict(submission_state.get('solvedByTags') or {}),
+            'by_verdict': dict(submission_state.get('verdictCounts') or {}),
+            'solved_by_rating': {int(bucket): count for bucket, count
+                                 in (submission_state.get('solvedByRating') or {}).items()}
         }
         
-        solved_problems = set()
-        
-        for submission in submissions:
-            verdict = submission.get('verdict', 'UNKNOWN')
-            problem = submission.get('problem', {})
-            
-            # Count by verdict
-            stats['by_verdict'][verdict] = stats['by_verdict'].get(verdict, 0) + 1
-            
-            # For accepted solutions only
-            if verdict == 'OK':
-                problem_id = f"{problem.get('contestId', '')}{problem.get('index', '')}"
-                if problem_id not in solved_problems:
-                    solved_problems.add(problem_id)
-                    
-                    # Count by rating
-                    rating = problem.get('rating', 0)
-                    if rating > 0:
-                        rating_bucket = (rating // 100) * 100  # Round to nearest 100
-                        stats['solved_by_rating'][rating_bucket] = stats['solved_by_rating'].get(rating_bucket, 0) + 1
-                    
-                    # Count by tags
-                    tags = problem.get('tags', [])
-                    for tag in tags:
-                        stats['by_tags'][tag] = stats['by_tags'].get(tag, 0) + 1
-        
-        return stats
-        
     except Exception as e:
         logger.error(f"Error getting problem stats for {username}: {e}")
         return {}
@@ -7,13 +7,9 @@ Enhanced with MongoDB integration and command-line support
 
 import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import json
 import time
 import sys
@@ -25,6 +21,8 @@ import re
 from pymongo import MongoClient
 import logging
 
+from browser_pool import get_browser_pool
+
 # Set UTF-8 encoding for Windows console
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -50,6 +48,7 @@ class CodeforcesProfileScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         self.driver = None
+        self.browser = None
         
     def extract_username(self, url):
         """Extract username from profile URL"""
@@ -63,26 +62,20 @@ class CodeforcesProfileScraper:
         raise ValueError(f"Invalid Codeforces profile URL: {url}")
     
     def setup_selenium(self):
-        """Setup Selenium WebDriver (optional, for future use)"""
+        """Lease a Chrome tab from the shared browser pool (optional, for future use)"""
         try:
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-            chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-            
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            self.browser = get_browser_pool().acquire()
+            self.driver = self.browser.driver
             return True
         except Exception as e:
             logger.warning(f"Selenium setup failed: {e}. Continuing without Selenium.")
             return False
         
     def close_selenium(self):
-        """Close Selenium WebDriver"""
-        if self.driver:
-            self.driver.quit()
+        """Return the leased Chrome tab to the pool"""
+        if self.browser:
+            get_browser_pool().release(self.browser)
+            self.browser = None
             self.driver = None
     
     def safe_api_request(self, endpoint, params=None, retries=3):
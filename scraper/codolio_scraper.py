@@ -5,51 +5,43 @@ Uses Selenium for JavaScript-rendered content
 Safe + Rate Limited + Comprehensive Data
 """
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-import time
-import random
 import logging
 from datetime import datetime
 
-logger = logging.getLogger(__name__)
+from rate_governor import get_governor
+from browser_pool import get_browser_pool
+from page_readiness import PageDeadline, wait_until, record_time_to_ready, text_matches, count_stable
 
-def create_driver():
-    """Create a fresh Chrome driver instance"""
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--window-size=1920,1080')
-    chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-    
-    try:
-        driver = webdriver.Chrome(options=chrome_options)
-        return driver
-    except Exception as e:
-        logger.error(f"Error creating Chrome driver: {e}")
-        return None
+logger = logging.getLogger(__name__)
 
 def scrape_codolio_user(username):
     """
     Scrape Codolio user data using Selenium
     Returns: dict with active days, contests, submissions, badges
     """
-    driver = create_driver()
-    if not driver:
-        logger.error("Failed to create Chrome driver for Codolio")
+    pool = get_browser_pool()
+    try:
+        browser = pool.acquire()
+    except Exception as e:
+        logger.error(f"Failed to get a Chrome tab for Codolio: {e}")
         return None
+    driver = browser.driver
     
     try:
         logger.info(f"Scraping Codolio for {username}")
         
         url = f"https://codolio.com/profile/{username}"
+        get_governor().acquire(url)
         driver.get(url)
         
-        # Wait for page to load
-        time.sleep(6)
+        # Wait until the profile stats have rendered (and stopped changing)
+        deadline = PageDeadline()
+        if wait_until(driver, text_matches('total active days|total contests|submissions'),
+                      'codolio.stats', timeout=20, deadline=deadline):
+            wait_until(driver, count_stable("span[class*='text-']"), 'codolio.stats_stable',
+                       timeout=5, deadline=deadline)
+        record_time_to_ready('codolio.profile_page', deadline.elapsed())
         
         # Initialize result
         result = {
@@ -171,10 +163,7 @@ def scrape_codolio_user(username):
         logger.error(f"Error scraping Codolio for {username}: {str(e)[:50]}")
         return None
     finally:
-        try:
-            driver.quit()
-        except:
-            pass
+        pool.release(browser)
 
 def get_codolio_heatmap(username):
     """Get Codolio heatmap data for daily activity"""
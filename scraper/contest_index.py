@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Contest Index - Cached contest metadata for CodeChef, Codeforces and LeetCode
+Daily refresh + JSON file cache + O(1) lookup by contest code or name
+
+Scrapers look contests up here instead of estimating dates from contest
+numbers (Starters N x 7 days, ...) or loading a page per contest:
+
+    info = get_contest_index().lookup('codechef', 'START130B')
+    info['start']  # ISO start time
+
+The index is rebuilt from each platform's contest list at most once per
+CONTEST_INDEX_TTL_HOURS and cached in CONTEST_INDEX_PATH, so restarts and
+one-off scripts reuse it.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+import http_client
+from rate_governor import get_governor
+
+logger = logging.getLogger(__name__)
+
+CONTEST_INDEX_PATH = os.getenv(
+    'CONTEST_INDEX_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'contest_index.json')
+)
+CONTEST_INDEX_TTL_HOURS = float(os.getenv('CONTEST_INDEX_TTL_HOURS', '24'))
+# When every platform fails to refresh, try again this much later instead of a full TTL
+RETRY_SECONDS = 900
+
+CODEFORCES_CONTEST_LIST_URL = 'https://codeforces.com/api/contest.list'
+CODECHEF_CONTEST_LIST_URL = 'https://www.codechef.com/api/list/contests/all'
+CODECHEF_LIST_PAGES = int(os.getenv('CONTEST_INDEX_CODECHEF_PAGES', '10'))
+CODECHEF_LIST_PAGE_SIZE = 20
+LEETCODE_GRAPHQL_URL = 'https://leetcode.com/graphql'
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/json',
+}
+
+DIVISION_PATTERN = re.compile(r'\(?\b(Div(?:ision)?\.?\s*\d(?:\s*\+\s*\d)?|Educational|Global)\b', re.IGNORECASE)
+CODECHEF_DIVISION_SUFFIX = re.compile(r'^(.*\d)([A-D])$')
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat() if timestamp else None
+
+
+def _name_key(name):
+    """Case/spacing-insensitive contest name key ('Starters 130' == 'starters  130')"""
+    return re.sub(r'[^a-z0-9]+', ' ', (name or '').lower()).strip()
+
+
+def _get_json(url, params=None, json_data=None, timeout=30):
+    governor = get_governor()
+    governor.acquire(url)
+    if json_data is not None:
+        response = http_client.post(url, json=json_data, headers={**HEADERS, 'Content-Type': 'application/json'},
+                                 timeout=timeout)
+    else:
+        response = http_client.get(url, params=params, headers=HEADERS, timeout=timeout)
+    governor.observe(url, response)
+    response.raise_for_status()
+    return response.json()
+
+
+# ----------------------------------------------------------------------
+# Per-platform contest lists -> {code: {name, start, end, division}}
+# ----------------------------------------------------------------------
+
+def fetch_codeforces_contests():
+    payload = _get_json(CODEFORCES_CONTEST_LIST_URL, params={'gym': 'false'})
+    if payload.get('status') != 'OK':
+        raise ValueError(payload.get('comment', 'contest.list failed'))
+    contests = {}
+    for contest in payload.get('result', []):
+        start = contest.get('startTimeSeconds')
+        division = DIVISION_PATTERN.search(contest.get('name', ''))
+        contests[str(contest['id'])] = {
+            'name': contest.get('name', ''),
+            'start': _iso(start),
+            'end': _iso(start + contest.get('durationSeconds', 0)) if start else None,
+            'division': division.group(1) if division else '',
+        }
+    return contests
+
+
+def fetch_codechef_contests():
+    contests = {}
+    for page in range(CODECHEF_LIST_PAGES):
+        payload = _get_json(CODECHEF_CONTEST_LIST_URL, params={
+            'sort_by': 'START', 'sorting_order': 'desc',
+            'offset': page * CODECHEF_LIST_PAGE_SIZE, 'mode': 'all'
+        })
+        past = payload.get('past_contests') or []
+        for contest in (payload.get('present_contests') or []) + (payload.get('future_contests') or []) + past:
+            code = contest.get('contest_code')
+            if not code:
+                continue
+            contests[code] = {
+                'name': contest.get('contest_name', code),
+                'start': contest.get('contest_start_date_iso'),
+                'end': contest.get('contest_end_date_iso'),
+                'division': '',
+            }
+        if len(past) < CODECHEF_LIST_PAGE_SIZE:
+            break
+    return contests
+
+
+def fetch_leetcode_contests():
+    query = {'query': 'query { allContests { title titleSlug startTime duration } }'}
+    payload = _get_json(LEETCODE_GRAPHQL_URL, json_data=query)
+    contests = {}
+    for contest in ((payload.get('data') or {}).get('allContests') or []):
+        start = contest.get('startTime')
+        contests[contest['titleSlug']] = {
+            'name': contest.get('title', ''),
+            'start': _iso(start),
+            'end': _iso(start + (contest.get('duration') or 0)) if start else None,
+            'division': '',
+        }
+    return contests
+
+
+FETCHERS = {
+    'codeforces': fetch_codeforces_contests,
+    'codechef': fetch_codechef_contests,
+    'leetcode': fetch_leetcode_contests,
+}
+
+
+class ContestIndex:
+    """In-memory contest metadata with a name -> code map per platform"""
+
+    def __init__(self, path=CONTEST_INDEX_PATH, ttl_hours=CONTEST_INDEX_TTL_HOURS):
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self.contests = {}      # platform -> {code: info}
+        self.by_name = {}       # platform -> {name key: code}
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()
+        self.refreshing = threading.Lock()
+        self._load_file()
+
+    def _install(self, contests, refreshed_at):
+        by_name = {
+            platform: {_name_key(info.get('name')): code for code, info in entries.items()}
+            for platform, entries in contests.items()
+        }
+        with self.lock:
+            self.contests = contests
+            self.by_name = by_name
+            self.refreshed_at = refreshed_at
+
+    def _load_file(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            self._install(cached.get('contests', {}), cached.get('refreshedAt', 0.0))
+            logger.info(f"[ContestIndex] Loaded {sum(len(v) for v in self.contests.values())} contests from cache")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"[ContestIndex] Ignoring unreadable cache {self.path}: {e}")
+
+    def is_stale(self):
+        return time.time() - self.refreshed_at >= self.ttl_seconds
+
+    def refresh(self, force=False):
+        """Rebuild from the platforms' contest lists; platforms that fail keep their old entries"""
+        if not self.refreshing.acquire(blocking=False):
+            return False  # another thread is already refreshing
+        try:
+            if not force and not self.is_stale():
+                return False
+            with self.lock:
+                contests = dict(self.contests)
+            refreshed = 0
+            for platform, fetch in FETCHERS.items():
+                try:
+                    contests[platform] = fetch()
+                    refreshed += 1
+                    logger.info(f"[ContestIndex] {platform}: {len(contests[platform])} contests")
+                except Exception as e:
+                    logger.warning(f"[ContestIndex] Could not refresh {platform}: {e}")
+            if not refreshed:
+                with self.lock:
+                    self.refreshed_at = time.time() - self.ttl_seconds + RETRY_SECONDS
+                return False
+            refreshed_at = time.time()
+            self._install(contests, refreshed_at)
+            try:
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'refreshedAt': refreshed_at, 'contests': contests}, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"[ContestIndex] Could not write cache {self.path}: {e}")
+            return True
+        finally:
+            self.refreshing.release()
+
+    def lookup(self, platform, code=None, name=None):
+        """
+        Metadata for a contest by code (division suffixes like START130B fall back
+        to START130) or by display name. Returns {code, name, start, end, division} or None.
+        """
+        if self.is_stale():
+            if self.contests:
+                # Serve the cached entries while a background thread refreshes them
+                if not self.refreshing.locked():
+                    threading.Thread(target=self.refresh, name='contest-index-refresh', daemon=True).start()
+            else:
+                self.refresh()
+        with self.lock:
+            entries = self.contests.get(platform) or {}
+            candidates = []
+            if code:
+                code = str(code)
+                candidates.append(code)
+                division = CODECHEF_DIVISION_SUFFIX.match(code) if platform == 'codechef' else None
+                if division:
+                    candidates.append(division.group(1))
+            if name:
+                named = self.by_name.get(platform, {}).get(_name_key(name))
+                if named:
+                    candidates.append(named)
+            for candidate in candidates:
+                info = entries.get(candidate)
+                if info:
+                    return {'code': candidate, **info}
+        return None
+
+    def start_date(self, platform, code=None, name=None):
+        """ISO start time or None"""
+        info = self.lookup(platform, code, name)
+        return info.get('start') if info else None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_contest_index():
+    """Process-wide ContestIndex (loaded from the cache file, refreshed when stale)"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ContestIndex()
+        return _index
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    get_contest_index().refresh(force=True)
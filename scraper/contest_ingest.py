@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Contest Ingest - Contest-centric rating/rank updates for the whole cohort
+One contest fetch + Filter to our students + One bulk write
+
+After a contest finishes every participating student changes at once. Instead
+of re-scraping each profile, fetch the contest's results once and fold them
+into each participant's contestHistory:
+
+  Codeforces: contest.ratingChanges (ratings) + contest.standings filtered to
+              our handles (problems solved)
+  CodeChef:   the contest rankings API, paged until every cohort handle is found;
+              the rating change comes from the row when it has one, else from
+              the student's previous contest, and is left out when neither exists
+
+Usage: python contest_ingest.py codeforces <contestId>
+       python contest_ingest.py codechef <contestCode>   (e.g. START130; divisions A-D are tried)
+"""
+
+import logging
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+from pymongo import MongoClient, UpdateOne
+
+from codeforces_scraper import safe_codeforces_request
+from codechef_scraper import safe_request as safe_codechef_request
+from contest_index import get_contest_index
+
+logger = logging.getLogger(__name__)
+
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/go-tracker')
+
+# Entries kept in contestHistory/recentContests (matches the per-user scrapers)
+CONTEST_HISTORY_LIMIT = 10
+
+# Handles per contest.standings call
+STANDINGS_HANDLE_CHUNK = 100
+
+# CodeChef rankings paging
+CODECHEF_RANKINGS_URL = 'https://www.codechef.com/api/rankings/{code}'
+CODECHEF_RANKINGS_PAGE_SIZE = 100
+CODECHEF_RANKINGS_MAX_PAGES = int(os.getenv('CODECHEF_RANKINGS_MAX_PAGES', '50'))
+CODECHEF_DIVISIONS = ('A', 'B', 'C', 'D')
+CODECHEF_API_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/json',
+}
+
+
+def _cohort_handles(students, platform):
+    """{handle.lower(): [student _id, ...]} for active students with a username on the platform"""
+    handles = {}
+    for student in students.find(
+        {'isActive': {'$ne': False}, f'platformUsernames.{platform}': {'$nin': [None, '']}},
+        {f'platformUsernames.{platform}': 1}
+    ):
+        handle = (student.get('platformUsernames') or {}).get(platform, '').strip().lower()
+        if handle:
+            handles.setdefault(handle, []).append(student['_id'])
+    return handles
+
+
+def codechef_contest_name(contest_code):
+    """START130B -> Starters 130 (same naming as the profile scraper)"""
+    base = re.sub(r'(\d+)[A-D]$', r'\1', contest_code)
+    for prefix, name in (('START', 'Starters '), ('COOK', 'Cook-Off '), ('LTIME', 'Lunchtime ')):
+        if base.startswith(prefix):
+            return base.replace(prefix, name)
+    return base
+
+
+# ----------------------------------------------------------------------
+# Codeforces
+# ----------------------------------------------------------------------
+
+def fetch_codeforces_contest_results(contest_id, handles):
+    """
+    {handle.lower(): contestHistory entry} for the given handles that were rated
+    in the contest. Two requests for the whole cohort (plus one per extra
+    STANDINGS_HANDLE_CHUNK handles).
+    """
+    changes = safe_codeforces_request('contest.ratingChanges', {'contestId': contest_id})
+    if not changes:
+        logger.warning(f"[ContestIngest] No rating changes for Codeforces contest {contest_id} (not rated yet?)")
+        return {}
+
+    wanted = set(handles)
+    entries = {}
+    contest_index = get_contest_index()
+    for change in changes:
+        handle = change.get('handle', '').lower()
+        if handle not in wanted:
+            continue
+        old_rating = change.get('oldRating', 0)
+        new_rating = change.get('newRating', 0)
+        timestamp = change.get('ratingUpdateTimeSeconds', 0)
+        info = contest_index.lookup('codeforces', contest_id) or {}
+        entries[handle] = {
+            'contestId': contest_id,
+            'contestCode': str(contest_id),
+            'name': change.get('contestName', f'Contest {contest_id}'),
+            'date': (info.get('start')
+                     or (datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat() if timestamp else None)),
+            'rating': new_rating,
+            'rank': change.get('rank', 0),
+            'ratingChange': new_rating - old_rating,
+            'oldRating': old_rating,
+            'newRating': new_rating,
+            'problemsSolved': [],
+            'problemsCount': 0,
+            'division': info.get('division', ''),
+            'attended': True
+        }
+
+    # Problems solved, only for our participants
+    participants = list(entries)
+    for start in range(0, len(participants), STANDINGS_HANDLE_CHUNK):
+        chunk = participants[start:start + STANDINGS_HANDLE_CHUNK]
+        standings = safe_codeforces_request('contest.standings', {
+            'contestId': contest_id,
+            'handles': ';'.join(chunk),
+            'showUnofficial': 'false'
+        })
+        if not standings:
+            continue
+        problems = standings.get('problems', [])
+        for row in standings.get('rows', []):
+            solved = [
+                f"{contest_id}{problems[i].get('index', '')}"
+                for i, result in enumerate(row.get('problemResults', []))
+                if i < len(problems) and result.get('points', 0) > 0
+            ]
+            for member in (row.get('party') or {}).get('members', []):
+                entry = entries.get(member.get('handle', '').lower())
+                if entry:
+                    entry['problemsSolved'] = solved
+                    entry['problemsCount'] = len(solved)
+
+    return entries
+
+
+# ----------------------------------------------------------------------
+# CodeChef
+# ----------------------------------------------------------------------
+
+def _codechef_row_problems(row):
+    """Solved problem codes from a rankings row, when the API includes per-problem scores"""
+    status = row.get('problems_status') or row.get('problems') or {}
+    if isinstance(status, dict):
+        return sorted(code for code, value in status.items()
+                      if (value.get('score', 0) if isinstance(value, dict) else value) > 0)
+    return []
+
+
+def _codechef_row_rating(row):
+    """
+    {rating[, ratingChange, oldRating, newRating]} from a rankings row. The
+    change is only included when the row carries it (rating_change / change or
+    old/new ratings); otherwise _merge_entry derives it from the previous contest.
+    """
+    def number(*keys):
+        for key in keys:
+            try:
+                if row.get(key) not in (None, ''):
+                    return int(row[key])
+            except (TypeError, ValueError):
+                continue
+        return None
+
+    new_rating = number('new_rating', 'newRating', 'rating')
+    old_rating = number('old_rating', 'oldRating')
+    change = number('rating_change', 'ratingChange', 'change')
+    fields = {'rating': new_rating or 0}
+    if new_rating is not None and old_rating is not None:
+        change = new_rating - old_rating
+    if new_rating is not None and change is not None:
+        fields.update(ratingChange=change, oldRating=new_rating - change, newRating=new_rating)
+    return fields
+
+
+def fetch_codechef_contest_results(contest_code, handles, contest_date=None):
+    """
+    {handle.lower(): contestHistory entry} for the handles found in the contest
+    rankings. Divisions (START130A..D) are tried when a bare code is given.
+    """
+    codes = [contest_code]
+    if contest_code[-1:].isdigit():
+        codes = [contest_code + division for division in CODECHEF_DIVISIONS] + [contest_code]
+
+    remaining = set(handles)
+    entries = {}
+    date = (contest_date or get_contest_index().start_date('codechef', contest_code)
+            or datetime.now(timezone.utc).isoformat())
+
+    for code in codes:
+        if not remaining:
+            break
+        for page in range(1, CODECHEF_RANKINGS_MAX_PAGES + 1):
+            url = (f"{CODECHEF_RANKINGS_URL.format(code=code)}?itemsPerPage={CODECHEF_RANKINGS_PAGE_SIZE}"
+                   f"&order=asc&page={page}&sortBy=rank")
+            response = safe_codechef_request(url, headers=CODECHEF_API_HEADERS)
+            if not response:
+                break
+            try:
+                payload = response.json()
+            except ValueError:
+                logger.warning(f"[ContestIngest] CodeChef rankings for {code} did not return JSON")
+                break
+            rows = payload.get('list') or []
+            for row in rows:
+                handle = (row.get('user_handle') or row.get('username') or '').lower()
+                if handle not in remaining:
+                    continue
+                problems = _codechef_row_problems(row)
+                entries[handle] = {
+                    'contestCode': code,
+                    'name': codechef_contest_name(code),
+                    'date': date,
+                    'rank': int(row.get('rank') or 0),
+                    **_codechef_row_rating(row),
+                    'problemsSolved': problems,
+                    'problemsCount': len(problems),
+                    'attended': True
+                }
+                remaining.discard(handle)
+            if not remaining or not rows or page >= int(payload.get('availablePages') or page):
+                break
+
+    logger.info(f"[ContestIngest] CodeChef {contest_code}: {len(entries)} cohort participants found")
+    return entries
+
+
+# ----------------------------------------------------------------------
+# Writing
+# ----------------------------------------------------------------------
+
+def _merge_entry(platform_data, entry, platform):
+    """$set fields adding one contest to a student's stored platform data"""
+    if platform == 'codeforces':
+        same = lambda c: c.get('contestId') == entry['contestId']
+    else:
+        # Profile-scraped entries may carry the bare or the division code; the name is shared
+        same = lambda c: c.get('contestCode') == entry['contestCode'] or c.get('name') == entry['name']
+    history = [c for c in (platform_data.get('contestHistory') or []) if not same(c)]
+    is_new = len(history) == len(platform_data.get('contestHistory') or [])
+
+    entry = dict(entry)  # shared by every student with this handle
+    if 'ratingChange' not in entry and entry.get('rating'):
+        # No change in the rankings payload: take it from the previous rated contest
+        earlier = [c for c in history if (c.get('date') or '') < (entry.get('date') or '') and c.get('rating')]
+        if earlier:
+            previous = max(earlier, key=lambda c: c.get('date') or '')
+            entry.update(ratingChange=entry['rating'] - previous['rating'], oldRating=previous['rating'],
+                         newRating=entry['rating'])
+
+    history = sorted([entry] + history, key=lambda c: c.get('date') or '', reverse=True)[:CONTEST_HISTORY_LIMIT]
+
+    prefix = f'platforms.{platform}'
+    update = {
+        f'{prefix}.contestHistory': history,
+        f'{prefix}.recentContests': history,
+        f'{prefix}.updatedAt': datetime.utcnow(),
+    }
+    if is_new and platform_data.get('contestsAttended') is not None:
+        update[f'{prefix}.contestsAttended'] = platform_data['contestsAttended'] + 1
+
+    # Only the newest contest decides the current rating
+    if history[0] is entry and entry.get('newRating'):
+        update[f'{prefix}.rating'] = entry['newRating']
+        update[f'{prefix}.currentRating'] = entry['newRating']
+        max_rating = max(platform_data.get('maxRating') or 0, entry['newRating'])
+        update[f'{prefix}.maxRating'] = max_rating
+        update[f'{prefix}.highestRating'] = max_rating
+    return update
+
+
+def ingest_contest(students, platform, contest, contest_date=None):
+    """
+    Fetch one finished contest and update every participating student in one
+    bulk write. Returns the number of students updated.
+    """
+    handles = _cohort_handles(students, platform)
+    if not handles:
+        return 0
+
+    if platform == 'codeforces':
+        entries = fetch_codeforces_contest_results(int(contest), handles)
+    elif platform == 'codechef':
+        entries = fetch_codechef_contest_results(str(contest).upper(), handles, contest_date)
+    else:
+        raise ValueError(f"Contest ingest is not supported for {platform}")
+
+    if not entries:
+        return 0
+
+    student_ids = [sid for handle in entries for sid in handles[handle]]
+    stored = {
+        s['_id']: (s.get('platforms') or {}).get(platform) or {}
+        for s in students.find({'_id': {'$in': student_ids}}, {f'platforms.{platform}': 1})
+    }
+
+    operations = []
+    for handle, entry in entries.items():
+        for student_id in handles[handle]:
+            operations.append(UpdateOne({'_id': student_id},
+                                        {'$set': _merge_entry(stored.get(student_id, {}), entry, platform)}))
+
+    result = students.bulk_write(operations, ordered=False)
+    logger.info(f"✅ [ContestIngest] {platform} {contest}: updated {result.modified_count} students "
+                f"with one contest fetch")
+    return result.modified_count
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 3 or sys.argv[1] not in ('codeforces', 'codechef'):
+        print("Usage: python contest_ingest.py <codeforces|codechef> <contest id/code>")
+        sys.exit(1)
+
+    client = MongoClient(MONGO_URI)
+    try:
+        updated = ingest_contest(client['go-tracker'].students, sys.argv[1], sys.argv[2])
+        print(f"✅ Updated {updated} students")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+ETag Cache - Conditional GET support for REST APIs (GitHub)
+ETag/Last-Modified per URL and token + Cached parsed body + Hit/miss counters
+
+GitHub answers a request carrying If-None-Match / If-Modified-Since with an
+empty 304 when nothing changed, and 304s don't count against the primary
+rate limit. safe_github_request sends the validators stored here and reuses
+the cached body on a 304:
+
+    cache = get_etag_cache()
+    entry = cache.get(url, token)
+    headers.update(cache.conditional_headers(entry))
+
+Entries are keyed by a hash of URL + token (responses differ per token, and
+tokens are never stored). They live in the http_cache collection once the
+production scheduler calls configure_etag_cache(); until then they are kept
+in memory for the lifetime of the process.
+"""
+
+import copy
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class ETagCache:
+    """cache key -> {url, etag, lastModified, body}. collection=None keeps entries in memory"""
+
+    def __init__(self, collection=None):
+        self.collection = collection
+        self.memory = {}
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0}
+        if collection is not None:
+            try:
+                collection.create_index('key', unique=True)
+            except Exception as e:
+                logger.warning(f"Could not ensure http_cache index: {e}")
+
+    @staticmethod
+    def _key(url, token):
+        return hashlib.sha256(f"{token or ''}\n{url}".encode('utf-8')).hexdigest()
+
+    def get(self, url, token=None):
+        """Stored entry or None"""
+        key = self._key(url, token)
+        if self.collection is None:
+            with self.lock:
+                return copy.deepcopy(self.memory.get(key))
+        try:
+            return self.collection.find_one({'key': key}, {'_id': 0})
+        except Exception as e:
+            logger.error(f"Failed to read ETag cache for {url}: {e}")
+            return None
+
+    @staticmethod
+    def conditional_headers(entry):
+        """If-None-Match / If-Modified-Since for a stored entry"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('lastModified'):
+                headers['If-Modified-Since'] = entry['lastModified']
+        return headers
+
+    def store(self, url, token, response, body):
+        """Remember the parsed body of a 200 that carries an ETag or Last-Modified"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        key = self._key(url, token)
+        entry = {
+            'key': key,
+            'url': url,
+            'etag': etag,
+            'lastModified': last_modified,
+            'body': body,
+            'updatedAt': datetime.utcnow()
+        }
+        with self.lock:
+            self.stats['stores'] += 1
+        if self.collection is None:
+            with self.lock:
+                self.memory[key] = copy.deepcopy(entry)
+            return
+        try:
+            self.collection.update_one({'key': key}, {'$set': entry}, upsert=True)
+        except Exception as e:
+            logger.error(f"Failed to save ETag cache for {url}: {e}")
+
+    def record(self, hit):
+        with self.lock:
+            self.stats['hits' if hit else 'misses'] += 1
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / total * 100, 1) if total else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def configure_etag_cache(collection):
+    """Persist entries in a MongoDB collection (call once at startup)"""
+    global _cache
+    with _cache_lock:
+        _cache = ETagCache(collection)
+        return _cache
+
+
+def get_etag_cache():
+    """Process-wide ETagCache (in-memory until configured)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ETagCache()
+        return _cache
@@ -7,53 +7,135 @@ Safe + Rate Limited + Real-time commits/contributions
 
 import requests
 import time
-import random
 import logging
 import os
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
+import http_client
+from rate_governor import get_governor
+from etag_cache import get_etag_cache
+from github_tokens import get_token_pool
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-# GitHub API configuration
-GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', '')
+# GitHub API configuration (tokens come from GITHUB_TOKENS / GITHUB_TOKEN via the token pool)
 GITHUB_API_BASE = 'https://api.github.com'
 GITHUB_GRAPHQL = 'https://api.github.com/graphql'
 
-def get_github_headers():
-    """Get headers for GitHub API requests"""
+# Users per aliased GraphQL document in batch mode
+GITHUB_BATCH_SIZE = int(os.getenv('GITHUB_BATCH_SIZE', '10'))
+
+# Everything scrape_github_user collects, for one user
+USER_FRAGMENT = """
+fragment UserFields on User {
+    login
+    name
+    bio
+    location
+    company
+    websiteUrl
+    createdAt
+    followers { totalCount }
+    following { totalCount }
+    publicRepos: repositories(privacy: PUBLIC, ownerAffiliations: OWNER) { totalCount }
+    recentRepos: repositories(first: 100, privacy: PUBLIC, ownerAffiliations: OWNER,
+                              orderBy: {field: UPDATED_AT, direction: DESC}) {
+        nodes {
+            stargazerCount
+            forkCount
+            primaryLanguage { name }
+        }
+    }
+    contributionsCollection {
+        totalCommitContributions
+        totalIssueContributions
+        totalPullRequestContributions
+        contributionCalendar {
+            totalContributions
+            weeks {
+                contributionDays {
+                    contributionCount
+                    date
+                }
+            }
+        }
+    }
+    lastWeek: contributionsCollection(from: $since) {
+        totalCommitContributions
+        totalPullRequestContributions
+    }
+}
+"""
+
+def get_github_headers(token=None):
+    """Get headers for GitHub API requests (token picked by the token pool)"""
     headers = {
         'User-Agent': 'GO-Tracker-Student-Dashboard/1.0',
         'Accept': 'application/vnd.github.v3+json'
     }
     
-    if GITHUB_TOKEN:
-        headers['Authorization'] = f'token {GITHUB_TOKEN}'
+    if token:
+        headers['Authorization'] = f'token {token}'
     
     return headers
 
+def _pool_token(pool, resource, what):
+    """(token, usable): usable is False when every configured token is at its reserve"""
+    if not pool.tokens:
+        return None, True
+    token = pool.acquire(resource)
+    if token is None:
+        logger.warning(f"All GitHub tokens are low on {resource} budget, skipping {what} until they reset")
+        return None, False
+    return token, True
+
+def _token_exhausted(response):
+    return str(response.headers.get('X-RateLimit-Remaining', '')).strip() == '0'
+
 def safe_github_request(url, headers=None, timeout=10, retries=3):
-    """Make a safe GitHub API request with rate limit handling"""
-    if headers is None:
-        headers = get_github_headers()
+    """
+    Make a safe GitHub API request with rate limit handling. Each attempt uses
+    the pooled token with the most budget left. Sends the cached ETag/Last-Modified
+    and reuses the cached body on a 304 (free of rate limit).
+    """
+    governor = get_governor()
+    cache = get_etag_cache()
+    pool = get_token_pool()
     
     for attempt in range(retries):
+        token, usable = _pool_token(pool, 'core', url)
+        if not usable:
+            return None
+        cached = cache.get(url, token)
+        request_headers = {**get_github_headers(token), **(headers or {}), **cache.conditional_headers(cached)}
+        
         try:
-            # Random delay to avoid rate limiting
-            time.sleep(random.uniform(1, 2))
+            # Wait for api.github.com's rate budget
+            governor.acquire(url)
             
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = http_client.get(url, headers=request_headers, timeout=timeout)
+            # With a token pool an exhausted token is rotated out instead of pausing the host
+            paused = governor.observe(url, response, rate_headers=not pool.tokens)
+            pool.observe(token, response)
             
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 403:  # Rate limited
-                reset_time = int(response.headers.get('X-RateLimit-Reset', 0))
-                current_time = int(time.time())
-                wait_time = max(reset_time - current_time, 60)  # Wait at least 1 minute
-                
-                logger.warning(f"GitHub rate limited, waiting {wait_time}s")
-                time.sleep(min(wait_time, 300))  # Max 5 minutes wait
+            if response.status_code == 304 and cached:
+                cache.record(hit=True)
+                return cached['body']
+            elif response.status_code == 200:
+                body = response.json()
+                cache.record(hit=False)
+                cache.store(url, token, response, body)
+                return body
+            elif response.status_code in (403, 429):  # Rate limited
+                if pool.tokens and _token_exhausted(response):
+                    logger.warning(f"GitHub token exhausted (HTTP {response.status_code}), retry {attempt + 1} with the next token")
+                    continue
+                # The governor already parked api.github.com until X-RateLimit-Reset / Retry-After
+                logger.warning(f"GitHub rate limited (HTTP {response.status_code}), retry {attempt + 1} after the governor's pause")
+                if not paused:
+                    governor.backoff(url, attempt, base=30)
                 continue
             elif response.status_code == 404:
                 logger.warning(f"GitHub user not found: {url}")
@@ -72,16 +154,84 @@ def safe_github_request(url, headers=None, timeout=10, retries=3):
     
     return None
 
+def recent_calendar_contributions(calendar):
+    """Contributions in the last 7 days of a contributionCalendar"""
+    recent_contributions = 0
+    weeks = calendar.get('weeks', [])
+    
+    if weeks:
+        # Get last week's data
+        last_week = weeks[-1] if weeks else {}
+        recent_days = last_week.get('contributionDays', [])
+        
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=7)
+        
+        for day in recent_days:
+            day_date = datetime.fromisoformat(day.get('date', ''))
+            # Ensure day_date is timezone-aware
+            if day_date.tzinfo is None:
+                day_date = day_date.replace(tzinfo=timezone.utc)
+            if day_date >= cutoff_date:
+                recent_contributions += day.get('contributionCount', 0)
+    
+    return recent_contributions
+
+def calculate_contribution_streaks(calendar, today=None):
+    """
+    (currentStreak, longestStreak) in days from a contributionCalendar, in one
+    pass over its days. The calendar is dated in UTC, so a zero-contribution
+    day that is today or yesterday (UTC) at the end of the calendar does not
+    break the current streak: the day may not be over yet where the user lives.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    grace_from = (today - timedelta(days=1)).isoformat()
+    # Users ahead of UTC can already have "tomorrow" in their calendar
+    last_date = (today + timedelta(days=1)).isoformat()
+    
+    days = [
+        (day.get('date', ''), day.get('contributionCount', 0))
+        for week in calendar.get('weeks', [])
+        for day in week.get('contributionDays', [])
+        if day.get('date', '') <= last_date
+    ]
+    
+    longest = run = 0
+    for _, count in days:
+        run = run + 1 if count > 0 else 0
+        longest = max(longest, run)
+    
+    end = len(days)
+    while end > 0 and days[end - 1][1] == 0 and days[end - 1][0] >= grace_from:
+        end -= 1
+    current = 0
+    while end > 0 and days[end - 1][1] > 0:
+        current += 1
+        end -= 1
+    
+    return current, longest
+
+def last_week_since():
+    """Start of the 7-day window behind recentCommits/recentPRs (GraphQL DateTime)"""
+    return (datetime.now(timezone.utc) - timedelta(days=7)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
 def get_github_contributions_graphql(username):
-    """Get GitHub contributions using GraphQL API"""
-    if not GITHUB_TOKEN:
+    """
+    Get GitHub contributions using GraphQL API: (total, last 7 days,
+    contributionCalendar, lastWeek). lastWeek holds the 7-day commit/PR totals
+    the batch path uses too, or None when GraphQL was not available.
+    """
+    if not get_token_pool().tokens:
         logger.warning("No GitHub token provided, skipping GraphQL contributions")
-        return 0, 0
+        return 0, 0, {}, None
     
     try:
         query = """
-        query($username: String!) {
+        query($username: String!, $since: DateTime!) {
             user(login: $username) {
+                lastWeek: contributionsCollection(from: $since) {
+                    totalCommitContributions
+                    totalPullRequestContributions
+                }
                 contributionsCollection {
                     totalCommitContributions
                     totalIssueContributions
@@ -101,54 +251,25 @@ def get_github_contributions_graphql(username):
         }
         """
         
-        payload = {
-            'query': query,
-            'variables': {'username': username}
-        }
+        data = safe_github_graphql(query, {'username': username, 'since': last_week_since()}, timeout=10)
         
-        headers = get_github_headers()
-        headers['Content-Type'] = 'application/json'
-        
-        response = requests.post(GITHUB_GRAPHQL, json=payload, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            user_data = data.get('data', {}).get('user', {})
+        if data:
+            user_data = (data.get('data') or {}).get('user') or {}
             
             if user_data:
                 contributions = user_data.get('contributionsCollection', {})
                 calendar = contributions.get('contributionCalendar', {})
                 
                 total_contributions = calendar.get('totalContributions', 0)
-                total_commits = contributions.get('totalCommitContributions', 0)
-                
-                # Calculate recent contributions (last 7 days)
-                recent_contributions = 0
-                weeks = calendar.get('weeks', [])
-                
-                if weeks:
-                    # Get last week's data
-                    last_week = weeks[-1] if weeks else {}
-                    recent_days = last_week.get('contributionDays', [])
-                    
-                    cutoff_date = datetime.now(timezone.utc) - timedelta(days=7)
-                    
-                    for day in recent_days:
-                        day_date = datetime.fromisoformat(day.get('date', ''))
-                        # Ensure day_date is timezone-aware
-                        if day_date.tzinfo is None:
-                            day_date = day_date.replace(tzinfo=timezone.utc)
-                        if day_date >= cutoff_date:
-                            recent_contributions += day.get('contributionCount', 0)
-                
-                return total_contributions, recent_contributions
+                return (total_contributions, recent_calendar_contributions(calendar), calendar,
+                        user_data.get('lastWeek') or {})
         
         logger.warning(f"GraphQL query failed for {username}")
-        return 0, 0
+        return 0, 0, {}, None
         
     except Exception as e:
         logger.error(f"Error getting GitHub contributions for {username}: {e}")
-        return 0, 0
+        return 0, 0, {}, None
 
 def scrape_github_user(username):
     """
@@ -179,27 +300,26 @@ def scrape_github_user(username):
         total_stars = sum(repo.get('stargazers_count', 0) for repo in repos_data)
         total_forks = sum(repo.get('forks_count', 0) for repo in repos_data)
         
-        # Get languages used
+        # Get languages used (from the repo list already fetched, no extra requests)
         languages = {}
-        for repo in repos_data[:20]:  # Limit to first 20 repos to avoid rate limits
+        for repo in repos_data[:20]:
             if repo.get('language'):
                 lang = repo['language']
                 languages[lang] = languages.get(lang, 0) + 1
-            time.sleep(0.1)  # Small delay
         
         # Get contributions data
-        total_contributions, recent_contributions = get_github_contributions_graphql(username)
-        
-        # Calculate streak (simplified - would need more complex logic for accurate streak)
-        current_streak = 0
-        longest_streak = 0
+        total_contributions, recent_contributions, calendar, last_week = get_github_contributions_graphql(username)
+        current_streak, longest_streak = calculate_contribution_streaks(calendar)
         
-        # Get recent activity
-        events_url = f"{GITHUB_API_BASE}/users/{username}/events/public?per_page=30"
-        events_data = safe_github_request(events_url)
+        # Commits/PRs in the last 7 days: the same contributionsCollection window as the
+        # batch path, so both writers agree; the public events feed only without GraphQL
+        events_data = None
+        if last_week is None:
+            events_url = f"{GITHUB_API_BASE}/users/{username}/events/public?per_page=30"
+            events_data = safe_github_request(events_url)
         
-        recent_commits = 0
-        recent_prs = 0
+        recent_commits = (last_week or {}).get('totalCommitContributions', 0)
+        recent_prs = (last_week or {}).get('totalPullRequestContributions', 0)
         
         if events_data:
             cutoff_date = datetime.now(timezone.utc) - timedelta(days=7)
@@ -243,15 +363,166 @@ def scrape_github_user(username):
             'dataSource': 'github_api_v3'
         }
         
-        logger.info(f"✅ GitHub data for {username}: {public_repos} repos, {total_contributions} contributions")
+        etag_stats = get_etag_cache().get_stats()
+        logger.info(f"✅ GitHub data for {username}: {public_repos} repos, {total_contributions} contributions "
+                    f"(ETag cache: {etag_stats['hits']} hits / {etag_stats['misses']} misses)")
         return result
         
     except Exception as e:
         logger.error(f"Error scraping GitHub for {username}: {e}")
         return None
 
+def safe_github_graphql(query, variables, timeout=30, retries=3):
+    """
+    POST a GraphQL document with the same rate-limit handling and token rotation
+    as safe_github_request. A rateLimit block in the response is charged to the token.
+    """
+    governor = get_governor()
+    pool = get_token_pool()
+    
+    for attempt in range(retries):
+        token, usable = _pool_token(pool, 'graphql', 'GraphQL query')
+        if not usable:
+            return None
+        headers = get_github_headers(token)
+        headers['Content-Type'] = 'application/json'
+        
+        try:
+            governor.acquire(GITHUB_GRAPHQL)
+            response = http_client.post(GITHUB_GRAPHQL, json={'query': query, 'variables': variables},
+                                     headers=headers, timeout=timeout)
+            paused = governor.observe(GITHUB_GRAPHQL, response, rate_headers=not pool.tokens)
+            pool.observe(token, response)
+            
+            if response.status_code == 200:
+                payload = response.json()
+                pool.record_graphql(token, (payload.get('data') or {}).get('rateLimit'))
+                return payload
+            elif response.status_code in (403, 429):
+                if pool.tokens and _token_exhausted(response):
+                    logger.warning(f"GitHub token exhausted for GraphQL, retry {attempt + 1} with the next token")
+                    continue
+                logger.warning(f"GitHub GraphQL rate limited (HTTP {response.status_code}), retry {attempt + 1}")
+                if not paused:
+                    governor.backoff(GITHUB_GRAPHQL, attempt, base=30)
+                continue
+            else:
+                logger.warning(f"GitHub GraphQL HTTP {response.status_code}")
+                return None
+        except requests.exceptions.Timeout:
+            logger.warning(f"GitHub GraphQL timeout on attempt {attempt + 1}")
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"GitHub GraphQL error on attempt {attempt + 1}: {e}")
+        
+        if attempt < retries - 1:
+            time.sleep(2 ** attempt)
+    
+    return None
+
+def build_github_batch_query(usernames):
+    """Aliased document (u0, u1, ...) sharing USER_FRAGMENT, plus the rateLimit block"""
+    params = ', '.join(f'$u{i}: String!' for i in range(len(usernames)))
+    users = '\n'.join(f'    u{i}: user(login: $u{i}) {{ ...UserFields }}' for i in range(len(usernames)))
+    query = (f"query GetUsers($since: DateTime!, {params}) {{\n{users}\n"
+             f"    rateLimit {{ cost remaining resetAt }}\n}}\n{USER_FRAGMENT}")
+    variables = {f'u{i}': username for i, username in enumerate(usernames)}
+    variables['since'] = last_week_since()
+    return query, variables
+
+def _build_github_result(username, user):
+    """Result dict (same keys as scrape_github_user) from one aliased GraphQL user"""
+    repos = (user.get('recentRepos') or {}).get('nodes') or []
+    contributions = user.get('contributionsCollection') or {}
+    calendar = contributions.get('contributionCalendar') or {}
+    last_week = user.get('lastWeek') or {}
+    current_streak, longest_streak = calculate_contribution_streaks(calendar)
+    
+    languages = {}
+    for repo in repos[:20]:
+        lang = (repo.get('primaryLanguage') or {}).get('name')
+        if lang:
+            languages[lang] = languages.get(lang, 0) + 1
+    
+    return {
+        'username': username,
+        'name': user.get('name') or '',
+        'bio': user.get('bio') or '',
+        'location': user.get('location') or '',
+        'company': user.get('company') or '',
+        'blog': user.get('websiteUrl') or '',
+        'publicRepos': (user.get('publicRepos') or {}).get('totalCount', 0),
+        'totalRepos': len(repos),
+        'followers': (user.get('followers') or {}).get('totalCount', 0),
+        'following': (user.get('following') or {}).get('totalCount', 0),
+        'totalContributions': calendar.get('totalContributions', 0),
+        'recentContributions': recent_calendar_contributions(calendar),
+        'totalStars': sum(repo.get('stargazerCount', 0) for repo in repos),
+        'totalForks': sum(repo.get('forkCount', 0) for repo in repos),
+        'recentCommits': last_week.get('totalCommitContributions', 0),
+        'recentPRs': last_week.get('totalPullRequestContributions', 0),
+        'currentStreak': current_streak,
+        'longestStreak': longest_streak,
+        'topLanguages': dict(sorted(languages.items(), key=lambda x: x[1], reverse=True)[:5]),
+        'profileCreated': user.get('createdAt', ''),
+        'lastUpdated': datetime.now(timezone.utc),
+        'dataSource': 'github_graphql'
+    }
+
+def scrape_github_users_batch(usernames, batch_size=GITHUB_BATCH_SIZE):
+    """
+    Scrape many GitHub users with one aliased GraphQL query per batch_size users
+    (profile counts, repositories, contribution calendar, commit/PR totals).
+    Needs a GitHub token; without one every user goes through scrape_github_user.
+    Returns {username: result dict or None}
+    """
+    unique = list(dict.fromkeys(u for u in usernames if u))
+    if not get_token_pool().tokens:
+        return {username: scrape_github_user(username) for username in unique}
+    
+    results = {}
+    for start in range(0, len(unique), max(1, batch_size)):
+        chunk = unique[start:start + max(1, batch_size)]
+        query, variables = build_github_batch_query(chunk)
+        response = safe_github_graphql(query, variables)
+        
+        if not response or not response.get('data'):
+            logger.warning(f"GitHub batch of {len(chunk)} failed, scraping them one by one")
+            for username in chunk:
+                results[username] = scrape_github_user(username)
+            continue
+        
+        data = response['data']
+        for error in response.get('errors') or []:
+            # Unknown logins come back as NOT_FOUND on their own alias
+            logger.warning(f"GitHub GraphQL error at {error.get('path')}: {error.get('message', '')}")
+        
+        for i, username in enumerate(chunk):
+            user = data.get(f'u{i}')
+            results[username] = _build_github_result(username, user) if user else None
+            if not user:
+                logger.warning(f"No GitHub user data found for {username}")
+        
+        rate_limit = data.get('rateLimit') or {}
+        logger.info(f"✅ GitHub batch: {sum(1 for u in chunk if results[u])}/{len(chunk)} users, "
+                    f"query cost {rate_limit.get('cost')}, {rate_limit.get('remaining')} points remaining")
+    
+    return results
+
 def get_github_streak_data(username):
-    """Get GitHub streak data from github-readme-streak-stats API"""
+    """
+    Current/longest streak and total contributions. Computed from the GraphQL
+    contribution calendar; the github-readme-streak-stats service is only
+    used when there is no token for GraphQL.
+    """
+    if get_token_pool().tokens:
+        total_contributions, _, calendar, _ = get_github_contributions_graphql(username)
+        current_streak, longest_streak = calculate_contribution_streaks(calendar)
+        return {
+            'currentStreak': current_streak,
+            'longestStreak': longest_streak,
+            'totalContributions': total_contributions
+        }
+    
     try:
         streak_url = f"https://github-readme-streak-stats.herokuapp.com/?user={username}&format=json"
         
@@ -259,7 +530,8 @@ def get_github_streak_data(username):
             'User-Agent': 'GO-Tracker-Student-Dashboard/1.0'
         }
         
-        response = requests.get(streak_url, headers=headers, timeout=10)
+        get_governor().acquire(streak_url)
+        response = http_client.get(streak_url, headers=headers, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
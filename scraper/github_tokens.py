@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+GitHub Tokens - Rate-limit budget tracking across several tokens
+Per-token remaining/reset (REST core + GraphQL) + Most-budget-first rotation + Scheduler pacing
+
+Set GITHUB_TOKENS="ghp_a,ghp_b,..." (GITHUB_TOKEN alone still works). Every
+GitHub request asks the pool for the token with the most remaining budget
+and feeds the response back, so no token is driven into the ground while
+others sit idle:
+
+    token = get_token_pool().acquire('core')
+    ... request with token ...
+    get_token_pool().observe(token, response)
+
+When the budget runs low the scheduler is told to space GitHub jobs out
+until the earliest reset (dispatch_delay), instead of letting a worker block
+on an exhausted token.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Hourly budget per token when GitHub hasn't told us yet (REST requests / GraphQL points)
+DEFAULT_LIMITS = {'core': 5000, 'graphql': 5000}
+
+# Left untouched on each token for interactive refreshes and retries
+GITHUB_TOKEN_RESERVE = int(os.getenv('GITHUB_TOKEN_RESERVE', '50'))
+
+# Start spacing jobs out once the pooled budget drops below this share of the limit
+GITHUB_PACE_BELOW_PERCENT = float(os.getenv('GITHUB_PACE_BELOW_PERCENT', '25'))
+
+
+def load_tokens():
+    """Tokens from GITHUB_TOKENS (comma-separated), falling back to GITHUB_TOKEN"""
+    raw = os.getenv('GITHUB_TOKENS') or os.getenv('GITHUB_TOKEN', '')
+    return list(dict.fromkeys(token.strip() for token in raw.split(',') if token.strip()))
+
+
+def mask(token):
+    return f"...{token[-4:]}" if token else 'anonymous'
+
+
+class GitHubTokenPool:
+    """Remaining budget and reset time per (token, resource)"""
+
+    def __init__(self, tokens):
+        self.tokens = list(tokens)
+        self.state = {}
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def _state(self, token, resource, now):
+        """Budget for one token; a passed reset restores the full limit"""
+        state = self.state.get((token, resource))
+        if state is None:
+            limit = DEFAULT_LIMITS.get(resource, DEFAULT_LIMITS['core'])
+            state = {'limit': limit, 'remaining': limit, 'reset': 0.0,
+                     'requests': 0, 'graphqlCost': 0, 'warned': False}
+            self.state[(token, resource)] = state
+        if state['reset'] and state['reset'] <= now:
+            state.update(remaining=state['limit'], reset=0.0, warned=False)
+        return state
+
+    def _exhausted(self, token, resource, state):
+        if not state['warned']:
+            state['warned'] = True
+            reset = datetime.fromtimestamp(state['reset']).strftime('%H:%M:%S') if state['reset'] else 'unknown'
+            logger.warning(f"[GitHubTokens] Token {mask(token)} exhausted its {resource} budget "
+                           f"until {reset}")
+
+    def acquire(self, resource='core', cost=1):
+        """
+        Token with the most remaining budget (charged `cost` up front), or None
+        when there are no tokens or every token is down to its reserve.
+        """
+        with self.lock:
+            now = time.time()
+            best, best_state = None, None
+            for token in self.tokens:
+                state = self._state(token, resource, now)
+                if state['remaining'] - cost < GITHUB_TOKEN_RESERVE:
+                    continue
+                if best_state is None or state['remaining'] > best_state['remaining']:
+                    best, best_state = token, state
+            if best is None:
+                return None
+            best_state['remaining'] -= cost
+            best_state['requests'] += 1
+            return best
+
+    def observe(self, token, response):
+        """Update a token's budget from X-RateLimit-* headers; 403/429 at zero marks it exhausted"""
+        if not token:
+            return
+        headers = getattr(response, 'headers', None) or {}
+        resource = headers.get('X-RateLimit-Resource', 'core')
+        remaining = headers.get('X-RateLimit-Remaining')
+        with self.lock:
+            state = self._state(token, resource, time.time())
+            try:
+                if headers.get('X-RateLimit-Limit'):
+                    state['limit'] = int(headers['X-RateLimit-Limit'])
+                if remaining is not None:
+                    state['remaining'] = int(remaining)
+                if headers.get('X-RateLimit-Reset'):
+                    state['reset'] = float(headers['X-RateLimit-Reset'])
+            except ValueError:
+                return
+            if remaining is not None and state['remaining'] <= GITHUB_TOKEN_RESERVE:
+                self._exhausted(token, resource, state)
+
+    def record_graphql(self, token, rate_limit):
+        """Fold a GraphQL rateLimit { cost remaining resetAt } block into the token's budget"""
+        if not token or not rate_limit:
+            return
+        with self.lock:
+            state = self._state(token, 'graphql', time.time())
+            state['graphqlCost'] += rate_limit.get('cost') or 0
+            if rate_limit.get('remaining') is not None:
+                state['remaining'] = rate_limit['remaining']
+            if rate_limit.get('resetAt'):
+                try:
+                    state['reset'] = datetime.fromisoformat(rate_limit['resetAt'].replace('Z', '+00:00')).timestamp()
+                except ValueError:
+                    pass
+            if state['remaining'] <= GITHUB_TOKEN_RESERVE:
+                self._exhausted(token, 'graphql', state)
+
+    def _delay(self, resource, now):
+        states = [self._state(token, resource, now) for token in self.tokens]
+        budget = sum(max(0, s['remaining'] - GITHUB_TOKEN_RESERVE) for s in states)
+        if budget <= 0:
+            # Everything exhausted: hold GitHub work until the first token resets
+            return max(1.0, min((s['reset'] for s in states if s['reset']), default=now + 60) - now)
+        if budget * 100 >= sum(s['limit'] for s in states) * GITHUB_PACE_BELOW_PERCENT:
+            return 0.0
+        # Low budget: spread what is left evenly until the tokens reset
+        horizon = max((s['reset'] - now for s in states if s['reset'] > now), default=3600.0)
+        slot = self.next_slot.get(resource, 0.0)
+        if slot > now:
+            return slot - now
+        self.next_slot[resource] = now + horizon / budget
+        return 0.0
+
+    def dispatch_delay(self, resources=('core', 'graphql')):
+        """
+        Seconds the scheduler should hold GitHub jobs. 0 means one job may start
+        now (its slot is booked when the pool is pacing).
+        """
+        if not self.tokens:
+            return 0.0
+        with self.lock:
+            now = time.time()
+            return max(self._delay(resource, now) for resource in resources)
+
+    def get_stats(self):
+        """{masked token: {resource: {remaining, limit, resetIn, requests, graphqlCost}}}"""
+        with self.lock:
+            now = time.time()
+            stats = {}
+            for (token, resource) in list(self.state):
+                state = self._state(token, resource, now)
+                stats.setdefault(mask(token), {})[resource] = {
+                    'remaining': state['remaining'],
+                    'limit': state['limit'],
+                    'resetIn': round(max(0.0, state['reset'] - now)) if state['reset'] else None,
+                    'requests': state['requests'],
+                    'graphqlCost': state['graphqlCost'],
+                }
+            return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_token_pool():
+    """Process-wide GitHubTokenPool (tokens read from the environment on first use)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = GitHubTokenPool(load_tokens())
+            if len(_pool.tokens) > 1:
+                logger.info(f"[GitHubTokens] Rotating across {len(_pool.tokens)} tokens")
+        return _pool
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+HTTP Client - Shared pooled sessions for every scraper
+Keep-alive pool per host + Uniform timeouts/retries + Compression + Per-host byte/latency counters
+
+Bare requests.get()/post() opens a new TCP+TLS connection for every call.
+Scrapers go through this module instead, which keeps one requests.Session
+per host with a keep-alive connection pool:
+
+    response = http_client.get(url, headers=headers)
+    response = http_client.post(url, json=payload)
+
+Rate limiting stays with the rate governor (acquire/observe around each
+call) and status handling (429/403) with each scraper; the client retries
+only connection failures and 502/504 on its own. Responses are
+requests.Response objects, so requests.exceptions still apply.
+
+gzip/deflate are always accepted; brotli is added when the brotli package
+is installed. HTTP/2 is not available through requests, so connections are
+HTTP/1.1 keep-alive.
+"""
+
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import brotli  # type: ignore  # noqa: F401 (lets urllib3 decode Content-Encoding: br)
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '30'))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+
+# 503 is left to the scrapers: Codeforces and others use it for rate limiting
+RETRY_STATUSES = (502, 504)
+
+
+def _host(url):
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class HttpClient:
+    """One keep-alive requests.Session per host, plus counters"""
+
+    def __init__(self, timeout=HTTP_TIMEOUT, retries=HTTP_RETRIES, pool_size=HTTP_POOL_SIZE):
+        self.timeout = timeout
+        self.retries = retries
+        self.pool_size = pool_size
+        self.sessions = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def _new_session(self):
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD', 'POST']),  # POSTs here are GraphQL/API queries
+            backoff_factor=0.5,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        return session
+
+    def session(self, url):
+        """The pooled session for url's host"""
+        host = _host(url)
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = self._new_session()
+                self.sessions[host] = session
+                self.stats[host] = {'requests': 0, 'errors': 0, 'bytes': 0, 'latency': 0.0}
+            return session
+
+    def _record(self, url, started, response=None):
+        host = _host(url)
+        with self.lock:
+            stats = self.stats[host]
+            stats['requests'] += 1
+            stats['latency'] += time.monotonic() - started
+            if response is None:
+                stats['errors'] += 1
+            else:
+                stats['bytes'] += len(response.content or b'')
+
+    def request(self, method, url, **kwargs):
+        """requests.request on the host's pooled session (default timeout HTTP_TIMEOUT)"""
+        kwargs.setdefault('timeout', self.timeout)
+        session = self.session(url)
+        started = time.monotonic()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self._record(url, started)
+            raise
+        self._record(url, started, response)
+        return response
+
+    def get_stats(self):
+        """{host: {requests, errors, bytes, avg_latency_ms}}"""
+        with self.lock:
+            return {
+                host: {
+                    'requests': s['requests'],
+                    'errors': s['errors'],
+                    'bytes': s['bytes'],
+                    'avg_latency_ms': round(s['latency'] / s['requests'] * 1000, 1) if s['requests'] else 0.0,
+                }
+                for host, s in self.stats.items()
+            }
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide HttpClient"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def request(method, url, **kwargs):
+    return get_client().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return get_client().request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return get_client().request('POST', url, **kwargs)
+
+
+def get_http_stats():
+    return get_client().get_stats()
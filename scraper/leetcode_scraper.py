@@ -6,11 +6,16 @@ Safe + Rate Limited + Comprehensive Data
 
 import requests
 import time
-import random
+import json
 import logging
+import os
+import threading
 from datetime import datetime
 import sys
 
+import http_client
+from rate_governor import get_governor
+
 # Configure logging if not already configured
 logging.basicConfig(
     level=logging.INFO,
@@ -20,33 +25,131 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def safe_request(url, headers=None, json_data=None, timeout=60, retries=3):
-    """Make a safe HTTP request with retries (supports GET and POST)"""
+LEETCODE_GRAPHQL_URL = "https://leetcode.com/graphql"
+LEETCODE_HEADERS = {
+    'Content-Type': 'application/json',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+# Field selections shared by the single-user and batched documents
+MATCHED_USER_FIELDS = """
+        username
+        profile {
+            ranking
+            reputation
+            userAvatar
+            realName
+        }
+        submitStats {
+            acSubmissionNum {
+                difficulty
+                count
+            }
+            totalSubmissionNum {
+                difficulty
+                count
+            }
+        }
+        userCalendar {
+            activeYears
+            streak
+            totalActiveDays
+            submissionCalendar
+        }
+        badges {
+            id
+            displayName
+            icon
+            creationDate
+        }
+        upcomingBadges {
+            name
+            icon
+        }
+"""
+
+CONTEST_RANKING_FIELDS = """
+        attendedContestsCount
+        rating
+        globalRanking
+        totalParticipants
+        topPercentage
+        badge {
+            name
+            icon
+        }
+"""
+
+CONTEST_HISTORY_FIELDS = """
+        attended
+        trendDirection
+        problemsSolved
+        totalProblems
+        finishTimeInSeconds
+        rating
+        ranking
+        contest {
+            title
+            startTime
+        }
+"""
+
+# Profile + solved stats + calendar + badges + contest ranking/history in one document
+USER_QUERY = f"""
+query getUserData($username: String!) {{
+    matchedUser(username: $username) {{{MATCHED_USER_FIELDS}    }}
+    userContestRanking(username: $username) {{{CONTEST_RANKING_FIELDS}    }}
+    userContestRankingHistory(username: $username) {{{CONTEST_HISTORY_FIELDS}    }}
+}}
+"""
+
+# Batch mode: users per aliased document. Starts at LEETCODE_BATCH_SIZE and adapts
+# between 1 and LEETCODE_MAX_BATCH_SIZE to response size and failures
+LEETCODE_BATCH_SIZE = int(os.getenv('LEETCODE_BATCH_SIZE', '10'))
+LEETCODE_MAX_BATCH_SIZE = int(os.getenv('LEETCODE_MAX_BATCH_SIZE', '25'))
+LEETCODE_BATCH_MAX_KB = int(os.getenv('LEETCODE_BATCH_MAX_KB', '1024'))
+
+# Batch failures that splitting the batch can fix; anything else (429, network) is retried later as is
+SIZE_FAILURE_STATUSES = (400, 413)
+SIZE_FAILURE_MESSAGES = ('complex', 'too large', 'too big', 'depth', 'limit of')
+RATE_LIMIT_MESSAGES = ('rate limit', 'too many requests', 'throttl')
+
+def safe_request(url, headers=None, json_data=None, timeout=60, retries=3, errors=None):
+    """
+    Make a safe HTTP request with retries (supports GET and POST).
+    errors: optional list collecting a reason per failed attempt ('HTTP 429', 'timeout', 'connection')
+    """
     if headers is None:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
     
+    governor = get_governor()
+    
     for attempt in range(retries):
         try:
-            # Random delay to avoid rate limiting
-            if attempt > 0:
-                time.sleep(random.uniform(1, 3))
+            # Wait for leetcode.com's rate budget
+            governor.acquire(url)
             
             # Use POST if json_data is provided, otherwise GET
             if json_data:
-                response = requests.post(url, headers=headers, json=json_data, timeout=timeout)
+                response = http_client.post(url, headers=headers, json=json_data, timeout=timeout)
             else:
-                response = requests.get(url, headers=headers, timeout=timeout)
+                response = http_client.get(url, headers=headers, timeout=timeout)
+            paused = governor.observe(url, response)
             
             if response.status_code == 200:
                 return response.json()
             elif response.status_code == 429:  # Rate limited
-                wait_time = 2 ** attempt  # Exponential backoff
-                logger.warning(f"Rate limited, waiting {wait_time}s before retry {attempt + 1}")
-                time.sleep(wait_time)
+                if errors is not None:
+                    errors.append('HTTP 429')
+                logger.warning(f"Rate limited, retry {attempt + 1} after the governor's pause")
+                if not paused:
+                    governor.backoff(url, attempt, base=1)
                 continue
             else:
+                if errors is not None:
+                    errors.append(f"HTTP {response.status_code}")
                 logger.warning(f"HTTP {response.status_code} for {url}")
                 if response.status_code == 400:
                     logger.warning(f"Response: {response.text[:500]}")
@@ -57,8 +160,12 @@ def safe_request(url, headers=None, json_data=None, timeout=60, retries=3):
                 return None
                 
         except requests.exceptions.Timeout:
+            if errors is not None:
+                errors.append('timeout')
             logger.warning(f"Timeout on attempt {attempt + 1} for {url}")
         except requests.exceptions.RequestException as e:
+            if errors is not None:
+                errors.append('connection')
             logger.warning(f"Request error on attempt {attempt + 1}: {e}")
         
         if attempt < retries - 1:
@@ -66,6 +173,238 @@ def safe_request(url, headers=None, json_data=None, timeout=60, retries=3):
     
     return None
 
+def _build_leetcode_result(username, data):
+    """
+    Build the result dict from one user's GraphQL data:
+    {'matchedUser': ..., 'userContestRanking': ..., 'userContestRankingHistory': ...}
+    Returns None when matchedUser is missing (user doesn't exist / profile failed).
+    """
+    user_data = data.get('matchedUser')
+    if not user_data:
+        return None
+    
+    # Extract profile data
+    profile = user_data.get('profile', {}) or {}
+    profile_ranking = profile.get('ranking', 0) or 0
+    reputation = profile.get('reputation', 0) or 0
+    real_name = profile.get('realName', '')
+    user_avatar = profile.get('userAvatar', '')
+    
+    # Extract solved problems
+    submit_stats = user_data.get('submitStats', {}) or {}
+    ac_submissions = submit_stats.get('acSubmissionNum', []) if submit_stats else []
+    total_submissions = submit_stats.get('totalSubmissionNum', []) if submit_stats else []
+    
+    total_solved = 0
+    easy_solved = 0
+    medium_solved = 0
+    hard_solved = 0
+    
+    total_submissions_count = 0
+    easy_submissions = 0
+    medium_submissions = 0
+    hard_submissions = 0
+    
+    # First, look for "All" difficulty which gives total
+    for stat in ac_submissions:
+        difficulty = stat.get('difficulty', '').lower()
+        count = stat.get('count', 0)
+        
+        if difficulty == 'all':
+            total_solved = count
+            break
+    
+    # Extract total submissions
+    for stat in total_submissions:
+        difficulty = stat.get('difficulty', '').lower()
+        count = stat.get('count', 0)
+        
+        if difficulty == 'all':
+            total_submissions_count = count
+            break
+    
+    # If "All" not found, calculate from individual difficulties
+    if total_solved == 0:
+        for stat in ac_submissions:
+            difficulty = stat.get('difficulty', '').lower()
+            count = stat.get('count', 0)
+            
+            if difficulty == 'easy':
+                easy_solved = count
+            elif difficulty == 'medium':
+                medium_solved = count
+            elif difficulty == 'hard':
+                hard_solved = count
+            
+            total_solved += count
+    else:
+        # Extract individual difficulties
+        for stat in ac_submissions:
+            difficulty = stat.get('difficulty', '').lower()
+            count = stat.get('count', 0)
+            
+            if difficulty == 'easy':
+                easy_solved = count
+            elif difficulty == 'medium':
+                medium_solved = count
+            elif difficulty == 'hard':
+                hard_solved = count
+    
+    # Extract individual submission counts
+    for stat in total_submissions:
+        difficulty = stat.get('difficulty', '').lower()
+        count = stat.get('count', 0)
+        
+        if difficulty == 'easy':
+            easy_submissions = count
+        elif difficulty == 'medium':
+            medium_submissions = count
+        elif difficulty == 'hard':
+            hard_submissions = count
+    
+    # Calculate acceptance rate
+    acceptance_rate = 0.0
+    if total_submissions_count > 0:
+        acceptance_rate = round((total_solved / total_submissions_count) * 100, 2)
+    
+    # Extract contest data
+    contest_ranking = data.get('userContestRanking') or {}
+    contest_history = data.get('userContestRankingHistory') or []
+    
+    # Calculate additional metrics
+    current_rating = contest_ranking.get('rating', 0) if contest_ranking else 0
+    max_rating = current_rating
+    
+    # Find max rating from history
+    if contest_history:
+        ratings = [h.get('rating', 0) for h in contest_history if h.get('rating')]
+        if ratings:
+            max_rating = max(ratings)
+    
+    # Recent activity (last 7 days)
+    recent_cutoff = datetime.now().timestamp() - (7 * 24 * 60 * 60)
+    recent_contests = 0
+    
+    if contest_history:
+        for contest in contest_history:
+            contest_info = contest.get('contest', {})
+            start_time = contest_info.get('startTime', 0)
+            if start_time and start_time > recent_cutoff:
+                recent_contests += 1
+    
+    # Process full contest history with all details
+    contest_history_details = []
+    if contest_history:
+        for contest in contest_history:
+            contest_info = contest.get('contest', {})
+            contest_history_details.append({
+                'title': contest_info.get('title', ''),
+                'startTime': contest_info.get('startTime', 0),
+                'attended': contest.get('attended', False),
+                'rating': contest.get('rating', 0),
+                'ranking': contest.get('ranking', 0),
+                'problemsSolved': contest.get('problemsSolved', 0),
+                'totalProblems': contest.get('totalProblems', 0),
+                'finishTimeInSeconds': contest.get('finishTimeInSeconds', 0),
+                'trendDirection': contest.get('trendDirection', '')
+            })
+    
+    # Extract activity data (streak, totalActiveDays, recent submissions)
+    user_calendar = user_data.get('userCalendar') or {}
+    streak = user_calendar.get('streak', 0) or 0
+    total_active_days = user_calendar.get('totalActiveDays', 0) or 0
+    recent_submissions = []
+    
+    # Submission calendar is a JSON string of timestamp: count pairs, kept as a string for the frontend
+    submission_calendar_str = user_calendar.get('submissionCalendar', '') or ''
+    if submission_calendar_str:
+        try:
+            json.loads(submission_calendar_str)
+        except (TypeError, ValueError):
+            submission_calendar_str = '{}'  # Fallback to empty object if parsing fails
+    else:
+        submission_calendar_str = '{}'  # Ensure it's always a valid JSON string
+    
+    # Extract badges data
+    badges_list = []
+    for badge in user_data.get('badges') or []:
+        badges_list.append({
+            'id': badge.get('id', ''),
+            'displayName': badge.get('displayName', ''),
+            'icon': badge.get('icon', ''),
+            'creationDate': badge.get('creationDate', '')
+        })
+    
+    # Get active badge from contest ranking if available
+    active_badge = ''
+    if contest_ranking and contest_ranking.get('badge'):
+        active_badge = contest_ranking.get('badge', {}).get('name', '')
+    
+    # Calculate last week rating (rating from 7 days ago)
+    last_week_rating = current_rating
+    if contest_history:
+        week_ago_cutoff = datetime.now().timestamp() - (7 * 24 * 60 * 60)
+        for contest in reversed(contest_history):  # Start from most recent
+            contest_info = contest.get('contest', {})
+            start_time = contest_info.get('startTime', 0)
+            if start_time and start_time <= week_ago_cutoff:
+                last_week_rating = contest.get('rating', current_rating)
+                break
+    
+    # Build comprehensive result with ALL available data
+    result = {
+        # Profile Information
+        'username': username,
+        'realName': real_name,
+        'userAvatar': user_avatar,
+        'ranking': profile_ranking,
+        'reputation': reputation,
+        
+        # Problem Solving Statistics
+        'totalSolved': total_solved,
+        'easySolved': easy_solved,
+        'mediumSolved': medium_solved,
+        'hardSolved': hard_solved,
+        'totalSubmissions': total_submissions_count,
+        'acceptanceRate': acceptance_rate,
+        
+        # Contest Data
+        'rating': current_rating,
+        'maxRating': max_rating,
+        'lastWeekRating': last_week_rating,
+        'globalRanking': contest_ranking.get('globalRanking', 0) if contest_ranking else 0,
+        'contestsAttended': contest_ranking.get('attendedContestsCount', 0) if contest_ranking else 0,
+        'contests': contest_ranking.get('attendedContestsCount', 0) if contest_ranking else 0,
+        'recentContests': recent_contests,
+        'topPercentage': contest_ranking.get('topPercentage', 0) if contest_ranking else 0,
+        'totalParticipants': contest_ranking.get('totalParticipants', 0) if contest_ranking else 0,
+        'badge': active_badge,
+        
+        # Activity Data
+        'streak': streak,
+        'totalActiveDays': total_active_days,
+        'recentSubmissions': recent_submissions,
+        'submissionCalendar': submission_calendar_str,  # JSON string for frontend parsing
+        
+        # Contest History (Full Details)
+        'contestHistory': contest_history_details,
+        
+        # Badges
+        'badges': badges_list,
+        'activeBadge': active_badge,
+        
+        # Metadata
+        'lastUpdated': datetime.utcnow(),
+        'dataSource': 'leetcode_graphql'
+    }
+    
+    return result
+
+def _graphql_error_summary(errors):
+    """'path: message' strings for logging GraphQL errors"""
+    return [f"{'.'.join(str(p) for p in error.get('path') or []) or '-'}: {error.get('message', '')}"
+            for error in errors or []]
+
 def scrape_leetcode_user(username):
     """
     Scrape LeetCode user data
@@ -76,395 +415,42 @@ def scrape_leetcode_user(username):
         print(f"📊 Scraping LeetCode for username: {username}")
         sys.stdout.flush()
         
-        # LeetCode GraphQL endpoint
-        graphql_url = "https://leetcode.com/graphql"
-        
-        # Query for user profile data
-        profile_query = {
-            "query": """
-            query getUserProfile($username: String!) {
-                matchedUser(username: $username) {
-                    username
-                    profile {
-                        ranking
-                        reputation
-                        userAvatar
-                        realName
-                    }
-                    submitStats {
-                        acSubmissionNum {
-                            difficulty
-                            count
-                        }
-                        totalSubmissionNum {
-                            difficulty
-                            count
-                        }
-                    }
-                }
-            }
-            """,
-            "variables": {"username": username}
-        }
-        
-        # Query for contest data
-        contest_query = {
-            "query": """
-            query getUserContestRanking($username: String!) {
-                userContestRanking(username: $username) {
-                    attendedContestsCount
-                    rating
-                    globalRanking
-                    totalParticipants
-                    topPercentage
-                    badge {
-                        name
-                        icon
-                    }
-                }
-                userContestRankingHistory(username: $username) {
-                    attended
-                    trendDirection
-                    problemsSolved
-                    totalProblems
-                    finishTimeInSeconds
-                    rating
-                    ranking
-                    contest {
-                        title
-                        startTime
-                    }
-                }
-            }
-            """,
-            "variables": {"username": username}
-        }
-        
-        # Query for activity, streak, and calendar
-        activity_query = {
-            "query": """
-            query getUserActivity($username: String!) {
-                matchedUser(username: $username) {
-                    userCalendar {
-                        activeYears
-                        streak
-                        totalActiveDays
-                        submissionCalendar
-                    }
-                }
-            }
-            """,
-            "variables": {"username": username}
-        }
-        
-        # Query for all badges
-        badges_query = {
-            "query": """
-            query getUserBadges($username: String!) {
-                matchedUser(username: $username) {
-                    badges {
-                        id
-                        displayName
-                        icon
-                        creationDate
-                    }
-                    upcomingBadges {
-                        name
-                        icon
-                    }
-                }
-            }
-            """,
-            "variables": {"username": username}
-        }
-        
-        headers = {
-            'Content-Type': 'application/json',
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        }
-        
-        # Get profile data
-        profile_response = safe_request(graphql_url, headers=headers, json_data=profile_query)
-        if not profile_response or not isinstance(profile_response, dict):
+        # Profile, contests, calendar and badges in one round trip
+        response = safe_request(
+            LEETCODE_GRAPHQL_URL,
+            headers=LEETCODE_HEADERS,
+            json_data={"query": USER_QUERY, "variables": {"username": username}}
+        )
+        if not response or not isinstance(response, dict):
             logger.error(f"Failed to get profile data for {username}")
             print(f"❌ ERROR: Failed to get profile data from LeetCode API")
             sys.stdout.flush()
             return None
         
-        # Check for GraphQL errors
-        if 'errors' in profile_response:
-            errors = profile_response.get('errors', [])
-            logger.error(f"GraphQL errors for {username}: {errors}")
-            print(f"❌ ERROR: GraphQL API returned errors for {username}")
-            print(f"   Errors: {errors}")
-            sys.stdout.flush()
-            return None
-        
-        # Get contest data
-        time.sleep(random.uniform(2, 4))  # Delay between requests
-        contest_response = safe_request(graphql_url, headers=headers, json_data=contest_query)
+        data = response.get('data') or {}
+        errors = response.get('errors') or []
         
-        # Get activity data (streak, submissions)
-        time.sleep(random.uniform(2, 4))  # Delay between requests
-        activity_response = safe_request(graphql_url, headers=headers, json_data=activity_query)
+        # Partial errors only null their own sub-field; keep everything else
+        if errors:
+            logger.warning(f"GraphQL errors for {username}: {_graphql_error_summary(errors)}")
         
-        # Get badges data
-        time.sleep(random.uniform(2, 4))  # Delay between requests
-        badges_response = safe_request(graphql_url, headers=headers, json_data=badges_query)
-        
-        # Parse profile data
-        profile_data = profile_response.get('data', {})
-        if not profile_data:
-            logger.warning(f"No data in response for {username}")
-            return None
-            
-        user_data = profile_data.get('matchedUser')
-        if not user_data:
-            logger.warning(f"No user data found for {username} - user may not exist")
-            print(f"❌ ERROR: User '{username}' not found on LeetCode")
+        if not data.get('matchedUser'):
+            if errors:
+                print(f"❌ ERROR: GraphQL API returned errors for {username}")
+                print(f"   Errors: {errors}")
+            else:
+                logger.warning(f"No user data found for {username} - user may not exist")
+                print(f"❌ ERROR: User '{username}' not found on LeetCode")
             sys.stdout.flush()
             return None
         
-        # Extract profile data
-        profile = user_data.get('profile', {}) or {}
-        profile_ranking = profile.get('ranking', 0) or 0
-        reputation = profile.get('reputation', 0) or 0
-        real_name = profile.get('realName', '')
-        user_avatar = profile.get('userAvatar', '')
-        
-        # Extract solved problems
-        submit_stats = user_data.get('submitStats', {}) or {}
-        ac_submissions = submit_stats.get('acSubmissionNum', []) if submit_stats else []
-        total_submissions = submit_stats.get('totalSubmissionNum', []) if submit_stats else []
-        
-        total_solved = 0
-        easy_solved = 0
-        medium_solved = 0
-        hard_solved = 0
-        
-        total_submissions_count = 0
-        easy_submissions = 0
-        medium_submissions = 0
-        hard_submissions = 0
-        
-        # First, look for "All" difficulty which gives total
-        for stat in ac_submissions:
-            difficulty = stat.get('difficulty', '').lower()
-            count = stat.get('count', 0)
-            
-            if difficulty == 'all':
-                total_solved = count
-                break
-        
-        # Extract total submissions
-        for stat in total_submissions:
-            difficulty = stat.get('difficulty', '').lower()
-            count = stat.get('count', 0)
-            
-            if difficulty == 'all':
-                total_submissions_count = count
-                break
-        
-        # If "All" not found, calculate from individual difficulties
-        if total_solved == 0:
-            for stat in ac_submissions:
-                difficulty = stat.get('difficulty', '').lower()
-                count = stat.get('count', 0)
-                
-                if difficulty == 'easy':
-                    easy_solved = count
-                elif difficulty == 'medium':
-                    medium_solved = count
-                elif difficulty == 'hard':
-                    hard_solved = count
-                
-                total_solved += count
-        else:
-            # Extract individual difficulties
-            for stat in ac_submissions:
-                difficulty = stat.get('difficulty', '').lower()
-                count = stat.get('count', 0)
-                
-                if difficulty == 'easy':
-                    easy_solved = count
-                elif difficulty == 'medium':
-                    medium_solved = count
-                elif difficulty == 'hard':
-                    hard_solved = count
-        
-        # Extract individual submission counts
-        for stat in total_submissions:
-            difficulty = stat.get('difficulty', '').lower()
-            count = stat.get('count', 0)
-            
-            if difficulty == 'easy':
-                easy_submissions = count
-            elif difficulty == 'medium':
-                medium_submissions = count
-            elif difficulty == 'hard':
-                hard_submissions = count
-        
-        # Calculate acceptance rate
-        acceptance_rate = 0.0
-        if total_submissions_count > 0:
-            acceptance_rate = round((total_solved / total_submissions_count) * 100, 2)
-        
-        # Extract contest data
-        contest_data = {}
-        if contest_response and isinstance(contest_response, dict):
-            contest_data = contest_response.get('data', {})
-        contest_ranking = contest_data.get('userContestRanking', {}) if contest_data else {}
-        contest_history = contest_data.get('userContestRankingHistory', []) if contest_data else []
-        
-        # Calculate additional metrics
-        current_rating = contest_ranking.get('rating', 0) if contest_ranking else 0
-        max_rating = current_rating
-        
-        # Find max rating from history
-        if contest_history:
-            ratings = [h.get('rating', 0) for h in contest_history if h.get('rating')]
-            if ratings:
-                max_rating = max(ratings)
-        
-        # Recent activity (last 7 days)
-        recent_cutoff = datetime.now().timestamp() - (7 * 24 * 60 * 60)
-        recent_contests = 0
-        
-        if contest_history:
-            for contest in contest_history:
-                contest_info = contest.get('contest', {})
-                start_time = contest_info.get('startTime', 0)
-                if start_time and start_time > recent_cutoff:
-                    recent_contests += 1
-        
-        # Process full contest history with all details
-        contest_history_details = []
-        if contest_history:
-            for contest in contest_history:
-                contest_info = contest.get('contest', {})
-                contest_history_details.append({
-                    'title': contest_info.get('title', ''),
-                    'startTime': contest_info.get('startTime', 0),
-                    'attended': contest.get('attended', False),
-                    'rating': contest.get('rating', 0),
-                    'ranking': contest.get('ranking', 0),
-                    'problemsSolved': contest.get('problemsSolved', 0),
-                    'totalProblems': contest.get('totalProblems', 0),
-                    'finishTimeInSeconds': contest.get('finishTimeInSeconds', 0),
-                    'trendDirection': contest.get('trendDirection', '')
-                })
-        
-        # Extract activity data (streak, totalActiveDays, recent submissions)
-        streak = 0
-        total_active_days = 0
-        recent_submissions = []
-        
-        if activity_response and isinstance(activity_response, dict):
-            activity_data = activity_response.get('data', {})
-            matched_user_activity = activity_data.get('matchedUser', {}) if activity_data else {}
-            user_calendar = matched_user_activity.get('userCalendar', {}) if matched_user_activity else {}
-            
-            streak = user_calendar.get('streak', 0) if user_calendar else 0
-            total_active_days = user_calendar.get('totalActiveDays', 0) if user_calendar else 0
-            
-            # Parse submission calendar (JSON string with timestamp: count pairs)
-            submission_calendar_str = user_calendar.get('submissionCalendar', '') if user_calendar else ''
-            submission_calendar_data = {}
-            if submission_calendar_str:
-                try:
-                    import json
-                    submission_calendar_data = json.loads(submission_calendar_str)
-                    # submission_calendar is a dict with timestamp keys and count values
-                    # We can use this to calculate activity, but recent submissions need a different approach
-                except:
-                    submission_calendar_str = '{}'  # Fallback to empty object if parsing fails
-            else:
-                submission_calendar_str = '{}'  # Ensure it's always a valid JSON string
-        
-        # Extract badges data
-        badges_list = []
-        active_badge = ''
-        
-        if badges_response and isinstance(badges_response, dict):
-            badges_data = badges_response.get('data', {})
-            matched_user_badges = badges_data.get('matchedUser', {}) if badges_data else {}
-            
-            badges = matched_user_badges.get('badges', []) if matched_user_badges else []
-            for badge in badges:
-                badges_list.append({
-                    'id': badge.get('id', ''),
-                    'displayName': badge.get('displayName', ''),
-                    'icon': badge.get('icon', ''),
-                    'creationDate': badge.get('creationDate', '')
-                })
-            
-            # Get active badge from contest ranking if available
-            if contest_ranking and contest_ranking.get('badge'):
-                active_badge = contest_ranking.get('badge', {}).get('name', '')
-        
-        # Calculate last week rating (rating from 7 days ago)
-        last_week_rating = current_rating
-        if contest_history:
-            week_ago_cutoff = datetime.now().timestamp() - (7 * 24 * 60 * 60)
-            for contest in reversed(contest_history):  # Start from most recent
-                contest_info = contest.get('contest', {})
-                start_time = contest_info.get('startTime', 0)
-                if start_time and start_time <= week_ago_cutoff:
-                    last_week_rating = contest.get('rating', current_rating)
-                    break
-        
-        # Build comprehensive result with ALL available data
-        result = {
-            # Profile Information
-            'username': username,
-            'realName': real_name,
-            'userAvatar': user_avatar,
-            'ranking': profile_ranking,
-            'reputation': reputation,
-            
-            # Problem Solving Statistics
-            'totalSolved': total_solved,
-            'easySolved': easy_solved,
-            'mediumSolved': medium_solved,
-            'hardSolved': hard_solved,
-            'totalSubmissions': total_submissions_count,
-            'acceptanceRate': acceptance_rate,
-            
-            # Contest Data
-            'rating': current_rating,
-            'maxRating': max_rating,
-            'lastWeekRating': last_week_rating,
-            'globalRanking': contest_ranking.get('globalRanking', 0) if contest_ranking else 0,
-            'contestsAttended': contest_ranking.get('attendedContestsCount', 0) if contest_ranking else 0,
-            'contests': contest_ranking.get('attendedContestsCount', 0) if contest_ranking else 0,
-            'recentContests': recent_contests,
-            'topPercentage': contest_ranking.get('topPercentage', 0) if contest_ranking else 0,
-            'totalParticipants': contest_ranking.get('totalParticipants', 0) if contest_ranking else 0,
-            'badge': active_badge,
-            
-            # Activity Data
-            'streak': streak,
-            'totalActiveDays': total_active_days,
-            'recentSubmissions': recent_submissions,
-            'submissionCalendar': submission_calendar_str,  # JSON string for frontend parsing
-            
-            # Contest History (Full Details)
-            'contestHistory': contest_history_details,
-            
-            # Badges
-            'badges': badges_list,
-            'activeBadge': active_badge,
-            
-            # Metadata
-            'lastUpdated': datetime.utcnow(),
-            'dataSource': 'leetcode_graphql'
-        }
+        result = _build_leetcode_result(username, data)
         
-        logger.info(f"✅ LeetCode data for {username}: {total_solved} solved, {current_rating} rating")
+        logger.info(f"✅ LeetCode data for {username}: {result['totalSolved']} solved, {result['rating']} rating")
         print(f"✅ Successfully scraped LeetCode data for {username}")
-        print(f"   📊 Problems Solved: {total_solved}")
-        print(f"   ⭐ Rating: {current_rating}")
-        print(f"   🏆 Max Rating: {max_rating}")
+        print(f"   📊 Problems Solved: {result['totalSolved']}")
+        print(f"   ⭐ Rating: {result['rating']}")
+        print(f"   🏆 Max Rating: {result['maxRating']}")
         sys.stdout.flush()
         return result
         
@@ -477,6 +463,163 @@ def scrape_leetcode_user(username):
         logger.error(f"Traceback: {traceback.format_exc()}")
         return None
 
+class AdaptiveBatchSize:
+    """
+    Users per batched document. Grows by one after a clean, comfortably sized
+    response; halves when a response is too big or the batch fails as a whole.
+    """
+
+    def __init__(self, initial=LEETCODE_BATCH_SIZE, maximum=LEETCODE_MAX_BATCH_SIZE,
+                 max_bytes=LEETCODE_BATCH_MAX_KB * 1024):
+        self.maximum = max(1, maximum)
+        self.current = min(max(1, initial), self.maximum)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    def get(self):
+        with self.lock:
+            return self.current
+
+    def shrink(self):
+        with self.lock:
+            self.current = max(1, self.current // 2)
+            return self.current
+
+    def record(self, users, response_bytes):
+        """Adjust after a successful batch of `users` that returned response_bytes"""
+        with self.lock:
+            if response_bytes > self.max_bytes:
+                per_user = response_bytes / max(1, users)
+                self.current = max(1, min(self.current // 2, int(self.max_bytes / per_user)))
+            elif users >= self.current and response_bytes < self.max_bytes / 2:
+                self.current = min(self.maximum, self.current + 1)
+            return self.current
+
+
+_batch_size = AdaptiveBatchSize()
+
+
+def build_batch_query(usernames):
+    """
+    One document with aliased matchedUser / userContestRanking /
+    userContestRankingHistory blocks per user (u0_user, u0_contest, u0_history, ...).
+    Returns (query, variables)
+    """
+    params = []
+    blocks = []
+    variables = {}
+    for i, username in enumerate(usernames):
+        params.append(f"$u{i}: String!")
+        variables[f"u{i}"] = username
+        blocks.append(
+            f"    u{i}_user: matchedUser(username: $u{i}) {{{MATCHED_USER_FIELDS}    }}\n"
+            f"    u{i}_contest: userContestRanking(username: $u{i}) {{{CONTEST_RANKING_FIELDS}    }}\n"
+            f"    u{i}_history: userContestRankingHistory(username: $u{i}) {{{CONTEST_HISTORY_FIELDS}    }}\n"
+        )
+    query = f"query getUsersData({', '.join(params)}) {{\n{''.join(blocks)}}}\n"
+    return query, variables
+
+def _document_failure(errors):
+    """'size' for complexity/size rejections of a whole document, 'transient' otherwise"""
+    messages = ' '.join(str(error.get('message', '')) for error in errors).lower()
+    if any(marker in messages for marker in RATE_LIMIT_MESSAGES):
+        return 'transient'
+    if any(marker in messages for marker in SIZE_FAILURE_MESSAGES):
+        return 'size'
+    return 'transient'
+
+def _fetch_leetcode_batch(usernames):
+    """
+    Run one aliased document. Returns ({username: result or None}, response_bytes, None),
+    or (None, 0, failure) when the batch failed as a whole: failure is 'size' when a
+    smaller batch may succeed, 'transient' for rate limits and network errors.
+    """
+    query, variables = build_batch_query(usernames)
+    request_errors = []
+    response = safe_request(
+        LEETCODE_GRAPHQL_URL,
+        headers=LEETCODE_HEADERS,
+        json_data={"query": query, "variables": variables},
+        errors=request_errors
+    )
+    if not response or not isinstance(response, dict) or not response.get('data'):
+        if response and response.get('errors'):
+            logger.warning(f"LeetCode batch of {len(usernames)} rejected: {_graphql_error_summary(response['errors'])}")
+            return None, 0, _document_failure(response['errors'])
+        last = request_errors[-1] if request_errors else ''
+        sized = last in (f"HTTP {status}" for status in SIZE_FAILURE_STATUSES)
+        return None, 0, 'size' if sized else 'transient'
+
+    data = response['data']
+    errors = response.get('errors') or []
+    if errors:
+        # Unknown users and failing sub-fields come back as per-alias errors
+        logger.warning(f"GraphQL errors in LeetCode batch: {_graphql_error_summary(errors)}")
+        document_errors = [error for error in errors if not error.get('path')]
+        if document_errors:
+            return None, 0, _document_failure(document_errors)
+
+    results = {}
+    for i, username in enumerate(usernames):
+        user_data = {
+            'matchedUser': data.get(f'u{i}_user'),
+            'userContestRanking': data.get(f'u{i}_contest'),
+            'userContestRankingHistory': data.get(f'u{i}_history'),
+        }
+        try:
+            results[username] = _build_leetcode_result(username, user_data)
+        except Exception as e:
+            logger.error(f"Error building LeetCode result for {username}: {e}")
+            results[username] = None
+        if results[username] is None:
+            logger.warning(f"No LeetCode data for {username} in batch - user may not exist")
+    return results, len(json.dumps(response)), None
+
+def scrape_leetcode_users_batch(usernames, batch_size=None):
+    """
+    Scrape many LeetCode users with a handful of aliased GraphQL requests.
+    batch_size fixes K; by default it adapts (see AdaptiveBatchSize).
+    Returns {username: result dict or None}, results identical to scrape_leetcode_user
+    """
+    pending = list(dict.fromkeys(u for u in usernames if u))
+    results = {}
+    requests_made = 0
+    size_cap = None  # set once a batch fails as a whole
+    started = time.monotonic()
+
+    while pending:
+        size = batch_size or _batch_size.get()
+        if size_cap:
+            size = min(size, size_cap)
+        chunk, pending = pending[:size], pending[size:]
+        chunk_results, response_bytes, failure = _fetch_leetcode_batch(chunk)
+        requests_made += 1
+
+        if chunk_results is None:
+            if len(chunk) == 1 or failure != 'size':
+                # Rate limits and outages aren't fixed by smaller batches: leave these users
+                # failed for the scheduler to retry, the governor has paced the host already
+                if failure != 'size':
+                    logger.warning(f"LeetCode batch of {len(chunk)} failed ({failure}), leaving it for a retry")
+                results.update((username, None) for username in chunk)
+                continue
+            # Retry the failed chunk in halves
+            if batch_size is None:
+                _batch_size.shrink()
+            size_cap = max(1, len(chunk) // 2)
+            logger.info(f"LeetCode batch of {len(chunk)} failed, retrying in batches of {size_cap}")
+            pending = chunk + pending
+            continue
+
+        if batch_size is None:
+            _batch_size.record(len(chunk), response_bytes)
+        results.update(chunk_results)
+
+    scraped = sum(1 for r in results.values() if r)
+    logger.info(f"✅ LeetCode batch: {scraped}/{len(results)} users in {requests_made} requests "
+                f"({time.monotonic() - started:.1f}s, batch size now {batch_size or _batch_size.get()})")
+    return results
+
 def get_leetcode_daily_stats(username):
     """Get today's solved problems count"""
     try:
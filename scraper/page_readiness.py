@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Page Readiness - Event-driven waits for the Selenium scrapers
+Readiness conditions + Hard per-page deadline + Time-to-ready stats (p50/p95)
+
+Instead of sleeping a fixed number of seconds after driver.get(), scrapers
+wait for the element their extractor actually reads (heatmap rects present,
+contest rows stopped changing, ...). Every wait is capped by the page's
+deadline, and the time it really took is recorded per label so the
+savings are visible in get_readiness_stats().
+
+Conditions run through execute_script, so they are not slowed down by the
+driver's implicit wait.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Hard cap on all readiness waits for one page load
+PAGE_READY_DEADLINE = float(os.getenv('PAGE_READY_DEADLINE', '30'))
+POLL_INTERVAL = 0.2
+
+# Samples kept per label for the percentiles
+MAX_SAMPLES = 500
+
+
+class PageDeadline:
+    """Wall-clock budget shared by every wait on one page (start it once driver.get() returns)"""
+
+    def __init__(self, seconds=PAGE_READY_DEADLINE):
+        self.started = time.monotonic()
+        self.expires = self.started + seconds
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self, cap=None):
+        left = max(0.0, self.expires - time.monotonic())
+        return min(left, cap) if cap is not None else left
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+class ReadinessStats:
+    """Time-to-ready samples per label"""
+
+    def __init__(self):
+        self.samples = {}
+        self.timeouts = {}
+        self.lock = threading.Lock()
+
+    def record(self, label, seconds, ready):
+        with self.lock:
+            samples = self.samples.setdefault(label, [])
+            samples.append(seconds)
+            if len(samples) > MAX_SAMPLES:
+                del samples[:len(samples) - MAX_SAMPLES]
+            if not ready:
+                self.timeouts[label] = self.timeouts.get(label, 0) + 1
+
+    def summary(self):
+        with self.lock:
+            stats = {}
+            for label, samples in self.samples.items():
+                ordered = sorted(samples)
+                stats[label] = {
+                    'count': len(ordered),
+                    'timeouts': self.timeouts.get(label, 0),
+                    'p50': round(_percentile(ordered, 50), 2),
+                    'p95': round(_percentile(ordered, 95), 2),
+                }
+            return stats
+
+
+def _percentile(ordered, percent):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+_stats = ReadinessStats()
+
+
+def record_time_to_ready(label, seconds, ready=True):
+    """Record a whole-page time-to-ready (e.g. deadline.elapsed() once extraction can start)"""
+    _stats.record(label, seconds, ready)
+
+
+def get_readiness_stats():
+    """{label: {count, timeouts, p50, p95}} in seconds"""
+    return _stats.summary()
+
+
+# ----------------------------------------------------------------------
+# Conditions: callables taking the driver and returning a truthy value when ready
+# ----------------------------------------------------------------------
+
+def elements_present(css, min_count=1):
+    """At least min_count elements match the CSS selector"""
+    script = "return document.querySelectorAll(arguments[0]).length;"
+
+    def condition(driver):
+        return driver.execute_script(script, css) >= min_count
+    return condition
+
+
+def count_stable(css, settle=0.6, min_count=1):
+    """
+    Matching element count is at least min_count and unchanged for `settle`
+    seconds (JS still appending rows/rects otherwise).
+    """
+    script = "return document.querySelectorAll(arguments[0]).length;"
+    state = {'count': None, 'since': None}
+
+    def condition(driver):
+        count = driver.execute_script(script, css)
+        now = time.monotonic()
+        if count != state['count']:
+            state['count'], state['since'] = count, now
+            return False
+        return count >= min_count and now - state['since'] >= settle
+    return condition
+
+
+def text_matches(pattern):
+    """document.body.innerText matches the (case-insensitive) JS regex"""
+    script = "return !!(document.body && new RegExp(arguments[0], 'i').test(document.body.innerText));"
+
+    def condition(driver):
+        return driver.execute_script(script, pattern)
+    return condition
+
+
+def document_complete(driver):
+    return driver.execute_script("return document.readyState") == 'complete'
+
+
+def wait_until(driver, condition, label, timeout=None, deadline=None):
+    """
+    Poll condition(driver) until it is truthy, `timeout` passes or the page
+    deadline expires. Records time-to-ready under `label`. Returns True when ready.
+    """
+    limit = timeout if timeout is not None else PAGE_READY_DEADLINE
+    if deadline is not None:
+        limit = deadline.remaining(limit)
+
+    started = time.monotonic()
+    ready = False
+    while True:
+        try:
+            if condition(driver):
+                ready = True
+                break
+        except Exception as e:
+            logger.debug(f"[Readiness] {label}: condition raised {e}")
+        if time.monotonic() - started >= limit:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    elapsed = time.monotonic() - started
+    _stats.record(label, elapsed, ready)
+    if ready:
+        logger.debug(f"[Readiness] {label} ready in {elapsed:.2f}s")
+    else:
+        logger.warning(f"[Readiness] {label} not ready after {elapsed:.1f}s, continuing with what rendered")
+    return ready
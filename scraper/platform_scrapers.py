@@ -2,7 +2,6 @@
 Platform Scrapers - Fetch real data from coding platforms
 IMPROVED VERSION - Gets all missing data points
 """
-import requests
 from bs4 import BeautifulSoup
 import time
 import re
@@ -10,10 +9,13 @@ import os
 from datetime import datetime
 from dotenv import load_dotenv
 
+import http_client
+from rate_governor import get_governor
+
 load_dotenv()
 
 class PlatformScraper:
-    def __init__(self, delay=3, max_retries=3):
+    def __init__(self, delay=0, max_retries=3):
         self.delay = delay
         self.max_retries = max_retries
         self.headers = {
@@ -23,8 +25,17 @@ class PlatformScraper:
         self.github_token = os.getenv('GITHUB_TOKEN', '')
     
     def sleep(self):
-        """Rate limiting delay"""
-        time.sleep(self.delay)
+        """Optional extra pause between platforms (per-host pacing is done by the rate governor)"""
+        if self.delay:
+            time.sleep(self.delay)
+    
+    def _request(self, method, url, **kwargs):
+        """Pooled HTTP request paced by the shared per-host rate governor"""
+        governor = get_governor()
+        governor.acquire(url)
+        response = http_client.request(method, url, **kwargs)
+        governor.observe(url, response)
+        return response
     
     def scrape_leetcode(self, username):
         """Scrape LeetCode profile using GraphQL API"""
@@ -57,7 +68,8 @@ class PlatformScraper:
             }
             """
             
-            response = requests.post(
+            response = self._request(
+                'POST',
                 url,
                 json={'query': query, 'variables': {'username': username}},
                 headers=self.headers,
@@ -109,7 +121,7 @@ class PlatformScraper:
             # Try CodeChef API first (more reliable)
             api_url = f"https://codechef-api.vercel.app/{username}"
             try:
-                api_response = requests.get(api_url, timeout=10)
+                api_response = self._request('GET', api_url, timeout=10)
                 if api_response.status_code == 200:
                     api_data = api_response.json()
                     
@@ -140,7 +152,7 @@ class PlatformScraper:
             
             # Fallback to web scraping
             url = f"https://www.codechef.com/users/{username}"
-            response = requests.get(url, headers=self.headers, timeout=15)
+            response = self._request('GET', url, headers=self.headers, timeout=15)
             
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
@@ -251,7 +263,7 @@ class PlatformScraper:
             
             # Get user info
             url = f"https://codeforces.com/api/user.info?handles={username}"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self._request('GET', url, headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -267,7 +279,7 @@ class PlatformScraper:
                     contests = 0
                     try:
                         contest_url = f"https://codeforces.com/api/user.rating?handle={username}"
-                        contest_response = requests.get(contest_url, headers=self.headers, timeout=10)
+                        contest_response = self._request('GET', contest_url, headers=self.headers, timeout=10)
                         if contest_response.status_code == 200:
                             contest_data = contest_response.json()
                             if contest_data.get('status') == 'OK':
@@ -279,7 +291,7 @@ class PlatformScraper:
                     problems_solved = 0
                     try:
                         submissions_url = f"https://codeforces.com/api/user.status?handle={username}&from=1&count=10000"
-                        sub_response = requests.get(submissions_url, headers=self.headers, timeout=10)
+                        sub_response = self._request('GET', submissions_url, headers=self.headers, timeout=10)
                         
                         if sub_response.status_code == 200:
                             sub_data = sub_response.json()
@@ -327,7 +339,7 @@ class PlatformScraper:
             if self.github_token:
                 headers['Authorization'] = f'token {self.github_token}'
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self._request('GET', url, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -351,7 +363,8 @@ class PlatformScraper:
                             }
                         }
                         """
-                        graphql_response = requests.post(
+                        graphql_response = self._request(
+                            'POST',
                             graphql_url,
                             json={'query': query, 'variables': {'username': username}},
                             headers=headers,
@@ -368,7 +381,7 @@ class PlatformScraper:
                 if contributions == 0:
                     try:
                         profile_url = f"https://github.com/{username}"
-                        profile_response = requests.get(profile_url, headers=self.headers, timeout=10)
+                        profile_response = self._request('GET', profile_url, headers=self.headers, timeout=10)
                         
                         if profile_response.status_code == 200:
                             soup = BeautifulSoup(profile_response.text, 'html.parser')
@@ -423,7 +436,7 @@ class PlatformScraper:
             # Try basic scraping first
             try:
                 url = f"https://codolio.com/profile/{username}"
-                response = requests.get(url, headers=self.headers, timeout=10)
+                response = self._request('GET', url, headers=self.headers, timeout=10)
                 
                 if response.status_code == 200:
                     soup = BeautifulSoup(response.text, 'html.parser')
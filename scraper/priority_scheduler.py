@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Priority Scheduler - Continuous staleness-ordered scraping
+Min-heap per platform keyed on next-due time + Persistent in MongoDB + Queue depth/lag stats
+
+Instead of sweeping every student every 90 minutes, each (student, platform)
+pair sits in a heap ordered by when it is next due. The dispatcher hands out
+due pairs as soon as a worker slot frees up, so work arrives steadily within
+each platform's concurrency limit (the per-host rate governor paces the
+requests themselves). Next-due times are saved in the scrape_schedule
+collection, so a restart picks up where it left off.
+
+Intervals adapt per pair (refresh_cadence.AdaptiveCadence): profiles that
+stop changing back off towards the platform's ceiling, and any detected
+change resets them to UPDATE_INTERVAL_HOURS, which acts as the floor.
+
+Platforms with a batched scraper (LeetCode's aliased GraphQL) get group jobs:
+one worker slot takes up to group_size due pairs, topped up with pairs due
+within GROUP_LOOKAHEAD_MINUTES, and scrapes them together.
+
+A platform can also have a throttle (GitHub's token budget): while it asks
+for a delay no new jobs start on that platform, so work is spread out over
+the rate-limit window instead of workers stalling on an exhausted budget.
+"""
+
+import heapq
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from batch_engine import get_platform_concurrency
+from refresh_cadence import AdaptiveCadence
+
+logger = logging.getLogger(__name__)
+
+# Fastest refresh interval (hours) per platform; unchanged profiles back off from here
+UPDATE_INTERVAL_HOURS = {
+    'leetcode': 1.5,
+    'codechef': 1.5,
+    'codeforces': 1.5,
+    'github': 1.5,
+    'codolio': 4,     # JS rendering = heavier
+}
+
+# Failed scrapes are retried sooner than a full interval
+ERROR_RETRY_MINUTES = int(os.getenv('SCHEDULER_ERROR_RETRY_MINUTES', '30'))
+
+# How often the student list is re-read to pick up new/removed students
+STUDENT_RELOAD_MINUTES = int(os.getenv('SCHEDULER_STUDENT_RELOAD_MINUTES', '15'))
+
+# Longest the dispatcher sleeps when nothing is due
+MAX_IDLE_SECONDS = 30
+
+# Group jobs pull in pairs due this soon so a batch request isn't wasted on one student
+GROUP_LOOKAHEAD_MINUTES = int(os.getenv('SCHEDULER_GROUP_LOOKAHEAD_MINUTES', '15'))
+
+
+class PriorityScheduler:
+    """
+    Staleness-ordered queue of (student, platform) scrape jobs.
+
+    students: the students collection
+    schedule: collection holding {studentId, platform, nextDueAt, lastScrapedAt, lastStatus}
+    job: callable(platform, student) -> status or (status, data),
+         status being 'success' | 'error' | 'skipped'
+    group_jobs: optional {platform: (callable(platform, students) -> {student_id: outcome}, group_size)}
+         for platforms that scrape several students per request
+    throttles: optional {platform: callable() -> seconds before the next job may start}
+    """
+
+    def __init__(self, students, schedule, job, platforms, intervals=None, concurrency=None,
+                 group_jobs=None, throttles=None):
+        self.students = students
+        self.schedule = schedule
+        self.job = job
+        self.group_jobs = {p: g for p, g in (group_jobs or {}).items() if p in platforms}
+        self.throttles = {p: t for p, t in (throttles or {}).items() if p in platforms}
+        self.held_until = {}
+        self.platforms = list(platforms)
+        self.intervals = dict(UPDATE_INTERVAL_HOURS)
+        self.intervals.update(intervals or {})
+        # Only explicitly passed floors override CADENCE_<PLATFORM>; the defaults match CADENCE_BOUNDS
+        self.cadence = AdaptiveCadence(floors=intervals)
+        self.concurrency = {
+            platform: (concurrency or {}).get(platform) or get_platform_concurrency(platform)
+            for platform in self.platforms
+        }
+
+        # One heap per platform of (next_due, student_id); next_due holds the
+        # authoritative time so superseded heap entries can be skipped lazily
+        self.heaps = {platform: [] for platform in self.platforms}
+        self.next_due = {}
+        self.active = set()
+        # (platform, student_id) -> (fingerprint, interval_hours) of the last successful scrape
+        self.history = {}
+        self.in_flight = {platform: 0 for platform in self.platforms}
+        self.dispatched = {platform: 0 for platform in self.platforms}
+        self.last_lag = {platform: 0.0 for platform in self.platforms}
+
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = False
+        self.last_reload = None
+
+        try:
+            self.schedule.create_index([('studentId', 1), ('platform', 1)], unique=True)
+        except Exception as e:
+            logger.warning(f"[PriorityScheduler] Could not ensure scrape_schedule index: {e}")
+
+    # ------------------------------------------------------------------
+    # Queue maintenance
+    # ------------------------------------------------------------------
+
+    def interval_for(self, platform):
+        """Floor interval for a platform"""
+        return timedelta(hours=self.cadence.bounds(platform)[0])
+
+    def _push(self, platform, student_id, due):
+        """Insert or move an entry (caller holds the lock)"""
+        self.next_due[(platform, student_id)] = due
+        heapq.heappush(self.heaps[platform], (due, student_id))
+
+    def load(self):
+        """
+        (Re)build the heaps from active students and persisted next-due times.
+        Pairs without a saved entry are due interval-after their last updatedAt.
+        """
+        saved = {}
+        try:
+            for entry in self.schedule.find({'platform': {'$in': self.platforms}}):
+                key = (entry['platform'], entry['studentId'])
+                saved[key] = entry.get('nextDueAt')
+                if entry.get('fingerprint'):
+                    self.history.setdefault(key, (entry['fingerprint'], entry.get('intervalHours')))
+        except Exception as e:
+            logger.error(f"[PriorityScheduler] Failed to read scrape_schedule: {e}")
+
+        try:
+            students = list(self.students.find(
+                {'isActive': {'$ne': False}},
+                {'platformUsernames': 1, 'platforms': 1}
+            ))
+        except Exception as e:
+            logger.error(f"[PriorityScheduler] Failed to load students: {e}")
+            # Retry at the next reload; whatever is already queued keeps running
+            self.last_reload = datetime.utcnow()
+            return
+
+        now = datetime.utcnow()
+        wanted = set()
+        with self.lock:
+            for student in students:
+                usernames = student.get('platformUsernames') or {}
+                for platform in self.platforms:
+                    if not usernames.get(platform):
+                        continue
+                    key = (platform, student['_id'])
+                    wanted.add(key)
+                    if key in self.next_due:
+                        continue  # already queued or in flight
+
+                    due = saved.get(key)
+                    if due is None:
+                        updated_at = ((student.get('platforms') or {}).get(platform) or {}).get('updatedAt')
+                        due = updated_at + self.interval_for(platform) if updated_at else now
+                    self._push(platform, student['_id'], due)
+
+            # Forget students that were deactivated or lost their username
+            for key in [k for k in self.next_due if k not in wanted]:
+                del self.next_due[key]
+                self.history.pop(key, None)
+            for platform in self.platforms:
+                heap = [(due, sid) for due, sid in self.heaps[platform]
+                        if self.next_due.get((platform, sid)) == due]
+                heapq.heapify(heap)
+                self.heaps[platform] = heap
+
+        self.last_reload = now
+        logger.info(f"[PriorityScheduler] Loaded {len(self.next_due)} (student, platform) entries")
+        self.wakeup.set()
+
+    def pop_due(self, platform, limit, now=None):
+        """Take up to limit due student ids off a platform's heap"""
+        now = now or datetime.utcnow()
+        taken = []
+        with self.lock:
+            heap = self.heaps[platform]
+            while heap and len(taken) < limit:
+                due, student_id = heap[0]
+                if due > now:
+                    break
+                heapq.heappop(heap)
+                key = (platform, student_id)
+                if self.next_due.get(key) != due or key in self.active:
+                    continue  # superseded entry, or already being scraped
+                self.active.add(key)
+                taken.append((student_id, due))
+        return taken
+
+    def reschedule(self, platform, student_id, status, data=None):
+        """Push a finished pair back with its next due time and persist it"""
+        now = datetime.utcnow()
+        key = (platform, student_id)
+        update = {'lastScrapedAt': now, 'lastStatus': status}
+
+        if status == 'success':
+            previous_fingerprint, previous_interval = self.history.get(key, (None, None))
+            hours, current, changed = self.cadence.next_interval(
+                platform, data, previous_fingerprint, previous_interval
+            )
+            due = now + timedelta(hours=hours)
+            update.update({'fingerprint': current, 'intervalHours': hours})
+            if changed:
+                update['lastChangedAt'] = now
+            with self.lock:
+                self.history[key] = (current, hours)
+        elif status == 'error':
+            due = now + min(self.interval_for(platform), timedelta(minutes=ERROR_RETRY_MINUTES))
+        else:
+            due = now + self.interval_for(platform)
+        update['nextDueAt'] = due
+
+        with self.lock:
+            if key in self.next_due:
+                self._push(platform, student_id, due)
+
+        try:
+            self.schedule.update_one(
+                {'studentId': student_id, 'platform': platform},
+                {'$set': update},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"[PriorityScheduler] Failed to persist schedule for {student_id}/{platform}: {e}")
+
+    def mark_due(self, platform=None, student_id=None):
+        """Make pairs due right now (e.g. a manual full refresh)"""
+        now = datetime.utcnow()
+        with self.lock:
+            for (p, sid) in list(self.next_due):
+                if (platform is None or p == platform) and (student_id is None or sid == student_id):
+                    self._push(p, sid, now)
+        self.wakeup.set()
+
+    def next_wakeup(self):
+        """Seconds until the earliest entry on any platform with a free slot is due"""
+        now = datetime.utcnow()
+        soonest = MAX_IDLE_SECONDS
+        with self.lock:
+            for platform in self.platforms:
+                heap = self.heaps[platform]
+                if heap and self.in_flight[platform] < self.concurrency[platform]:
+                    due = max(heap[0][0], self.held_until.get(platform, heap[0][0]))
+                    soonest = min(soonest, max(0.0, (due - now).total_seconds()))
+        return soonest
+
+    def _throttled(self, platform, now):
+        """True (and the platform held) while its throttle asks for a delay"""
+        throttle = self.throttles.get(platform)
+        if throttle is None:
+            return False
+        with self.lock:
+            heap = self.heaps[platform]
+            if not heap or heap[0][0] > now:
+                return False  # nothing due; don't book a slot for it
+        try:
+            delay = throttle()
+        except Exception as e:
+            logger.warning(f"[PriorityScheduler] {platform} throttle failed: {e}")
+            delay = 0
+        with self.lock:
+            if delay > 0:
+                self.held_until[platform] = now + timedelta(seconds=delay)
+                return True
+            self.held_until.pop(platform, None)
+        return False
+
+    # ------------------------------------------------------------------
+    # Dispatching
+    # ------------------------------------------------------------------
+
+    def _run_job(self, platform, student_id):
+        status, data = 'error', None
+        try:
+            student = self.students.find_one({'_id': student_id})
+            if student is None or student.get('isActive') is False:
+                with self.lock:
+                    self.next_due.pop((platform, student_id), None)
+                return
+            outcome = self.job(platform, student)
+            status, data = outcome if isinstance(outcome, tuple) else (outcome, None)
+        except Exception as e:
+            logger.error(f"[PriorityScheduler] {platform} job for {student_id} failed: {e}")
+        finally:
+            with self.lock:
+                self.in_flight[platform] -= 1
+                self.active.discard((platform, student_id))
+            self.reschedule(platform, student_id, status, data)
+            self.wakeup.set()
+
+    def _run_group(self, platform, student_ids):
+        outcomes = {}
+        try:
+            students = list(self.students.find({'_id': {'$in': student_ids}}))
+            active = [s for s in students if s.get('isActive') is not False]
+            gone = set(student_ids) - {s['_id'] for s in active}
+            with self.lock:
+                for student_id in gone:
+                    self.next_due.pop((platform, student_id), None)
+            if active:
+                group_job, _ = self.group_jobs[platform]
+                outcomes = group_job(platform, active) or {}
+        except Exception as e:
+            logger.error(f"[PriorityScheduler] {platform} group job for {len(student_ids)} students failed: {e}")
+        finally:
+            with self.lock:
+                self.in_flight[platform] -= 1
+                for student_id in student_ids:
+                    self.active.discard((platform, student_id))
+            for student_id in student_ids:
+                outcome = outcomes.get(student_id, 'error')
+                status, data = outcome if isinstance(outcome, tuple) else (outcome, None)
+                self.reschedule(platform, student_id, status, data)
+            self.wakeup.set()
+
+    def _dispatch_groups(self, platform, free, now, executor):
+        _, group_size = self.group_jobs[platform]
+        for _ in range(free):
+            if self._throttled(platform, now):
+                break
+            taken = self.pop_due(platform, group_size, now)
+            if not taken:
+                break
+            if len(taken) < group_size:
+                taken += self.pop_due(platform, group_size - len(taken),
+                                      now + timedelta(minutes=GROUP_LOOKAHEAD_MINUTES))
+            with self.lock:
+                self.in_flight[platform] += 1
+                self.dispatched[platform] += len(taken)
+                self.last_lag[platform] = (now - taken[0][1]).total_seconds()
+            executor.submit(self._run_group, platform, [student_id for student_id, _ in taken])
+
+    def dispatch_once(self, executors):
+        """Hand every due pair that fits a free worker slot to its platform's executor"""
+        now = datetime.utcnow()
+        for platform in self.platforms:
+            with self.lock:
+                free = self.concurrency[platform] - self.in_flight[platform]
+            if free <= 0:
+                continue
+            if platform in self.group_jobs:
+                self._dispatch_groups(platform, free, now, executors[platform])
+                continue
+            if platform in self.throttles:
+                # One job per throttle check, so a pacing throttle can book each slot
+                free = 0 if self._throttled(platform, now) else 1
+            for student_id, due in self.pop_due(platform, free, now):
+                with self.lock:
+                    self.in_flight[platform] += 1
+                    self.dispatched[platform] += 1
+                    self.last_lag[platform] = (now - due).total_seconds()
+                executors[platform].submit(self._run_job, platform, student_id)
+
+    def run(self):
+        """Dispatch loop; blocks until stop() is called"""
+        self.running = True
+        self.load()
+        executors = {
+            platform: ThreadPoolExecutor(max_workers=self.concurrency[platform],
+                                         thread_name_prefix=f'{platform}-queue')
+            for platform in self.platforms
+        }
+        logger.info(f"[PriorityScheduler] Running with concurrency {self.concurrency}")
+        try:
+            while self.running:
+                try:
+                    if (self.last_reload is None or
+                            datetime.utcnow() - self.last_reload >= timedelta(minutes=STUDENT_RELOAD_MINUTES)):
+                        self.load()
+                    self.dispatch_once(executors)
+                    self.wakeup.clear()
+                    self.wakeup.wait(self.next_wakeup())
+                except Exception as e:
+                    # One bad iteration must not take the dispatcher thread down with it
+                    logger.exception(f"[PriorityScheduler] Dispatch loop error: {e}")
+                    self.wakeup.clear()
+                    self.wakeup.wait(MAX_IDLE_SECONDS)
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Monitoring
+    # ------------------------------------------------------------------
+
+    def get_stats(self):
+        """Queue depth, lag and learned intervals per platform"""
+        now = datetime.utcnow()
+        stats = {}
+        with self.lock:
+            for platform in self.platforms:
+                dues = [due for (p, _), due in self.next_due.items() if p == platform]
+                overdue = [(now - due).total_seconds() for due in dues if due <= now]
+                learned = [hours for (p, _), (_, hours) in self.history.items() if p == platform and hours]
+                stats[platform] = {
+                    'queued': len(dues),
+                    'due': len(overdue),
+                    'in_flight': self.in_flight[platform],
+                    'max_lag_seconds': round(max(overdue), 1) if overdue else 0.0,
+                    'last_dispatch_lag_seconds': round(self.last_lag[platform], 1),
+                    'dispatched': self.dispatched[platform],
+                    'avg_interval_hours': round(sum(learned) / len(learned), 2) if learned else None,
+                }
+                if platform in self.held_until:
+                    stats[platform]['held_seconds'] = round(
+                        max(0.0, (self.held_until[platform] - now).total_seconds()), 1)
+            stats['cadence'] = self.cadence.get_stats()
+        return stats
@@ -4,18 +4,24 @@ Production-Ready Scraping Scheduler
 Clean + Safe + Auto-Updates + Rate-Limited + Logging
 
 Update Strategy:
-- LeetCode: every 90 minutes
-- CodeChef: every 90 minutes
-- Codeforces: every 90 minutes
-- GitHub: every 90 minutes
-- Codolio: every 4 hours (JS rendering = heavier)
-- Full refresh: once per day minimum
+- LeetCode: 90 minutes after its last scrape, backing off to 24 hours
+- CodeChef: 90 minutes after its last scrape, backing off to 24 hours
+- Codeforces: 90 minutes after its last scrape, backing off to 24 hours
+- GitHub: 90 minutes after its last scrape, backing off to 12 hours
+- Codolio: 4 hours after its last scrape, backing off to 48 hours (JS rendering = heavier)
+
+Profiles whose key numbers don't change between scrapes back off
+exponentially (refresh_cadence.py); any change resets them to the fast cadence.
+
+The scheduler is continuous: priority_scheduler.PriorityScheduler keeps every
+(student, platform) pair in a heap ordered by next-due time and dispatches
+due pairs as worker slots free up (SCRAPER_CONCURRENCY_<PLATFORM>).
+Manual sweeps still run through batch_engine.BatchEngine.
 """
 
 import schedule
 import time
 import logging
-import random
 from datetime import datetime, timedelta
 from pymongo import MongoClient
 import os
@@ -23,11 +29,27 @@ from dotenv import load_dotenv
 import threading
 import json
 
+from batch_engine import BatchEngine
+from browser_pool import get_browser_pool
+from page_readiness import get_readiness_stats
+from priority_scheduler import PriorityScheduler, UPDATE_INTERVAL_HOURS
+from submission_watermarks import configure_watermark_store
+from etag_cache import configure_etag_cache, get_etag_cache
+from github_tokens import get_token_pool
+from http_client import get_http_stats
+from refresh_coalescer import configure_refresh_coalescer, get_refresh_coalescer
+from write_behind import get_write_behind
+
 # Import our platform scrapers
 scrapers = {}
+# Platforms that can scrape many usernames per request:
+# {platform: (func(usernames, previous) -> {username: data}, max group)}, previous = {username: stored data}
+batch_scrapers = {}
 try:
-    from leetcode_scraper import scrape_leetcode_user
+    from leetcode_scraper import scrape_leetcode_user, scrape_leetcode_users_batch, LEETCODE_MAX_BATCH_SIZE
     scrapers['leetcode'] = scrape_leetcode_user
+    batch_scrapers['leetcode'] = (lambda usernames, previous: scrape_leetcode_users_batch(usernames),
+                                  LEETCODE_MAX_BATCH_SIZE)
     print("✅ LeetCode scraper imported")
 except ImportError as e:
     print(f"⚠️  Failed to import LeetCode scraper: {e}")
@@ -40,15 +62,18 @@ except ImportError as e:
     print(f"⚠️  Failed to import CodeChef scraper: {e}")
 
 try:
-    from codeforces_scraper import scrape_codeforces_user
+    from codeforces_scraper import scrape_codeforces_user, scrape_codeforces_cohort, CODEFORCES_COHORT_SIZE
     scrapers['codeforces'] = scrape_codeforces_user
+    batch_scrapers['codeforces'] = (scrape_codeforces_cohort, CODEFORCES_COHORT_SIZE)
     print("✅ Codeforces scraper imported")
 except ImportError as e:
     print(f"⚠️  Failed to import Codeforces scraper: {e}")
 
 try:
-    from github_scraper import scrape_github_user
+    from github_scraper import scrape_github_user, scrape_github_users_batch, GITHUB_BATCH_SIZE
     scrapers['github'] = scrape_github_user
+    batch_scrapers['github'] = (lambda usernames, previous: scrape_github_users_batch(usernames),
+                                GITHUB_BATCH_SIZE)
     print("✅ GitHub scraper imported")
 except ImportError as e:
     print(f"⚠️  Failed to import GitHub scraper: {e}")
@@ -87,6 +112,28 @@ class ProductionScraper:
         self.db = self.client['go-tracker']
         self.students = self.db.students
         self.logs = self.db.scraper_logs
+        self.engine = BatchEngine()
+        # Student updates and log entries are flushed in unordered bulk writes
+        self.writes = get_write_behind()
+        # Incremental submission ingest keeps its per-handle watermarks here
+        configure_watermark_store(self.db.submission_watermarks)
+        # Conditional GET validators + bodies for the GitHub REST calls
+        configure_etag_cache(self.db.http_cache)
+        # Staff refreshes (scraper daemon) and scheduled scrapes share in-flight scrapes and fresh results
+        configure_refresh_coalescer(self.db.refresh_coalescer)
+        self.queue = PriorityScheduler(
+            self.students,
+            self.db.scrape_schedule,
+            lambda platform, student: self.scrape_student_result(
+                platform, self.coalesced(platform, scrapers[platform]), student),
+            platforms=list(scrapers),
+            group_jobs={
+                platform: (lambda platform, students: self.scrape_students_grouped(platform, students), size)
+                for platform, (_, size) in batch_scrapers.items()
+            },
+            # Spread GitHub jobs over the rate-limit window once the token budget runs low
+            throttles={'github': lambda: get_token_pool().dispatch_delay()}
+        )
         self.running = False
         
     def log_activity(self, platform, username, status, message="", data_points=0):
@@ -100,15 +147,10 @@ class ProductionScraper:
                 'data_points': data_points,
                 'timestamp': datetime.utcnow()
             }
-            self.logs.insert_one(log_entry)
+            self.writes.insert(self.logs, log_entry)
         except Exception as e:
             logger.error(f"Failed to log activity: {e}")
     
-    def safe_delay(self, min_seconds=2, max_seconds=5):
-        """Random delay to avoid rate limiting"""
-        delay = random.uniform(min_seconds, max_seconds)
-        time.sleep(delay)
-    
     def get_active_students(self):
         """Get all active students with platform usernames"""
         try:
@@ -121,74 +163,110 @@ class ProductionScraper:
             logger.error(f"Failed to get students: {e}")
             return []
     
+    def is_due(self, student, platform, update_interval_hours):
+        """Check whether a student's platform data is older than the update interval"""
+        platform_data = student.get('platforms', {}).get(platform, {})
+        last_updated = platform_data.get('updatedAt')
+        if not last_updated:
+            return True
+        return datetime.utcnow() - last_updated >= timedelta(hours=update_interval_hours)
+    
+    def coalesced(self, platform, scraper_func):
+        """scraper_func(username) that joins a refresh of the same profile already in flight"""
+        return lambda username: get_refresh_coalescer().run(platform, username, lambda: scraper_func(username))
+    
+    def scrape_student_result(self, platform, scraper_func, student):
+        """Scrape one student and store the result. Returns (status, data)"""
+        username = None
+        try:
+            # Get platform username
+            username = student.get('platformUsernames', {}).get(platform)
+            if not username:
+                self.log_activity(platform, 'N/A', 'skipped', f"No username for {student.get('name')}")
+                return 'skipped', None
+            
+            logger.info(f"Scraping {platform} for {student.get('name')} ({username})")
+            
+            # Scrape the platform
+            data = scraper_func(username)
+            
+            if data:
+                # Update MongoDB with new data
+                update_data = {
+                    f'platforms.{platform}': {
+                        **data,
+                        'updatedAt': datetime.utcnow()
+                    }
+                }
+                
+                self.writes.update(self.students, {'_id': student['_id']}, update_data)
+                
+                data_points = len([v for v in data.values() if v is not None and v != 0])
+                self.log_activity(platform, username, 'success', 'Data updated', data_points)
+                logger.info(f"✅ Updated {platform} data for {username}")
+                return 'success', data
+            
+            self.log_activity(platform, username, 'error', 'No data returned')
+            logger.warning(f"❌ No data for {username} on {platform}")
+            return 'error', None
+            
+        except Exception as e:
+            if username:
+                self.log_activity(platform, username, 'error', str(e))
+            logger.error(f"Error scraping {platform} for {username}: {e}")
+            return 'error', None
+    
+    def scrape_student(self, platform, scraper_func, student):
+        """Scrape one student and store the result. Returns 'success', 'error' or 'skipped'"""
+        return self.scrape_student_result(platform, scraper_func, student)[0]
+    
+    def scrape_students_grouped(self, platform, students):
+        """
+        Scrape several students with the platform's batch scraper, then store each
+        result as scrape_student_result does. Returns {student_id: (status, data)}
+        """
+        batch_func, _ = batch_scrapers[platform]
+        previous = {}
+        for student in students:
+            username = (student.get('platformUsernames') or {}).get(platform)
+            if username:
+                previous[username] = (student.get('platforms') or {}).get(platform) or {}
+        results = batch_func(list(previous), previous)
+        coalescer = get_refresh_coalescer()
+        for username, data in results.items():
+            coalescer.remember(platform, username, data)
+        return {
+            student['_id']: self.scrape_student_result(platform, results.get, student)
+            for student in students
+        }
+    
     def scrape_platform_batch(self, platform, scraper_func, update_interval_hours=1):
-        """Scrape a platform for all students with rate limiting"""
+        """Scrape a platform for all due students, concurrently within the platform's limit"""
         logger.info(f"🔄 Starting {platform} batch scrape")
         
         students = self.get_active_students()
-        success_count = 0
-        error_count = 0
-        skipped_count = 0
+        due_students = [s for s in students if self.is_due(s, platform, update_interval_hours)]
+        skipped_count = len(students) - len(due_students)
         
-        for student in students:
-            username = None
-            try:
-                # Check if we need to update this student
-                platform_data = student.get('platforms', {}).get(platform, {})
-                last_updated = platform_data.get('updatedAt')
-                
-                if last_updated:
-                    time_since_update = datetime.utcnow() - last_updated
-                    if time_since_update < timedelta(hours=update_interval_hours):
-                        skipped_count += 1
-                        continue
-                
-                # Get platform username
-                username = student.get('platformUsernames', {}).get(platform)
-                if not username:
-                    self.log_activity(platform, 'N/A', 'skipped', f"No username for {student.get('name')}")
-                    skipped_count += 1
-                    continue
-                
-                logger.info(f"Scraping {platform} for {student.get('name')} ({username})")
-                
-                # Scrape the platform
-                data = scraper_func(username)
-                
-                if data:
-                    # Update MongoDB with new data
-                    update_data = {
-                        f'platforms.{platform}': {
-                            **data,
-                            'updatedAt': datetime.utcnow()
-                        }
-                    }
-                    
-                    self.students.update_one(
-                        {'_id': student['_id']},
-                        {'$set': update_data}
-                    )
-                    
-                    success_count += 1
-                    data_points = len([v for v in data.values() if v is not None and v != 0])
-                    self.log_activity(platform, username, 'success', 'Data updated', data_points)
-                    logger.info(f"✅ Updated {platform} data for {username}")
-                else:
-                    error_count += 1
-                    self.log_activity(platform, username, 'error', 'No data returned')
-                    logger.warning(f"❌ No data for {username} on {platform}")
-                
-                # Safe delay between requests
-                self.safe_delay()
-                
-            except Exception as e:
-                error_count += 1
-                if username:
-                    self.log_activity(platform, username, 'error', str(e))
-                logger.error(f"Error scraping {platform} for {username}: {e}")
-                
-                # Continue with next student
-                continue
+        if platform in batch_scrapers:
+            # A handful of multi-user requests instead of one per student
+            statuses = [status for status, _ in self.scrape_students_grouped(platform, due_students).values()]
+            success_count = statuses.count('success')
+            skipped_count += statuses.count('skipped')
+            error_count = len(statuses) - success_count - statuses.count('skipped')
+            logger.info(f"🏁 {platform} batch complete: {success_count} success, {error_count} errors, {skipped_count} skipped")
+            return success_count, error_count, skipped_count
+        
+        outcomes = self.engine.run_platform(
+            platform,
+            lambda student: self.scrape_student(platform, self.coalesced(platform, scraper_func), student),
+            due_students
+        )
+        
+        statuses = [status for _, status, _ in outcomes]
+        success_count = statuses.count('success')
+        skipped_count += statuses.count('skipped')
+        error_count = len(statuses) - statuses.count('success') - statuses.count('skipped')
         
         logger.info(f"🏁 {platform} batch complete: {success_count} success, {error_count} errors, {skipped_count} skipped")
         return success_count, error_count, skipped_count
@@ -198,35 +276,35 @@ class ProductionScraper:
         if 'leetcode' not in scrapers:
             logger.error("LeetCode scraper not available")
             return 0, 0, 0
-        return self.scrape_platform_batch('leetcode', scrapers['leetcode'], update_interval_hours=1.5)
+        return self.scrape_platform_batch('leetcode', scrapers['leetcode'], UPDATE_INTERVAL_HOURS['leetcode'])
     
     def scrape_codechef(self):
         """Scrape CodeChef for all students"""
         if 'codechef' not in scrapers:
             logger.error("CodeChef scraper not available")
             return 0, 0, 0
-        return self.scrape_platform_batch('codechef', scrapers['codechef'], update_interval_hours=1.5)
+        return self.scrape_platform_batch('codechef', scrapers['codechef'], UPDATE_INTERVAL_HOURS['codechef'])
     
     def scrape_codeforces(self):
         """Scrape Codeforces for all students"""
         if 'codeforces' not in scrapers:
             logger.error("Codeforces scraper not available")
             return 0, 0, 0
-        return self.scrape_platform_batch('codeforces', scrapers['codeforces'], update_interval_hours=1.5)
+        return self.scrape_platform_batch('codeforces', scrapers['codeforces'], UPDATE_INTERVAL_HOURS['codeforces'])
     
     def scrape_github(self):
         """Scrape GitHub for all students"""
         if 'github' not in scrapers:
             logger.error("GitHub scraper not available")
             return 0, 0, 0
-        return self.scrape_platform_batch('github', scrapers['github'], update_interval_hours=1.5)
+        return self.scrape_platform_batch('github', scrapers['github'], UPDATE_INTERVAL_HOURS['github'])
     
     def scrape_codolio(self):
         """Scrape Codolio for all students (heavy operation)"""
         if 'codolio' not in scrapers:
             logger.error("Codolio scraper not available")
             return 0, 0, 0
-        return self.scrape_platform_batch('codolio', scrapers['codolio'], update_interval_hours=4)
+        return self.scrape_platform_batch('codolio', scrapers['codolio'], UPDATE_INTERVAL_HOURS['codolio'])
     
     def daily_full_refresh(self):
         """Full refresh of all platforms once per day"""
@@ -298,6 +376,16 @@ class ProductionScraper:
                     'coverage_percent': round((recent_count / total_students) * 100, 1) if total_students > 0 else 0
                 }
             
+            # Queue depth and lag from the priority scheduler
+            stats['queue'] = self.queue.get_stats()
+            stats['browser_pool'] = get_browser_pool().get_stats()
+            stats['time_to_ready'] = get_readiness_stats()
+            stats['etag_cache'] = get_etag_cache().get_stats()
+            stats['github_tokens'] = get_token_pool().get_stats()
+            stats['http'] = get_http_stats()
+            stats['refresh_coalescer'] = get_refresh_coalescer().get_stats()
+            stats['write_behind'] = self.writes.get_stats()
+            
             return stats
             
         except Exception as e:
@@ -307,33 +395,27 @@ class ProductionScraper:
     def start_scheduler(self):
         """Start the production scheduler"""
         logger.info("🚀 Starting Production Scraper Scheduler")
-        logger.info("📋 Schedule:")
-        logger.info("  - LeetCode: every 90 minutes")
-        logger.info("  - CodeChef: every 90 minutes") 
-        logger.info("  - Codeforces: every 90 minutes")
-        logger.info("  - GitHub: every 90 minutes")
-        logger.info("  - Codolio: every 4 hours")
-        logger.info("  - Full refresh: daily at 2:00 AM")
+        logger.info("📋 Schedule (continuous, staleness-ordered):")
+        for platform in self.queue.platforms:
+            floor, ceiling = self.queue.cadence.bounds(platform)
+            logger.info(f"  - {platform}: every {floor}-{ceiling}h depending on activity "
+                        f"(concurrency {self.queue.concurrency[platform]})")
         logger.info("  - Log cleanup: weekly")
         
-        # Schedule jobs with staggered timing to avoid conflicts
-        schedule.every(90).minutes.do(self.scrape_leetcode)
-        schedule.every(90).minutes.do(self.scrape_codechef)
-        schedule.every(90).minutes.do(self.scrape_codeforces)
-        schedule.every(90).minutes.do(self.scrape_github)
-        schedule.every(4).hours.do(self.scrape_codolio)
-        
-        # Daily and weekly maintenance
-        schedule.every().day.at("02:00").do(self.daily_full_refresh)
+        # Weekly maintenance
         schedule.every().sunday.at("03:00").do(self.cleanup_old_logs)
         
         self.running = True
         
-        # Run initial scrape for immediate data
-        logger.info("🔄 Running initial scrape...")
-        threading.Thread(target=self.scrape_github, daemon=True).start()
+        # Start Chrome for the Selenium scrapers before the first due CodeChef/Codolio job
+        if 'codechef' in scrapers or 'codolio' in scrapers:
+            threading.Thread(target=get_browser_pool().warm, name='browser-warmup', daemon=True).start()
         
-        # Main scheduler loop
+        # Priority queue dispatcher runs continuously in the background
+        dispatcher = threading.Thread(target=self.queue.run, name='priority-dispatcher', daemon=True)
+        dispatcher.start()
+        
+        # Main maintenance loop
         while self.running:
             try:
                 schedule.run_pending()
@@ -352,11 +434,15 @@ class ProductionScraper:
             except Exception as e:
                 logger.error(f"Scheduler error: {e}")
                 time.sleep(60)  # Wait before retrying
+        
+        self.queue.stop()
     
     def stop_scheduler(self):
         """Stop the scheduler gracefully"""
         logger.info("🛑 Stopping scheduler...")
         self.running = False
+        self.queue.stop()
+        self.writes.close()
         self.client.close()
 
 def main():
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Rate Governor - Process-wide per-host request pacing
+Token bucket per host + Retry-After / X-RateLimit-Reset handling
+
+Every scraper calls governor.acquire(url) before a request and
+governor.observe(url, response) after it. Scrapers then run at each
+platform's allowed rate instead of sleeping a fixed worst-case time.
+
+Configure a host with RATE_LIMIT_<HOST>="<requests_per_second>/<burst>",
+e.g. RATE_LIMIT_LEETCODE_COM="2/4" or RATE_LIMIT_API_GITHUB_COM="1.3/10".
+"""
+
+import logging
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# (requests per second, burst) per host
+DEFAULT_HOST_LIMITS = {
+    'leetcode.com': (1.0, 3),
+    'codeforces.com': (0.5, 2),       # API docs: at most 1 call per 2 seconds
+    'codechef.com': (0.5, 2),
+    'api.github.com': (1.3, 10),      # ~5,000 requests/hour with a token
+    'codolio.com': (0.5, 2),
+}
+FALLBACK_LIMIT = (2.0, 4)
+
+# Never park a host longer than this on a single header. GitHub's X-RateLimit-Reset
+# is up to an hour away (the rate-limit window); the old 300s cap woke workers early
+# only to collect another 403 and block again, so the cap covers a whole window.
+MAX_BLOCK_SECONDS = int(os.getenv('RATE_LIMIT_MAX_BLOCK_SECONDS', '3600'))
+
+
+def normalize_host(url_or_host):
+    """Map a URL or hostname onto a configured host key (www.codechef.com -> codechef.com)"""
+    if not url_or_host:
+        return ''
+    host = urlparse(url_or_host).hostname if '://' in url_or_host else url_or_host
+    host = (host or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    for known in DEFAULT_HOST_LIMITS:
+        if host == known or host.endswith('.' + known):
+            return known
+    return host
+
+
+def _limit_from_env(host, default):
+    value = os.getenv('RATE_LIMIT_' + host.upper().replace('.', '_').replace('-', '_'))
+    if not value:
+        return default
+    try:
+        rate, _, burst = value.partition('/')
+        rate, burst = float(rate), int(burst or default[1])
+        # A zero rate would divide by zero when the bucket computes its wait
+        if not rate > 0 or burst < 1:
+            raise ValueError('rate must be > 0 and burst >= 1')
+        return rate, burst
+    except ValueError:
+        logger.warning(f"Invalid rate limit for {host}: {value!r}, using {default}")
+        return default
+
+
+def parse_retry_after(value, now=None):
+    """Retry-After is either delta-seconds or an HTTP date; returns seconds to wait or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (now or time.time()))
+
+
+class TokenBucket:
+    """Thread-safe token bucket that can also be paused until a wall-clock time"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0  # monotonic
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        # No credit accrues while the host is blocked
+        start = max(self.updated, min(now, self.blocked_until))
+        self.tokens = min(self.burst, self.tokens + max(0.0, now - start) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take one token (possibly on credit) and return how long the caller must wait"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            # Callers queued behind a block are spaced out after it, not released together
+            return max(0.0, self.blocked_until - now) + max(0.0, -self.tokens) / self.rate
+
+    def block_for(self, seconds):
+        """Stop handing out tokens for the given number of seconds"""
+        with self.lock:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + seconds)
+            # Whatever was saved up is gone once the server says stop
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+
+
+class RateGovernor:
+    """One token bucket per host, shared by every scraper in the process"""
+
+    def __init__(self, limits=None):
+        self.limits = dict(DEFAULT_HOST_LIMITS)
+        self.limits.update(limits or {})
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def bucket(self, host):
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                rate, burst = _limit_from_env(host, self.limits.get(host, FALLBACK_LIMIT))
+                bucket = TokenBucket(rate, burst)
+                self.buckets[host] = bucket
+                self.stats[host] = {'requests': 0, 'waited': 0.0, 'throttled': 0}
+            return bucket
+
+    def acquire(self, url_or_host):
+        """Block until the host's budget allows one more request. Returns seconds waited"""
+        host = normalize_host(url_or_host)
+        wait = self.bucket(host).reserve()
+        if wait > 0:
+            if wait >= 5:
+                logger.info(f"[RateGovernor] {host}: waiting {wait:.1f}s for rate budget")
+            time.sleep(wait)
+        with self.lock:
+            self.stats[host]['requests'] += 1
+            self.stats[host]['waited'] += wait
+        return wait
+
+    def block(self, url_or_host, seconds, reason=''):
+        """Pause a host for the given number of seconds"""
+        host = normalize_host(url_or_host)
+        seconds = min(max(0.0, float(seconds)), MAX_BLOCK_SECONDS)
+        if seconds <= 0:
+            return 0.0
+        self.bucket(host).block_for(seconds)
+        with self.lock:
+            self.stats[host]['throttled'] += 1
+        logger.warning(f"[RateGovernor] {host}: paused {seconds:.0f}s{f' ({reason})' if reason else ''}")
+        return seconds
+
+    def observe(self, url, response, rate_headers=True):
+        """
+        Feed a response back into the governor.
+        Honors Retry-After (429/503) and X-RateLimit-Remaining/X-RateLimit-Reset.
+        rate_headers=False skips the latter for callers that rotate credentials
+        themselves (one exhausted token shouldn't pause the whole host).
+        Returns the pause applied in seconds (0 when none).
+        """
+        headers = getattr(response, 'headers', None) or {}
+        status = getattr(response, 'status_code', 0)
+
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        if retry_after is not None and status in (403, 429, 503):
+            return self.block(url, retry_after, f'Retry-After on HTTP {status}')
+
+        if not rate_headers:
+            return 0.0
+
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining is not None and reset and str(remaining).strip() == '0':
+            try:
+                return self.block(url, float(reset) - time.time(), 'X-RateLimit-Reset')
+            except ValueError:
+                pass
+
+        return 0.0
+
+    def backoff(self, url, attempt, base=2.0):
+        """Rate-limited without usable headers: exponential pause shared by all callers"""
+        return self.block(url, base * (2 ** attempt), 'backoff')
+
+    def get_stats(self):
+        with self.lock:
+            return {host: dict(values) for host, values in self.stats.items()}
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor():
+    """Process-wide RateGovernor"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = RateGovernor()
+        return _governor
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Refresh Cadence - Activity-adaptive scrape intervals
+Fingerprint of key profile fields + Exponential backoff while unchanged + Reset on change
+
+Each (student, platform) pair learns its own interval between a floor and a
+ceiling. If a scrape returns the same key numbers as last time the interval
+is multiplied by CADENCE_BACKOFF_FACTOR (up to the ceiling); as soon as
+anything changes it drops back to the floor.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# (floor, ceiling) in hours per platform.
+# Override with CADENCE_<PLATFORM>="floor/ceiling", e.g. CADENCE_LEETCODE="1.5/12"
+CADENCE_BOUNDS = {
+    'leetcode': (1.5, 24),
+    'codechef': (1.5, 24),
+    'codeforces': (1.5, 24),
+    'github': (1.5, 12),
+    'codolio': (4, 48),
+}
+FALLBACK_BOUNDS = (1.5, 24)
+
+CADENCE_BACKOFF_FACTOR = float(os.getenv('CADENCE_BACKOFF_FACTOR', '2'))
+
+# Fields whose change means the student was active on the platform
+FINGERPRINT_FIELDS = {
+    'leetcode': ['totalSolved', 'easySolved', 'mediumSolved', 'hardSolved',
+                 'rating', 'contestsAttended', 'totalSubmissions'],
+    'codechef': ['rating', 'maxRating', 'totalSolved', 'problemsSolved',
+                 'contestsAttended', 'totalSubmissions'],
+    'codeforces': ['rating', 'maxRating', 'totalSolved', 'contestsAttended', 'totalSubmissions'],
+    'github': ['totalContributions', 'totalCommits', 'publicRepos', 'totalRepos',
+               'followers', 'totalStars'],
+    'codolio': ['totalActiveDays', 'totalContests', 'totalSubmissions'],
+}
+
+
+def get_cadence_bounds(platform, floor=None):
+    """(floor, ceiling) hours for a platform; an explicit floor wins over the default"""
+    default = CADENCE_BOUNDS.get(platform, FALLBACK_BOUNDS)
+    value = os.getenv(f'CADENCE_{platform.upper()}')
+    if value:
+        try:
+            low, _, high = value.partition('/')
+            default = (float(low), float(high or default[1]))
+        except ValueError:
+            logger.warning(f"Invalid CADENCE_{platform.upper()}={value!r}, using {default}")
+    low, high = default
+    if floor is not None:
+        low = floor
+    return low, max(low, high)
+
+
+def fingerprint(platform, data):
+    """Stable hash of the fields that signal activity (None when there is nothing to compare)"""
+    if not data:
+        return None
+    fields = FINGERPRINT_FIELDS.get(platform)
+    if fields:
+        snapshot = {field: data.get(field) for field in fields}
+    else:
+        snapshot = {k: v for k, v in data.items() if k not in ('lastUpdated', 'updatedAt')}
+    payload = json.dumps(snapshot, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class AdaptiveCadence:
+    """Learns the next refresh interval for a (student, platform) pair from its change history"""
+
+    def __init__(self, floors=None, factor=CADENCE_BACKOFF_FACTOR):
+        self.floors = dict(floors or {})
+        self.factor = max(1.0, float(factor))
+        self.stats = {'changed': 0, 'unchanged': 0}
+
+    def bounds(self, platform):
+        return get_cadence_bounds(platform, self.floors.get(platform))
+
+    def next_interval(self, platform, data, previous_fingerprint=None, previous_interval=None):
+        """
+        Returns (interval_hours, fingerprint, changed) for a successful scrape.
+        First observations and changed profiles go back to the floor.
+        """
+        floor, ceiling = self.bounds(platform)
+        current = fingerprint(platform, data)
+
+        changed = previous_fingerprint is None or current != previous_fingerprint
+        if changed:
+            interval = floor
+            self.stats['changed'] += 1
+        else:
+            interval = min(ceiling, max(floor, (previous_interval or floor) * self.factor))
+            self.stats['unchanged'] += 1
+
+        return interval, current, changed
+
+    def get_stats(self):
+        return dict(self.stats)
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Refresh Coalescer - One scrape per profile no matter how many ask for it
+Shared in-flight scrapes + Freshness window + Cross-process leases + Hit/join/miss counters
+
+Repeated refresh clicks, or a staff refresh landing while the scheduler is
+scraping the same profile, used to start duplicate scrapes (a Chrome session
+each for CodeChef and Codolio). Scrapes now go through the coalescer, keyed
+by (platform, username):
+
+    data = get_refresh_coalescer().run('codechef', username, lambda: scrape_codechef_user(url))
+
+- miss: nobody is scraping the profile and there is no fresh result; scrape() runs
+- join: a scrape of the profile is already running; wait for it and share its result
+- hit:  a result finished less than REFRESH_FRESHNESS_SECONDS ago; return it
+
+Within one process (the scraper daemon, the production scheduler) joins are
+immediate. Once configure_refresh_coalescer() gives it a collection, the
+coalescer also takes a lease per profile there, so the daemon and the
+scheduler see each other's in-flight scrapes and fresh results. Waiting on
+another process's scrape gives up (TimeoutError) REFRESH_JOIN_MARGIN_SECONDS
+before the platform's refresh budget (scraper_daemon.REFRESH_TIMEOUTS) runs
+out, so the caller reports a failure instead of timing out on the client.
+"""
+
+import copy
+import logging
+import os
+import threading
+import time
+import uuid
+
+from pymongo.errors import DuplicateKeyError
+
+from scraper_daemon import DEFAULT_REFRESH_TIMEOUT, REFRESH_TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+# A successful scrape younger than this is reused instead of scraping again
+REFRESH_FRESHNESS_SECONDS = float(os.getenv('REFRESH_FRESHNESS_SECONDS', '60'))
+
+# A lease older than this is treated as abandoned (the longest refresh budget is CodeChef's 180s)
+REFRESH_LEASE_SECONDS = float(os.getenv('REFRESH_LEASE_SECONDS', '240'))
+
+# How often a process waiting on another process's scrape checks for its result
+REFRESH_JOIN_POLL_SECONDS = float(os.getenv('REFRESH_JOIN_POLL_SECONDS', '1'))
+
+# Joining another process's scrape gives up this long before the caller's refresh budget runs out
+REFRESH_JOIN_MARGIN_SECONDS = float(os.getenv('REFRESH_JOIN_MARGIN_SECONDS', '15'))
+
+
+def join_wait_seconds(platform):
+    """Longest wait on another process's scrape that still fits the platform's refresh budget"""
+    budget = REFRESH_TIMEOUTS.get(platform, DEFAULT_REFRESH_TIMEOUT)
+    return max(REFRESH_JOIN_POLL_SECONDS, budget - REFRESH_JOIN_MARGIN_SECONDS)
+
+
+def is_usable(data):
+    """Scraper results worth sharing: not empty and not an error payload"""
+    return bool(data) and not (isinstance(data, dict) and data.get('error'))
+
+
+class _Flight:
+    """A scrape in progress in this process"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RefreshCoalescer:
+    """(platform, username) -> in-flight scrape / recent result. collection=None keeps everything in memory"""
+
+    def __init__(self, collection=None, freshness_seconds=REFRESH_FRESHNESS_SECONDS,
+                 lease_seconds=REFRESH_LEASE_SECONDS):
+        self.collection = collection
+        self.freshness_seconds = freshness_seconds
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        self.inflight = {}
+        self.recent = {}
+        self.join_deadlines = {}
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'joins': 0, 'misses': 0, 'join_timeouts': 0}
+        if collection is not None:
+            try:
+                collection.create_index('key', unique=True)
+            except Exception as e:
+                logger.warning(f"Could not ensure refresh_coalescer index: {e}")
+
+    @staticmethod
+    def _key(platform, username):
+        return f"{platform}:{str(username).strip().lower()}"
+
+    def _record(self, outcome):
+        with self.lock:
+            self.stats[outcome] += 1
+
+    def _fresh(self, key, now):
+        """Recent result from this process, or None"""
+        entry = self.recent.get(key)
+        if entry and now - entry[0] < self.freshness_seconds:
+            return entry[1]
+        self.recent.pop(key, None)
+        return None
+
+    def run(self, platform, username, scrape):
+        """scrape()'s result, shared with concurrent callers and reused within the freshness window"""
+        if not username:
+            return scrape()
+        key = self._key(platform, username)
+        with self.lock:
+            fresh = self._fresh(key, time.time())
+            if fresh is not None:
+                self.stats['hits'] += 1
+                return copy.deepcopy(fresh)
+            flight = self.inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self.inflight[key] = flight
+            else:
+                self.stats['joins'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = self._lead(key, platform, username, scrape)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+            flight.done.set()
+        return copy.deepcopy(flight.result)
+
+    def _lead(self, key, platform, username, scrape):
+        """Run (or, across processes, join) the scrape for a key this process is leading"""
+        state, data = self._claim(key)
+        if state == 'fresh':
+            self._record('hits')
+            self._remember(key, data)
+            return data
+        if state == 'running':
+            data, timed_out = self._wait_shared(key, self._join_deadline(key, platform))
+            if timed_out:
+                self._record('join_timeouts')
+                raise TimeoutError(f"{platform}/{username} is still being scraped by another process")
+            with self.lock:
+                self.join_deadlines.pop(key, None)
+            if data is not None:
+                self._record('joins')
+                self._remember(key, data)
+                return data
+            logger.info(f"[Coalescer] Lease on {platform}/{username} lapsed, scraping here")
+
+        self._record('misses')
+        data = None
+        try:
+            data = scrape()
+        finally:
+            if is_usable(data):
+                self._remember(key, data)
+                self._publish(key, data)
+            else:
+                self._release(key)
+        return data
+
+    def remember(self, platform, username, data):
+        """Record a result scraped outside run() (e.g. a grouped batch) as fresh"""
+        if username and is_usable(data):
+            key = self._key(platform, username)
+            self._remember(key, data)
+            self._publish(key, data)
+
+    def _remember(self, key, data):
+        with self.lock:
+            self.recent[key] = (time.time(), copy.deepcopy(data))
+
+    # ------------------------------------------------------------------
+    # Shared leases (MongoDB)
+    # ------------------------------------------------------------------
+
+    def _claim(self, key):
+        """('fresh', data) / ('running', None) / ('claimed', None)"""
+        if self.collection is None:
+            return 'claimed', None
+        now = time.time()
+        try:
+            doc = self.collection.find_one({'key': key}, {'_id': 0})
+            if doc and doc.get('status') == 'done' and now - doc.get('finishedAt', 0) < self.freshness_seconds:
+                return 'fresh', doc.get('data')
+            if doc and doc.get('status') == 'running' and now - doc.get('startedAt', 0) < self.lease_seconds:
+                return 'running', None
+            # Take over a finished or abandoned entry, or create it; a concurrent
+            # claim fails the upsert on the unique key
+            self.collection.update_one(
+                {'key': key, '$or': [{'status': 'done'}, {'startedAt': {'$lt': now - self.lease_seconds}}]},
+                {'$set': {'status': 'running', 'owner': self.owner, 'startedAt': now}},
+                upsert=True
+            )
+            return 'claimed', None
+        except DuplicateKeyError:
+            return 'running', None
+        except Exception as e:
+            logger.error(f"[Coalescer] Failed to claim {key}: {e}")
+            return 'claimed', None
+
+    def _join_deadline(self, key, platform):
+        """
+        When waiting on another process's scrape of `key` gives up. A retry of a
+        refresh that just gave up (refresh_codechef.py tries twice) reuses the
+        same deadline instead of waiting a whole budget again.
+        """
+        now = time.time()
+        with self.lock:
+            deadline = self.join_deadlines.get(key)
+            if deadline is None or now > deadline + REFRESH_JOIN_MARGIN_SECONDS:
+                deadline = now + join_wait_seconds(platform)
+                self.join_deadlines[key] = deadline
+            return deadline
+
+    def _wait_shared(self, key, deadline):
+        """
+        (data, timed_out): data from another process's scrape, None if it failed
+        or its lease lapsed, or timed_out when it is still running at `deadline`.
+        """
+        while time.time() < deadline:
+            time.sleep(min(REFRESH_JOIN_POLL_SECONDS, max(0.0, deadline - time.time())))
+            try:
+                doc = self.collection.find_one({'key': key}, {'_id': 0})
+            except Exception as e:
+                logger.error(f"[Coalescer] Failed to read {key}: {e}")
+                return None, False
+            if not doc:
+                return None, False
+            if doc.get('status') == 'done':
+                return doc.get('data'), False
+            if time.time() - doc.get('startedAt', 0) >= self.lease_seconds:
+                return None, False
+        return None, True
+
+    def _publish(self, key, data):
+        if self.collection is None:
+            return
+        try:
+            self.collection.update_one(
+                {'key': key},
+                {'$set': {'status': 'done', 'owner': self.owner, 'finishedAt': time.time(), 'data': data}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"[Coalescer] Failed to publish {key}: {e}")
+
+    def _release(self, key):
+        """Drop our lease after a failed scrape so waiters scrape for themselves"""
+        if self.collection is None:
+            return
+        try:
+            self.collection.delete_one({'key': key, 'owner': self.owner, 'status': 'running'})
+        except Exception as e:
+            logger.error(f"[Coalescer] Failed to release {key}: {e}")
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats['inflight'] = len(self.inflight)
+        total = stats['hits'] + stats['joins'] + stats['misses']
+        stats['saved_rate'] = round((stats['hits'] + stats['joins']) / total * 100, 1) if total else 0.0
+        return stats
+
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+
+def configure_refresh_coalescer(collection):
+    """Share leases and fresh results through a MongoDB collection (call once at startup)"""
+    global _coalescer
+    with _coalescer_lock:
+        _coalescer = RefreshCoalescer(collection)
+        return _coalescer
+
+
+def get_refresh_coalescer():
+    """Process-wide RefreshCoalescer (in-memory until configured)"""
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = RefreshCoalescer()
+        return _coalescer
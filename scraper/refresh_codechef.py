@@ -14,10 +14,16 @@ from bson import ObjectId
 import logging
 
 # Set UTF-8 encoding for Windows console
-if sys.platform == 'win32':
+if sys.platform == 'win32' and __name__ == '__main__':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
+# Hand the refresh to the resident scraper daemon when one is listening; the
+# scraper imports, Mongo connection and Chrome below are then never paid for here
+if __name__ == '__main__':
+    from scraper_daemon import refresh_via_daemon_cli
+    refresh_via_daemon_cli('codechef')
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,6 +34,10 @@ logger = logging.getLogger(__name__)
 # Add the scraper directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from codechef_scraper import scrape_codechef_user
+from refresh_jobs import report_progress
+from refresh_coalescer import get_refresh_coalescer
+from batch_refresh import update_student
+from scraper_daemon import RefreshFailed
 
 # MongoDB connection
 MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/go-tracker')
@@ -50,8 +60,14 @@ def extract_username_from_url(url_or_username):
     
     return None
 
-def refresh_student_platform(student_id, username=None):
-    """Refresh CodeChef data for a student by MongoDB _id"""
+def refresh_student_platform(student_id, username=None, db=None, writes=None):
+    """
+    Refresh CodeChef data for a student by MongoDB _id.
+    db: an open go-tracker database to reuse (the scraper daemon's); a new
+    connection is opened and closed otherwise. writes: a dict collecting the
+    student's update for a batch refresh's bulk write instead of writing it here.
+    Returns the scraped data on success.
+    """
     client = None
     try:
         # Connect to MongoDB
@@ -59,8 +75,9 @@ def refresh_student_platform(student_id, username=None):
         logger.info(f"Connecting to MongoDB: {mongodb_uri.split('@')[-1] if '@' in mongodb_uri else mongodb_uri}")
         
         try:
-            client = MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000)
-            db = client['go-tracker']
+            if db is None:
+                client = MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000)
+                db = client['go-tracker']
             students_collection = db['students']
         except Exception as conn_error:
             error_msg = f"Failed to connect to MongoDB: {str(conn_error)}"
@@ -149,7 +166,9 @@ def refresh_student_platform(student_id, username=None):
         for attempt in range(max_retries):
             try:
                 logger.info(f"Scraping attempt {attempt + 1}/{max_retries}")
-                codechef_data = scrape_codechef_user(codechef_url, include_contest_history=True)
+                report_progress('fetching', platform='codechef', username=username)
+                codechef_data = get_refresh_coalescer().run(
+                    'codechef', username, lambda: scrape_codechef_user(codechef_url, include_contest_history=True))
                 
                 if codechef_data:
                     logger.info(f"✅ Scraping succeeded on attempt {attempt + 1}")
@@ -210,9 +229,7 @@ def refresh_student_platform(student_id, username=None):
             sys.stderr.flush()
             
             # Print structured error JSON for backend to capture
-            print(f"\n📦 ERROR_JSON_START")
-            sys.stdout.flush()
-            print(json.dumps({
+            error_details = {
                 'success': False,
                 'platform': 'codechef',
                 'status': 'failed',
@@ -223,7 +240,10 @@ def refresh_student_platform(student_id, username=None):
                 'studentId': student_id,
                 'timestamp': datetime.utcnow().isoformat(),
                 'details': codechef_data
-            }, default=str))
+            }
+            print(f"\n📦 ERROR_JSON_START")
+            sys.stdout.flush()
+            print(json.dumps(error_details, default=str))
             sys.stdout.flush()
             print(f"📦 ERROR_JSON_END\n")
             sys.stdout.flush()
@@ -231,7 +251,8 @@ def refresh_student_platform(student_id, username=None):
             logger.error(f"Scraping failed with error: {error_type} - {error_message}")
             if client:
                 client.close()
-            return False
+            # Raised rather than returning False so the daemon can pass the payload on
+            raise RefreshFailed(f"CodeChef scraping failed: {error_message}", error_details)
         
         # Log scraped data summary
         logger.info(f"Scraped data summary: Rating={codechef_data.get('rating', 0)}, "
@@ -241,6 +262,7 @@ def refresh_student_platform(student_id, username=None):
         
         # Build comprehensive update data
         try:
+            report_progress('parsing')
             update_data = {
                 'platforms.codechef.rating': codechef_data.get('rating', 0),
                 'platforms.codechef.maxRating': codechef_data.get('maxRating', 0),
@@ -280,11 +302,13 @@ def refresh_student_platform(student_id, username=None):
             logger.info(f"Preparing to update MongoDB with {len(update_data)} fields")
             
             # Update student in MongoDB (with upsert to create if doesn't exist)
-            result = students_collection.update_one(
+            result = update_student(
+                students_collection, writes,
                 {'_id': ObjectId(student_id)},
                 {'$set': update_data},
                 upsert=True  # Creates document if it doesn't exist
             )
+            report_progress('written', matched=result.matched_count, modified=result.modified_count)
             
             if result.modified_count > 0 or result.matched_count > 0:
                 success_msg = f"✅ Successfully updated CodeChef data for {username}"
@@ -316,7 +340,7 @@ def refresh_student_platform(student_id, username=None):
                 logger.info(success_msg)
                 if client:
                     client.close()
-                return True
+                return codechef_data
             else:
                 warning_msg = f"⚠️  No changes made (data might be the same)"
                 print(warning_msg)
@@ -342,6 +366,8 @@ def refresh_student_platform(student_id, username=None):
         if client:
             client.close()
         return False
+    except RefreshFailed:
+        raise
     except Exception as e:
         error_msg = f"Unexpected error in refresh_student_platform: {str(e)}"
         print(f"❌ ERROR: {error_msg}", file=sys.stderr)
@@ -366,5 +392,8 @@ if __name__ == '__main__':
     student_id = sys.argv[1]
     username = sys.argv[2] if len(sys.argv) > 2 else None
     
-    success = refresh_student_platform(student_id, username)
+    try:
+        success = refresh_student_platform(student_id, username)
+    except RefreshFailed:
+        success = False  # ERROR_JSON already printed
     sys.exit(0 if success else 1)
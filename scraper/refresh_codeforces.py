@@ -13,10 +13,16 @@ from bson import ObjectId
 import logging
 
 # Set UTF-8 encoding for Windows console
-if sys.platform == 'win32':
+if sys.platform == 'win32' and __name__ == '__main__':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
+# Hand the refresh to the resident scraper daemon when one is listening; the
+# scraper imports, Mongo connection and Chrome below are then never paid for here
+if __name__ == '__main__':
+    from scraper_daemon import refresh_via_daemon_cli
+    refresh_via_daemon_cli('codeforces')
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +33,9 @@ logger = logging.getLogger(__name__)
 # Add the scraper directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from codeforces_scraper import scrape_codeforces_user
+from refresh_jobs import report_progress
+from refresh_coalescer import get_refresh_coalescer
+from batch_refresh import update_student
 
 # MongoDB connection
 MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/go-tracker')
@@ -48,12 +57,20 @@ def extract_username_from_url(url_or_username):
     
     return None
 
-def refresh_student_platform(student_id, username=None):
-    """Refresh Codeforces data for a student by MongoDB _id"""
+def refresh_student_platform(student_id, username=None, db=None, writes=None):
+    """
+    Refresh Codeforces data for a student by MongoDB _id.
+    db: an open go-tracker database to reuse (the scraper daemon's); a new
+    connection is opened and closed otherwise. writes: a dict collecting the
+    student's update for a batch refresh's bulk write instead of writing it here.
+    Returns the scraped data on success.
+    """
     try:
         # Connect to MongoDB
-        client = MongoClient(MONGO_URI)
-        db = client['go-tracker']
+        client = None
+        if db is None:
+            client = MongoClient(MONGO_URI)
+            db = client['go-tracker']
         students_collection = db['students']
         
         # Find student by _id
@@ -62,13 +79,15 @@ def refresh_student_platform(student_id, username=None):
         except Exception as e:
             print(f"❌ ERROR: Invalid student ID format: {student_id}")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
         
         if not student:
             print(f"❌ ERROR: Student with ID {student_id} not found")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
         
         # Extract username if not provided
@@ -85,7 +104,8 @@ def refresh_student_platform(student_id, username=None):
         if not username:
             print(f"❌ ERROR: Codeforces username not found for student {student.get('name', 'Unknown')}")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
         
         print(f"📊 Scraping Codeforces for username: {username}")
@@ -94,12 +114,15 @@ def refresh_student_platform(student_id, username=None):
         sys.stdout.flush()
         
         # Scrape Codeforces data with contest history
-        codeforces_data = scrape_codeforces_user(username, include_contest_history=True)
+        report_progress('fetching', platform='codeforces', username=username)
+        codeforces_data = get_refresh_coalescer().run(
+            'codeforces', username, lambda: scrape_codeforces_user(username, include_contest_history=True))
         
         if not codeforces_data:
             print(f"❌ ERROR: Failed to scrape Codeforces data for {username}")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
         
         # Prepare update data matching the MongoDB schema
@@ -115,6 +138,7 @@ def refresh_student_platform(student_id, username=None):
         submission_heatmap = codeforces_data.get('submissionHeatmap', [])
         submission_stats = codeforces_data.get('submissionStats', {})
         
+        report_progress('parsing')
         update_data = {
             'platforms.codeforces.username': username,
             'platforms.codeforces.rating': codeforces_data.get('rating', 0),
@@ -150,11 +174,13 @@ def refresh_student_platform(student_id, username=None):
         }
         
         # Update student in MongoDB with upsert to ensure document exists
-        result = students_collection.update_one(
+        result = update_student(
+            students_collection, writes,
             {'_id': ObjectId(student_id)},
             {'$set': update_data},
             upsert=False
         )
+        report_progress('written', matched=result.matched_count, modified=result.modified_count)
         
         if result.modified_count > 0 or result.matched_count > 0:
             print(f"✅ Successfully updated Codeforces data")
@@ -169,12 +195,14 @@ def refresh_student_platform(student_id, username=None):
             sys.stdout.flush()
             print(f"   📜 Contest History: {len(contest_history)}")
             sys.stdout.flush()
-            client.close()
-            return True
+            if client:
+                client.close()
+            return codeforces_data
         else:
             print(f"⚠️  No changes made (data might be the same)")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
             
     except Exception as e:
@@ -13,10 +13,16 @@ from bson import ObjectId
 import logging
 
 # Set UTF-8 encoding for Windows console
-if sys.platform == 'win32':
+if sys.platform == 'win32' and __name__ == '__main__':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
+# Hand the refresh to the resident scraper daemon when one is listening; the
+# scraper imports, Mongo connection and Chrome below are then never paid for here
+if __name__ == '__main__':
+    from scraper_daemon import refresh_via_daemon_cli
+    refresh_via_daemon_cli('codolio')
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +33,9 @@ logger = logging.getLogger(__name__)
 # Add the scraper directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from codolio_scraper import scrape_codolio_user
+from refresh_jobs import report_progress
+from refresh_coalescer import get_refresh_coalescer
+from batch_refresh import update_student
 
 # MongoDB connection
 MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/go-tracker')
@@ -48,12 +57,20 @@ def extract_username_from_url(url_or_username):
     
     return None
 
-def refresh_student_platform(student_id, username=None):
-    """Refresh Codolio data for a student by MongoDB _id"""
+def refresh_student_platform(student_id, username=None, db=None, writes=None):
+    """
+    Refresh Codolio data for a student by MongoDB _id.
+    db: an open go-tracker database to reuse (the scraper daemon's); a new
+    connection is opened and closed otherwise. writes: a dict collecting the
+    student's update for a batch refresh's bulk write instead of writing it here.
+    Returns the scraped data on success.
+    """
     try:
         # Connect to MongoDB
-        client = MongoClient(MONGO_URI)
-        db = client['go-tracker']
+        client = None
+        if db is None:
+            client = MongoClient(MONGO_URI)
+            db = client['go-tracker']
         students_collection = db['students']
         
         # Find student by _id
@@ -62,13 +79,15 @@ def refresh_student_platform(student_id, username=None):
         except Exception as e:
             print(f"❌ ERROR: Invalid student ID format: {student_id}")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
         
         if not student:
             print(f"❌ ERROR: Student with ID {student_id} not found")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
         
         # Extract username if not provided
@@ -85,7 +104,8 @@ def refresh_student_platform(student_id, username=None):
         if not username:
             print(f"❌ ERROR: Codolio username not found for student {student.get('name', 'Unknown')}")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
         
         print(f"📊 Scraping Codolio for username: {username}")
@@ -94,15 +114,19 @@ def refresh_student_platform(student_id, username=None):
         sys.stdout.flush()
         
         # Scrape Codolio data
-        codolio_data = scrape_codolio_user(username)
+        report_progress('fetching', platform='codolio', username=username)
+        codolio_data = get_refresh_coalescer().run(
+            'codolio', username, lambda: scrape_codolio_user(username))
         
         if not codolio_data:
             print(f"❌ ERROR: Failed to scrape Codolio data for {username}")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
         
         # Prepare update data matching the MongoDB schema
+        report_progress('parsing')
         update_data = {
             'platforms.codolio': {
                 'username': username,
@@ -123,10 +147,12 @@ def refresh_student_platform(student_id, username=None):
         update_data['platformUsernames.codolio'] = username
         
         # Update student in MongoDB
-        result = students_collection.update_one(
+        result = update_student(
+            students_collection, writes,
             {'_id': ObjectId(student_id)},
             {'$set': update_data}
         )
+        report_progress('written', matched=result.matched_count, modified=result.modified_count)
         
         if result.modified_count > 0 or result.matched_count > 0:
             print(f"✅ Successfully updated Codolio data")
@@ -137,12 +163,14 @@ def refresh_student_platform(student_id, username=None):
             sys.stdout.flush()
             print(f"   🔥 Current Streak: {codolio_data.get('currentStreak', 0)} days")
             sys.stdout.flush()
-            client.close()
-            return True
+            if client:
+                client.close()
+            return codolio_data
         else:
             print(f"⚠️  No changes made (data might be the same)")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
             
     except Exception as e:
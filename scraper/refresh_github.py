@@ -13,10 +13,16 @@ from bson import ObjectId
 import logging
 
 # Set UTF-8 encoding for Windows console
-if sys.platform == 'win32':
+if sys.platform == 'win32' and __name__ == '__main__':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
+# Hand the refresh to the resident scraper daemon when one is listening; the
+# scraper imports, Mongo connection and Chrome below are then never paid for here
+if __name__ == '__main__':
+    from scraper_daemon import refresh_via_daemon_cli
+    refresh_via_daemon_cli('github')
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +33,9 @@ logger = logging.getLogger(__name__)
 # Add the scraper directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from github_scraper import scrape_github_user
+from refresh_jobs import report_progress
+from refresh_coalescer import get_refresh_coalescer
+from batch_refresh import update_student
 
 # MongoDB connection
 MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/go-tracker')
@@ -72,8 +81,14 @@ def extract_username_from_url(url_or_username):
     
     return None
 
-def refresh_student_platform(student_id, username=None):
-    """Refresh GitHub data for a student by MongoDB _id"""
+def refresh_student_platform(student_id, username=None, db=None, writes=None):
+    """
+    Refresh GitHub data for a student by MongoDB _id.
+    db: an open go-tracker database to reuse (the scraper daemon's); a new
+    connection is opened and closed otherwise. writes: a dict collecting the
+    student's update for a batch refresh's bulk write instead of writing it here.
+    Returns the scraped data on success.
+    """
     # #region agent log
     debug_log('refresh_github.py:51', 'Function called', {'student_id': student_id, 'username': username}, 'A')
     # #endregion
@@ -83,8 +98,9 @@ def refresh_student_platform(student_id, username=None):
         # #region agent log
         debug_log('refresh_github.py:56', 'MongoDB connection attempt', {'mongo_uri': MONGO_URI[:50] + '...' if len(MONGO_URI) > 50 else MONGO_URI}, 'A')
         # #endregion
-        client = MongoClient(MONGO_URI)
-        db = client['go-tracker']
+        if db is None:
+            client = MongoClient(MONGO_URI)
+            db = client['go-tracker']
         students_collection = db['students']
         
         # Find student by _id
@@ -140,7 +156,9 @@ def refresh_student_platform(student_id, username=None):
         # #region agent log
         debug_log('refresh_github.py:97', 'GitHub scraping starting', {'username': username}, 'E')
         # #endregion
-        github_data = scrape_github_user(username)
+        report_progress('fetching', platform='github', username=username)
+        github_data = get_refresh_coalescer().run(
+            'github', username, lambda: scrape_github_user(username))
         # #region agent log
         debug_log('refresh_github.py:98', 'GitHub scraping result', {'username': username, 'data_received': bool(github_data)}, 'E')
         # #endregion
@@ -166,6 +184,7 @@ def refresh_student_platform(student_id, username=None):
         # Use field-level updates to preserve existing detailed data
         # Update ALL fields that the scraper returns
         # Preserve pinnedRepositories, contributionCalendar if they exist
+        report_progress('parsing')
         update_data = {
             'platforms.github.username': username,
             'platforms.github.name': github_data.get('name', ''),
@@ -205,10 +224,12 @@ def refresh_student_platform(student_id, username=None):
         # #region agent log
         debug_log('refresh_github.py:145', 'Database update starting', {'student_id': student_id}, 'G')
         # #endregion
-        result = students_collection.update_one(
+        result = update_student(
+            students_collection, writes,
             {'_id': ObjectId(student_id)},
             {'$set': update_data}
         )
+        report_progress('written', matched=result.matched_count, modified=result.modified_count)
         # #region agent log
         debug_log('refresh_github.py:149', 'Database update result', {'student_id': student_id, 'modified_count': result.modified_count, 'matched_count': result.matched_count}, 'G')
         # #endregion
@@ -236,7 +257,7 @@ def refresh_student_platform(student_id, username=None):
                 langs = ', '.join(list(github_data.get('topLanguages', {}).keys())[:3])
                 print(f"   💻 Top Languages: {langs}")
                 sys.stdout.flush()
-            return True
+            return github_data
         else:
             print(f"⚠️  No changes made (data might be the same)")
             sys.stdout.flush()
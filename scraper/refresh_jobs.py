@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Refresh Jobs - Asynchronous refreshes with job IDs and progress events
+Submit returns at once + queued/fetching/parsing/written events + Results kept for a TTL
+
+Instead of holding an HTTP request open while a scrape runs (up to 3 minutes
+for CodeChef, much longer for a full run), the caller submits a job, gets
+its id back immediately and follows its events:
+
+    job = get_job_manager().submit('refresh', 'codechef', run, studentId=...)
+    for event in job.events_since(0, wait=30): ...
+
+Code running inside a job reports stages with report_progress('fetching'),
+which is a no-op outside of jobs, so the refresh scripts call it
+unconditionally. Finished jobs are kept for REFRESH_JOB_TTL_SECONDS so a
+client that reconnects can still read the result.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+REFRESH_JOB_WORKERS = int(os.getenv('REFRESH_JOB_WORKERS', '8'))
+REFRESH_JOB_TTL_SECONDS = int(os.getenv('REFRESH_JOB_TTL_SECONDS', '600'))
+
+TERMINAL_STATUSES = ('succeeded', 'failed')
+
+_current = threading.local()
+
+
+def current_job():
+    """The RefreshJob running in this thread, or None"""
+    return getattr(_current, 'job', None)
+
+
+def report_progress(event, **details):
+    """Publish a progress event on the job running in this thread (no-op outside jobs)"""
+    job = current_job()
+    if job is not None:
+        job.publish(event, **details)
+
+
+class RefreshJob:
+    """One submitted job: status, ordered events and the final result"""
+
+    def __init__(self, kind, platform=None, **params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.platform = platform
+        self.params = params
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.events = []
+        self.changed = threading.Condition()
+        self.publish('queued')
+
+    def _append(self, event, **details):
+        """Add an event and wake the streams (caller holds the condition)"""
+        self.events.append({'event': event, 'at': datetime.utcnow().isoformat(), **details})
+        self.changed.notify_all()
+
+    def publish(self, event, **details):
+        with self.changed:
+            self._append(event, **details)
+
+    def finish(self, result=None, error=None):
+        with self.changed:
+            self.result = result
+            self.error = error
+            succeeded = error is None and isinstance(result, dict) and result.get('success', True)
+            self.status = 'succeeded' if succeeded else 'failed'
+            self.finished = time.time()
+            # Same block as the status change, so a stream that sees done() also sees this event
+            self._append(self.status, result=result, error=error)
+
+    def done(self):
+        return self.status in TERMINAL_STATUSES
+
+    def events_since(self, index, wait=0):
+        """Events after the first `index`, blocking up to `wait` seconds for new ones"""
+        with self.changed:
+            if len(self.events) <= index and not self.done() and wait:
+                self.changed.wait(wait)
+            return list(self.events[index:])
+
+    def snapshot(self):
+        with self.changed:
+            return {
+                'jobId': self.id,
+                'kind': self.kind,
+                'platform': self.platform,
+                'params': self.params,
+                'status': self.status,
+                'result': self.result,
+                'error': self.error,
+                'events': list(self.events),
+                'createdAt': datetime.utcfromtimestamp(self.created).isoformat(),
+            }
+
+
+class JobManager:
+    """Bounded worker pool running RefreshJobs, with TTL cleanup of finished ones"""
+
+    def __init__(self, workers=REFRESH_JOB_WORKERS, ttl_seconds=REFRESH_JOB_TTL_SECONDS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='refresh-job')
+        self.ttl_seconds = ttl_seconds
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def _run(self, job, func):
+        _current.job = job
+        with job.changed:
+            job.status = 'running'
+        job.publish('started')
+        try:
+            job.finish(result=func())
+        except Exception as e:
+            logger.exception(f"[Jobs] {job.kind} job {job.id} failed")
+            job.finish(error=str(e))
+        finally:
+            _current.job = None
+
+    def submit(self, kind, platform, func, **params):
+        """Queue func() (returning a result dict) and return its job right away"""
+        self.expire()
+        job = RefreshJob(kind, platform, **params)
+        with self.lock:
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, func)
+        return job
+
+    def submit_once(self, kind, platform, func, **params):
+        """
+        (job, created): the queued or running job of this kind/platform if there
+        is one, so repeated triggers join it instead of piling up; else a new job
+        """
+        self.expire()
+        with self.lock:
+            for job in self.jobs.values():
+                if job.kind == kind and job.platform == platform and not job.done():
+                    return job, False
+            job = RefreshJob(kind, platform, **params)
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, func)
+        return job, True
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def expire(self):
+        """Forget jobs that finished more than ttl_seconds ago"""
+        cutoff = time.time() - self.ttl_seconds
+        with self.lock:
+            for job_id in [j.id for j in self.jobs.values() if j.finished and j.finished < cutoff]:
+                del self.jobs[job_id]
+
+    def get_stats(self):
+        with self.lock:
+            jobs = list(self.jobs.values())
+        counts = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Process-wide JobManager"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
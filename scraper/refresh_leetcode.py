@@ -13,10 +13,16 @@ from bson import ObjectId
 import logging
 
 # Set UTF-8 encoding for Windows console
-if sys.platform == 'win32':
+if sys.platform == 'win32' and __name__ == '__main__':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
+# Hand the refresh to the resident scraper daemon when one is listening; the
+# scraper imports, Mongo connection and Chrome below are then never paid for here
+if __name__ == '__main__':
+    from scraper_daemon import refresh_via_daemon_cli
+    refresh_via_daemon_cli('leetcode')
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +33,9 @@ logger = logging.getLogger(__name__)
 # Add parent directory to path to import leetcode_scraper
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from leetcode_scraper import scrape_leetcode_user
+from refresh_jobs import report_progress
+from refresh_coalescer import get_refresh_coalescer
+from batch_refresh import update_student
 
 # MongoDB connection
 MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/go-tracker')
@@ -54,12 +63,20 @@ def extract_username_from_url(url_or_username):
     
     return None
 
-def refresh_student_platform(student_id, username=None):
-    """Refresh LeetCode data for a student by MongoDB _id"""
+def refresh_student_platform(student_id, username=None, db=None, writes=None):
+    """
+    Refresh LeetCode data for a student by MongoDB _id.
+    db: an open go-tracker database to reuse (the scraper daemon's); a new
+    connection is opened and closed otherwise. writes: a dict collecting the
+    student's update for a batch refresh's bulk write instead of writing it here.
+    Returns the scraped data on success.
+    """
     try:
         # Connect to MongoDB
-        client = MongoClient(MONGO_URI)
-        db = client['go-tracker']
+        client = None
+        if db is None:
+            client = MongoClient(MONGO_URI)
+            db = client['go-tracker']
         students_collection = db['students']
         
         # Find student by _id
@@ -68,13 +85,15 @@ def refresh_student_platform(student_id, username=None):
         except Exception as e:
             print(f"❌ ERROR: Invalid student ID format: {student_id}")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
         
         if not student:
             print(f"❌ ERROR: Student with ID {student_id} not found")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
         
         # Extract username if not provided
@@ -91,7 +110,8 @@ def refresh_student_platform(student_id, username=None):
         if not username:
             print(f"❌ ERROR: LeetCode username not found for student {student.get('name', 'Unknown')}")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
         
         # Get OLD data before scraping
@@ -118,12 +138,15 @@ def refresh_student_platform(student_id, username=None):
         sys.stdout.flush()
         
         # Scrape LeetCode data
-        leetcode_data = scrape_leetcode_user(username)
+        report_progress('fetching', platform='leetcode', username=username)
+        leetcode_data = get_refresh_coalescer().run(
+            'leetcode', username, lambda: scrape_leetcode_user(username))
         
         if not leetcode_data:
             print(f"❌ ERROR: Failed to scrape LeetCode data for {username}")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
         
         # Print SCRAPED data
@@ -153,6 +176,7 @@ def refresh_student_platform(student_id, username=None):
         # Prepare update data matching the MongoDB schema
         # Use field-level updates to preserve existing detailed data
         # LeetCode scraper DOES return contestHistory, so we can safely update it
+        report_progress('parsing')
         update_data = {
             'platforms.leetcode.username': leetcode_data.get('username', username),
             'platforms.leetcode.problemsSolved': leetcode_data.get('totalSolved', 0),
@@ -191,10 +215,12 @@ def refresh_student_platform(student_id, username=None):
         print(f"💾 Updating MongoDB...")
         sys.stdout.flush()
         
-        result = students_collection.update_one(
+        result = update_student(
+            students_collection, writes,
             {'_id': ObjectId(student_id)},
             {'$set': update_data}
         )
+        report_progress('written', matched=result.matched_count, modified=result.modified_count)
         
         if result.modified_count > 0 or result.matched_count > 0:
             # Fetch updated data from MongoDB to show what was saved
@@ -215,12 +241,14 @@ def refresh_student_platform(student_id, username=None):
             print(f"\n💾 MongoDB Status: Modified={result.modified_count}, Matched={result.matched_count}")
             print(f"{'=' * 60}\n")
             sys.stdout.flush()
-            client.close()
-            return True
+            if client:
+                client.close()
+            return leetcode_data
         else:
             print(f"\n⚠️  No changes made (data might be the same)")
             sys.stdout.flush()
-            client.close()
+            if client:
+                client.close()
             return False
             
     except Exception as e:
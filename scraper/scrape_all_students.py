@@ -5,6 +5,7 @@ import os
 from pymongo import MongoClient
 from dotenv import load_dotenv
 from platform_scrapers import PlatformScraper
+from refresh_jobs import report_progress
 from datetime import datetime
 import time
 
@@ -121,6 +122,64 @@ def scrape_student(student, scraper):
     
     return student, updated
 
+def scrape_all_students(students_collection):
+    """
+    Scrape every active student and write their platforms back.
+    Publishes a 'student' progress event per student when run as a refresh job.
+    Returns {total, updated, failed}
+    """
+    # Get all active students
+    students = list(students_collection.find({'isActive': True}))
+    print(f"📊 Found {len(students)} active students")
+    
+    # Initialize scraper
+    scraper = PlatformScraper(delay=SCRAPING_DELAY)
+    
+    # Statistics
+    total_students = len(students)
+    updated_count = 0
+    failed_count = 0
+    report_progress('fetching', total=total_students)
+    
+    print(f"\n🔄 Starting scraping process...")
+    print(f"⏱️  Delay between requests: {SCRAPING_DELAY} seconds")
+    print(f"{'='*60}\n")
+    
+    # Scrape each student
+    for index, student in enumerate(students, 1):
+        was_updated = False
+        try:
+            print(f"[{index}/{total_students}] Processing...")
+            updated_student, was_updated = scrape_student(student, scraper)
+            
+            if was_updated:
+                # Update in database
+                students_collection.update_one(
+                    {'_id': student['_id']},
+                    {'$set': {
+                        'platforms': updated_student['platforms'],
+                        'lastScrapedAt': updated_student['lastScrapedAt']
+                    }}
+                )
+                updated_count += 1
+                print(f"✅ Updated in database")
+            else:
+                print(f"⚠️  No data to update")
+            
+        except Exception as e:
+            print(f"❌ Error processing {student['name']}: {str(e)}")
+            failed_count += 1
+        report_progress('student', index=index, total=total_students,
+                        rollNumber=student.get('rollNumber'), updated=was_updated)
+        
+        # Progress indicator
+        if index < total_students:
+            print(f"\n⏳ Progress: {index}/{total_students} ({(index/total_students)*100:.1f}%)")
+            time.sleep(1)  # Small delay between students
+    
+    report_progress('written', updated=updated_count, failed=failed_count)
+    return {'total': total_students, 'updated': updated_count, 'failed': failed_count}
+
 def main():
     """Main scraping function"""
     print("\n" + "="*60)
@@ -136,57 +195,15 @@ def main():
         
         print("✅ Connected to MongoDB")
         
-        # Get all active students
-        students = list(students_collection.find({'isActive': True}))
-        print(f"📊 Found {len(students)} active students")
-        
-        # Initialize scraper
-        scraper = PlatformScraper(delay=SCRAPING_DELAY)
-        
-        # Statistics
-        total_students = len(students)
-        updated_count = 0
-        failed_count = 0
-        
-        print(f"\n🔄 Starting scraping process...")
-        print(f"⏱️  Delay between requests: {SCRAPING_DELAY} seconds")
-        print(f"{'='*60}\n")
-        
-        # Scrape each student
-        for index, student in enumerate(students, 1):
-            try:
-                print(f"[{index}/{total_students}] Processing...")
-                updated_student, was_updated = scrape_student(student, scraper)
-                
-                if was_updated:
-                    # Update in database
-                    students_collection.update_one(
-                        {'_id': student['_id']},
-                        {'$set': {
-                            'platforms': updated_student['platforms'],
-                            'lastScrapedAt': updated_student['lastScrapedAt']
-                        }}
-                    )
-                    updated_count += 1
-                    print(f"✅ Updated in database")
-                else:
-                    print(f"⚠️  No data to update")
-                
-            except Exception as e:
-                print(f"❌ Error processing {student['name']}: {str(e)}")
-                failed_count += 1
-            
-            # Progress indicator
-            if index < total_students:
-                print(f"\n⏳ Progress: {index}/{total_students} ({(index/total_students)*100:.1f}%)")
-                time.sleep(1)  # Small delay between students
+        totals = scrape_all_students(students_collection)
+        total_students = totals['total']
         
         # Final statistics
         print(f"\n{'='*60}")
         print("📊 SCRAPING COMPLETE!")
         print(f"{'='*60}")
-        print(f"✅ Successfully updated: {updated_count}/{total_students}")
-        print(f"❌ Failed: {failed_count}/{total_students}")
+        print(f"✅ Successfully updated: {totals['updated']}/{total_students}")
+        print(f"❌ Failed: {totals['failed']}/{total_students}")
         print(f"⏱️  Total time: ~{(total_students * SCRAPING_DELAY * 5) / 60:.1f} minutes")
         print(f"{'='*60}\n")
         
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Scraper Daemon - Resident refresh service for the backend
+Warm Mongo/HTTP/browser pools + Local JSON API + Thin-client fallback
+
+A "refresh" click used to start a fresh Python process: interpreter startup,
+selenium/bs4/pymongo imports, a new MongoClient and a new Chrome, then output
+parsing between SCRAPED_DATA_JSON markers. The daemon keeps all of that warm
+and serves refreshes over a local HTTP API:
+
+    POST /refresh/<platform>   {"studentId": "...", "username": "..."}
+      -> {"success": true, "platform": ..., "studentId": ..., "username": ...,
+          "data": {...scraped data...}, "error": null, "errorDetails": null, "durationMs": 1234}
+    GET  /health               pools, uptime, refresh, job and coalescer counters
+
+Long refreshes can run as jobs instead, so the caller isn't holding a
+request open for minutes:
+
+    POST /jobs/refresh/<platform>   same body -> 202 {"jobId": ..., "status": "queued"}
+    POST /jobs/scrape-all           full scrape of every active student -> 202
+                                    (the running sweep's jobId if one is in progress)
+    POST /jobs/refresh-batch/<platform>   {"studentIds": [...]} or {"batch": "A"}
+                                    -> 202, result has one entry per student
+    GET  /jobs/<id>                 status, events so far and the result
+    GET  /jobs/<id>/events          queued/started/fetching/parsing/written/... as
+                                    NDJSON, or SSE with Accept: text/event-stream
+
+The refresh_*.py scripts are thin clients: run as scripts they hand the
+refresh to the daemon when one is listening (printing the same output and
+JSON markers the backend already parses), and run the refresh in-process
+otherwise. Only the standard library is imported at module level so the
+client path stays cheap.
+
+Usage: python scraper_daemon.py    (SCRAPER_DAEMON_HOST / SCRAPER_DAEMON_PORT)
+"""
+
+import importlib
+import io
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+SCRAPER_DAEMON_HOST = os.getenv('SCRAPER_DAEMON_HOST', '127.0.0.1')
+SCRAPER_DAEMON_PORT = int(os.getenv('SCRAPER_DAEMON_PORT', '8765'))
+SCRAPER_DAEMON_URL = os.getenv('SCRAPER_DAEMON_URL', f'http://{SCRAPER_DAEMON_HOST}:{SCRAPER_DAEMON_PORT}')
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/go-tracker')
+
+# platform -> module providing refresh_student_platform(student_id, username=None, db=None)
+REFRESH_MODULES = {
+    'leetcode': 'refresh_leetcode',
+    'codechef': 'refresh_codechef',
+    'codeforces': 'refresh_codeforces',
+    'github': 'refresh_github',
+    'codolio': 'refresh_codolio',
+}
+
+# Client-side wait per refresh (same budgets the backend gives the scripts)
+REFRESH_TIMEOUTS = {'codechef': 180}
+DEFAULT_REFRESH_TIMEOUT = 90
+
+# How long an event stream waits for news before sending a keep-alive
+JOB_EVENT_WAIT_SECONDS = 15
+
+
+class RefreshFailed(RuntimeError):
+    """
+    Raised by refresh_student_platform() when the scraper reported a structured
+    failure. `details` is the ERROR_JSON payload (reason, message, lastUpdated, ...)
+    the backend shows; the daemon returns it as errorDetails.
+    """
+
+    def __init__(self, message, details):
+        super().__init__(message)
+        self.details = details
+
+
+class ScraperDaemon:
+    """Shared Mongo connection, refresh modules and per-platform concurrency limits"""
+
+    def __init__(self, mongo_uri=MONGO_URI):
+        from pymongo import MongoClient
+        from batch_engine import get_platform_concurrency
+        from browser_pool import get_browser_pool
+        from refresh_jobs import get_job_manager
+        from refresh_coalescer import configure_refresh_coalescer
+
+        self.client = MongoClient(mongo_uri)
+        self.db = self.client['go-tracker']
+        # Shared with the production scheduler, so a refresh joins its in-flight scrape
+        self.coalescer = configure_refresh_coalescer(self.db.refresh_coalescer)
+        self.modules = {platform: importlib.import_module(name) for platform, name in REFRESH_MODULES.items()}
+        self.slots = {platform: threading.BoundedSemaphore(get_platform_concurrency(platform))
+                      for platform in REFRESH_MODULES}
+        self.browser_pool = get_browser_pool()
+        self.jobs = get_job_manager()
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.stats = {platform: {'refreshes': 0, 'failures': 0, 'seconds': 0.0} for platform in REFRESH_MODULES}
+
+    def warm(self):
+        """Start the browsers up front so the first CodeChef/Codolio refresh doesn't pay for it"""
+        try:
+            self.browser_pool.warm()
+        except Exception as e:
+            logger.warning(f"[Daemon] Could not warm browsers: {e}")
+
+    def refresh(self, platform, student_id, username=None):
+        """(HTTP status, response dict) for one refresh"""
+        module = self.modules.get(platform)
+        if module is None:
+            return 404, {'success': False, 'error': f"Unknown platform '{platform}'"}
+        if not student_id:
+            return 400, {'success': False, 'error': 'studentId is required'}
+
+        started = time.monotonic()
+        data, error, error_details = None, None, None
+        with self.slots[platform]:
+            try:
+                data = module.refresh_student_platform(student_id, username, db=self.db)
+            except RefreshFailed as e:
+                logger.warning(f"[Daemon] {platform} refresh for {student_id} failed: {e}")
+                error, error_details = str(e), e.details
+            except Exception as e:
+                logger.exception(f"[Daemon] {platform} refresh for {student_id} failed")
+                error = str(e)
+        elapsed = time.monotonic() - started
+
+        success = bool(data)
+        with self.lock:
+            stats = self.stats[platform]
+            stats['refreshes'] += 1
+            stats['seconds'] += elapsed
+            if not success:
+                stats['failures'] += 1
+
+        return 200, {
+            'success': success,
+            'platform': platform,
+            'studentId': student_id,
+            'username': (data or {}).get('username', username) if isinstance(data, dict) else username,
+            'data': data if isinstance(data, dict) else None,
+            'error': error or (None if success else f"{platform} refresh failed, see daemon log"),
+            'errorDetails': error_details,
+            'durationMs': round(elapsed * 1000),
+        }
+
+    def scrape_all(self):
+        """Job body for /jobs/scrape-all"""
+        from scrape_all_students import scrape_all_students
+        return {'success': True, **scrape_all_students(self.db.students)}
+
+    def refresh_batch(self, platform, student_ids=None, batch=None):
+        """Job body for /jobs/refresh-batch/<platform>"""
+        from batch_refresh import refresh_batch
+        return refresh_batch(platform, student_ids=student_ids, batch=batch, db=self.db, slots=self.slots[platform])
+
+    def submit(self, kind, platform=None, student_id=None, username=None, student_ids=None, batch=None):
+        """(HTTP status, response dict) for a queued job"""
+        if kind == 'scrape-all':
+            # A second trigger while a full sweep is queued or running gets that sweep's job
+            job, created = self.jobs.submit_once('scrape-all', None, self.scrape_all)
+            if not created:
+                logger.info(f"[Daemon] scrape-all already {job.status} as job {job.id}")
+        elif platform not in self.modules:
+            return 404, {'success': False, 'error': f"Unknown platform '{platform}'"}
+        elif kind == 'refresh-batch':
+            if not student_ids and not batch:
+                return 400, {'success': False, 'error': 'studentIds or batch is required'}
+            job = self.jobs.submit('refresh-batch', platform, lambda: self.refresh_batch(platform, student_ids, batch),
+                                   studentIds=student_ids, batch=batch)
+        elif not student_id:
+            return 400, {'success': False, 'error': 'studentId is required'}
+        else:
+            job = self.jobs.submit('refresh', platform, lambda: self.refresh(platform, student_id, username)[1],
+                                   studentId=student_id, username=username)
+        return 202, {'success': True, 'jobId': job.id, 'status': job.status}
+
+    def health(self):
+        from http_client import get_http_stats
+        from write_behind import get_write_behind
+        with self.lock:
+            refreshes = {platform: dict(values) for platform, values in self.stats.items()}
+        return {
+            'status': 'ok',
+            'uptimeSeconds': round(time.time() - self.started),
+            'refreshes': refreshes,
+            'browserPool': self.browser_pool.get_stats(),
+            'http': get_http_stats(),
+            'jobs': self.jobs.get_stats(),
+            'coalescer': self.coalescer.get_stats(),
+            'writeBehind': get_write_behind().get_stats(),
+        }
+
+    def close(self):
+        from write_behind import get_write_behind
+        self.jobs.shutdown()
+        get_write_behind().close()
+        self.browser_pool.shutdown()
+        self.client.close()
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    service = None  # set by serve()
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_events(self, job):
+        """Write job events as they arrive until the job finishes (NDJSON or SSE)"""
+        sse = 'text/event-stream' in (self.headers.get('Accept') or '')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream' if sse else 'application/x-ndjson')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        index = 0
+        try:
+            while True:
+                events = job.events_since(index, wait=JOB_EVENT_WAIT_SECONDS)
+                index += len(events)
+                for event in events:
+                    line = json.dumps(event, default=str)
+                    self.wfile.write(f"data: {line}\n\n".encode('utf-8') if sse else f"{line}\n".encode('utf-8'))
+                if not events:
+                    # Keep idle proxies from closing the stream during long scrapes
+                    self.wfile.write(b": keep-alive\n\n" if sse else b"\n")
+                self.wfile.flush()
+                if job.done() and index >= len(job.events):
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away; the job keeps running
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        if parts == ['health']:
+            self._send(200, self.service.health())
+            return
+        if len(parts) in (2, 3) and parts[0] == 'jobs' and parts[2:] in ([], ['events']):
+            job = self.service.jobs.get(parts[1])
+            if job is None:
+                self._send(404, {'success': False, 'error': 'Unknown or expired job'})
+            elif len(parts) == 3:
+                self._stream_events(job)
+            else:
+                self._send(200, job.snapshot())
+            return
+        self._send(404, {'success': False, 'error': 'Not found'})
+
+    def do_POST(self):
+        parts = self.path.strip('/').split('/')
+        is_refresh = len(parts) == 2 and parts[0] == 'refresh'
+        is_job = parts == ['jobs', 'scrape-all'] or (
+            len(parts) == 3 and parts[:2] in (['jobs', 'refresh'], ['jobs', 'refresh-batch']))
+        if not (is_refresh or is_job):
+            self._send(404, {'success': False, 'error': 'Not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send(400, {'success': False, 'error': 'Body must be JSON'})
+            return
+        if is_refresh:
+            status, payload = self.service.refresh(parts[1], body.get('studentId'), body.get('username') or None)
+        elif parts[1] == 'scrape-all':
+            status, payload = self.service.submit('scrape-all')
+        elif parts[1] == 'refresh-batch':
+            status, payload = self.service.submit('refresh-batch', parts[2], student_ids=body.get('studentIds'),
+                                                  batch=body.get('batch'))
+        else:
+            status, payload = self.service.submit('refresh', parts[2], body.get('studentId'),
+                                                  body.get('username') or None)
+        self._send(status, payload)
+
+    def log_message(self, format, *args):
+        logger.info(f"[Daemon] {self.address_string()} {format % args}")
+
+
+def serve(host=SCRAPER_DAEMON_HOST, port=SCRAPER_DAEMON_PORT):
+    service = ScraperDaemon()
+    service.warm()
+    DaemonRequestHandler.service = service
+    server = ThreadingHTTPServer((host, port), DaemonRequestHandler)
+    server.daemon_threads = True
+    logger.info(f"🚀 Scraper daemon listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Scraper daemon stopping")
+    finally:
+        server.server_close()
+        service.close()
+
+
+# ----------------------------------------------------------------------
+# Client side (used by the refresh_*.py scripts)
+# ----------------------------------------------------------------------
+
+def refresh_via_daemon(platform, student_id, username=None, timeout=None):
+    """
+    Response dict from a running daemon, or None when no daemon is listening
+    (the caller then refreshes in-process).
+    """
+    timeout = timeout or REFRESH_TIMEOUTS.get(platform, DEFAULT_REFRESH_TIMEOUT)
+    request = urllib.request.Request(
+        f"{SCRAPER_DAEMON_URL}/refresh/{platform}",
+        data=json.dumps({'studentId': student_id, 'username': username}).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        try:
+            return json.loads(e.read())
+        except ValueError:
+            return {'success': False, 'error': f"Daemon answered HTTP {e.code}"}
+    except urllib.error.URLError as e:
+        if isinstance(e.reason, (socket.timeout, TimeoutError)):
+            # The daemon has the refresh; running it again here would only duplicate it
+            return {'success': False, 'error': f"Daemon did not answer within {timeout}s"}
+        return None
+    except (socket.timeout, TimeoutError):
+        return {'success': False, 'error': f"Daemon did not answer within {timeout}s"}
+    except ConnectionError:
+        return None
+
+
+def refresh_via_daemon_cli(platform):
+    """
+    `python refresh_<platform>.py <student_id> [username]` through the daemon.
+    Exits the process when the daemon handled the refresh; returns (so the
+    script refreshes in-process) when no daemon is running.
+    """
+    if len(sys.argv) < 2 or os.getenv('SCRAPER_DAEMON_DISABLED'):
+        return
+    student_id = sys.argv[1]
+    username = sys.argv[2] if len(sys.argv) > 2 else None
+
+    result = refresh_via_daemon(platform, student_id, username)
+    if result is None:
+        return
+
+    if result.get('success'):
+        print(f"✅ {platform} data refreshed by the scraper daemon in {result.get('durationMs', 0)}ms")
+        print("\n📦 SCRAPED_DATA_JSON_START")
+        print(json.dumps({
+            'success': True,
+            'username': result.get('username'),
+            'data': result.get('data'),
+            'studentId': student_id,
+        }, default=str))
+        print("📦 SCRAPED_DATA_JSON_END\n")
+    else:
+        print(f"❌ ERROR: {result.get('error', 'refresh failed')}", file=sys.stderr)
+        if result.get('errorDetails'):
+            # Same structured failure the in-process refresh prints for the backend
+            print("\n📦 ERROR_JSON_START")
+            print(json.dumps(result['errorDetails'], default=str))
+            print("📦 ERROR_JSON_END\n")
+    sys.stdout.flush()
+    sys.exit(0 if result.get('success') else 1)
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console (the refresh modules print emoji; their
+    # own wrapper only runs when they are the main script)
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    serve()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Submission Watermarks - Per-handle state for incremental submission ingest
+Highest submission id seen + Running totals + Solved set + Per-day counts
+
+Scrapers that page a submissions API newest-first (Codeforces user.status)
+keep their running totals here, so a later scrape only downloads what is
+newer than the watermark and merges it in. State lives in the
+submission_watermarks collection once the production scheduler calls
+configure_watermark_store(); until then it is kept in memory for the
+lifetime of the process.
+"""
+
+import copy
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionWatermarkStore:
+    """
+    {platform, handle} -> {watermark, totalSubmissions, acceptedSubmissions,
+    solvedProblemIds, submissionByDate}. collection=None keeps state in memory.
+    """
+
+    def __init__(self, collection=None):
+        self.collection = collection
+        self.memory = {}
+        self.lock = threading.Lock()
+        if collection is not None:
+            try:
+                collection.create_index([('platform', 1), ('handle', 1)], unique=True)
+            except Exception as e:
+                logger.warning(f"Could not ensure submission_watermarks index: {e}")
+
+    @staticmethod
+    def _key(platform, handle):
+        return platform, (handle or '').strip().lower()
+
+    def get(self, platform, handle):
+        """Stored state (a copy the caller may modify) or None"""
+        platform, handle = self._key(platform, handle)
+        if self.collection is None:
+            with self.lock:
+                return copy.deepcopy(self.memory.get((platform, handle)))
+        try:
+            return self.collection.find_one(
+                {'platform': platform, 'handle': handle},
+                {'_id': 0, 'platform': 0, 'handle': 0}
+            )
+        except Exception as e:
+            logger.error(f"Failed to read watermark for {platform}/{handle}: {e}")
+            return None
+
+    def save(self, platform, handle, state):
+        platform, handle = self._key(platform, handle)
+        state = {**state, 'updatedAt': datetime.utcnow()}
+        if self.collection is None:
+            with self.lock:
+                self.memory[(platform, handle)] = copy.deepcopy(state)
+            return
+        try:
+            self.collection.update_one(
+                {'platform': platform, 'handle': handle},
+                {'$set': state},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to save watermark for {platform}/{handle}: {e}")
+
+    def reset(self, platform, handle):
+        """Forget a handle so its next scrape downloads everything again"""
+        platform, handle = self._key(platform, handle)
+        if self.collection is None:
+            with self.lock:
+                self.memory.pop((platform, handle), None)
+            return
+        try:
+            self.collection.delete_one({'platform': platform, 'handle': handle})
+        except Exception as e:
+            logger.error(f"Failed to reset watermark for {platform}/{handle}: {e}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def configure_watermark_store(collection):
+    """Persist watermarks in a MongoDB collection (call once at startup)"""
+    global _store
+    with _store_lock:
+        _store = SubmissionWatermarkStore(collection)
+        return _store
+
+
+def get_watermark_store():
+    """Process-wide SubmissionWatermarkStore (in-memory until configured)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SubmissionWatermarkStore()
+        return _store
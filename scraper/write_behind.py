@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Write Behind - Buffered MongoDB writes for the scrapers
+$set updates coalesced per document + Log inserts + Unordered bulk flushes + Backpressure
+
+Every scraped student used to cost a students.update_one and a
+scraper_logs.insert_one round trip of its own. Writes now go into a buffer
+that a background thread flushes as one unordered bulk_write per collection
+(UpdateOne for $set updates, InsertOne for log entries) whenever
+WRITE_BEHIND_BATCH_SIZE writes are pending or WRITE_BEHIND_FLUSH_SECONDS
+have passed:
+
+    writes = get_write_behind()
+    writes.update(db.students, {'_id': student_id}, {'platforms.leetcode': data})
+    writes.insert(db.scraper_logs, log_entry)
+    result = writes.update(db.students, {'_id': student_id}, fields, wait=True)  # read-your-writes
+
+Several pending updates to the same document are merged into one $set (later
+fields win). When Mongo falls behind and WRITE_BEHIND_MAX_PENDING writes are
+waiting, callers block until a flush makes room instead of growing the
+buffer without bound. Failed flushes are retried a few times; close() (also
+registered with atexit) flushes whatever is left.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '200'))
+WRITE_BEHIND_FLUSH_SECONDS = float(os.getenv('WRITE_BEHIND_FLUSH_SECONDS', '2'))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv('WRITE_BEHIND_MAX_PENDING', '5000'))
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv('WRITE_BEHIND_MAX_RETRIES', '3'))
+
+# How long a flush waits for more writes once someone is waiting on theirs (group commit)
+SYNC_LINGER_SECONDS = 0.05
+
+
+class PendingWrite:
+    """Handle for a buffered write; wait() blocks until it has been flushed"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        return self
+
+    def finish(self, error=None):
+        self.error = error
+        self.done.set()
+
+    # Same shape as pymongo's UpdateResult for callers that check it
+    @property
+    def matched_count(self):
+        return 1 if self.done.is_set() and self.error is None else 0
+
+    @property
+    def modified_count(self):
+        return self.matched_count
+
+
+class WriteBehind:
+    """Pending $set updates keyed by (collection, _id) and pending inserts per collection"""
+
+    def __init__(self, batch_size=WRITE_BEHIND_BATCH_SIZE, flush_seconds=WRITE_BEHIND_FLUSH_SECONDS,
+                 max_pending=WRITE_BEHIND_MAX_PENDING):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.collections = {}
+        self.updates = {}   # (collection name, _id) -> {'fields', 'filter', 'upsert', 'waiters', 'attempts'}
+        self.inserts = {}   # collection name -> [{'document', 'waiters', 'attempts'}]
+        self.flushing = 0   # operations taken by a flush that hasn't finished yet
+        self.urgent = False
+        self.closed = False
+        self.changed = threading.Condition()
+        self.stats = {'updates': 0, 'coalesced': 0, 'inserts': 0, 'flushes': 0, 'operations': 0,
+                      'errors': 0, 'blocked_seconds': 0.0, 'flush_seconds': 0.0}
+        self.thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self.thread.start()
+
+    def _pending(self):
+        return len(self.updates) + sum(len(docs) for docs in self.inserts.values())
+
+    def _admit(self, collection, wait):
+        """Block while the buffer plus the running flush are full (called with the lock held)"""
+        if self.closed:
+            raise RuntimeError('write-behind buffer is closed')
+        if self._pending() + self.flushing >= self.max_pending:
+            started = time.monotonic()
+            while self._pending() + self.flushing >= self.max_pending and not self.closed:
+                self.changed.notify_all()
+                self.changed.wait(1)
+            self.stats['blocked_seconds'] += time.monotonic() - started
+        self.collections[collection.full_name] = collection
+        if wait:
+            self.urgent = True
+
+    def update(self, collection, filter, fields, upsert=False, wait=False):
+        """Buffer {'$set': fields} on the document matching filter ({'_id': ...}). Returns a PendingWrite"""
+        waiter = PendingWrite()
+        with self.changed:
+            self._admit(collection, wait)
+            key = (collection.full_name, filter['_id'])
+            entry = self.updates.get(key)
+            if entry is None:
+                self.updates[key] = {'filter': dict(filter), 'fields': dict(fields), 'upsert': upsert,
+                                     'waiters': [waiter], 'attempts': 0}
+            else:
+                entry['fields'].update(fields)
+                entry['upsert'] = entry['upsert'] or upsert
+                entry['waiters'].append(waiter)
+                self.stats['coalesced'] += 1
+            self.stats['updates'] += 1
+            if wait or self._pending() >= self.batch_size:
+                self.changed.notify_all()
+        return waiter.wait() if wait else waiter
+
+    def insert(self, collection, document, wait=False):
+        """Buffer an insert (log entries). Returns a PendingWrite"""
+        waiter = PendingWrite()
+        with self.changed:
+            self._admit(collection, wait)
+            self.inserts.setdefault(collection.full_name, []).append(
+                {'document': document, 'waiters': [waiter], 'attempts': 0})
+            self.stats['inserts'] += 1
+            if wait or self._pending() >= self.batch_size:
+                self.changed.notify_all()
+        return waiter.wait() if wait else waiter
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            with self.changed:
+                deadline = time.monotonic() + self.flush_seconds
+                while not self.closed and not self.urgent and self._pending() < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.changed.wait(remaining)
+                closed = self.closed
+            if not closed and self.urgent:
+                time.sleep(SYNC_LINGER_SECONDS)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception(f"[WriteBehind] Flush failed: {e}")
+            if closed:
+                return
+
+    def _take(self):
+        """Swap out everything pending (called with the lock held)"""
+        updates, inserts = self.updates, self.inserts
+        self.flushing += self._pending()
+        self.updates, self.inserts = {}, {}
+        self.urgent = False
+        return updates, inserts
+
+    def flush(self):
+        """Write everything pending now, one unordered bulk operation per collection"""
+        with self.changed:
+            taken = self._pending()
+            updates, inserts = self._take()
+            collections = dict(self.collections)
+        if not taken:
+            return
+
+        started = time.monotonic()
+        by_collection = {}
+        for (name, _), entry in updates.items():
+            by_collection.setdefault(name, []).append(
+                (UpdateOne(entry['filter'], {'$set': entry['fields']}, upsert=entry['upsert']), entry))
+        for name, entries in inserts.items():
+            by_collection.setdefault(name, []).extend((InsertOne(entry['document']), entry) for entry in entries)
+
+        retry = []
+        try:
+            for name, operations in by_collection.items():
+                retry.extend(self._write(collections[name], name, operations))
+        finally:
+            with self.changed:
+                self.flushing -= taken
+                self.stats['flushes'] += 1
+                self.stats['operations'] += taken
+                self.stats['flush_seconds'] += time.monotonic() - started
+                self._requeue(retry)
+                self.changed.notify_all()  # room for blocked writers
+
+    def _write(self, collection, name, operations):
+        """Run one bulk write; returns the (name, entry) pairs to retry"""
+        failed = {}
+        try:
+            collection.bulk_write([operation for operation, _ in operations], ordered=False)
+        except BulkWriteError as e:
+            # Per-document errors (validation, duplicate keys) won't succeed on a retry
+            for error in e.details.get('writeErrors', []):
+                failed[error['index']] = error.get('errmsg', 'write failed')
+            logger.error(f"[WriteBehind] {len(failed)} of {len(operations)} writes to {name} failed")
+        except Exception as e:
+            logger.error(f"[WriteBehind] Bulk write of {len(operations)} operations to {name} failed: {e}")
+            retry = []
+            for _, entry in operations:
+                entry['attempts'] += 1
+                if entry['attempts'] < WRITE_BEHIND_MAX_RETRIES and not self.closed:
+                    retry.append((name, entry))
+                else:
+                    self._finish(entry, str(e))
+            return retry
+
+        for index, (_, entry) in enumerate(operations):
+            self._finish(entry, failed.get(index))
+        return []
+
+    def _finish(self, entry, error=None):
+        if error is not None:
+            with self.changed:
+                self.stats['errors'] += 1
+        for waiter in entry['waiters']:
+            waiter.finish(error)
+
+    def _requeue(self, retry):
+        """Put failed writes back under anything newer (called with the lock held)"""
+        for name, entry in retry:
+            if 'document' in entry:
+                self.inserts.setdefault(name, []).insert(0, entry)
+                continue
+            key = (name, entry['filter']['_id'])
+            newer = self.updates.get(key)
+            if newer is not None:
+                entry['fields'].update(newer['fields'])
+                entry['upsert'] = entry['upsert'] or newer['upsert']
+                entry['waiters'].extend(newer['waiters'])
+            self.updates[key] = entry
+
+    def close(self):
+        """Flush everything and stop the flusher thread"""
+        with self.changed:
+            if self.closed:
+                return
+            self.closed = True
+            self.changed.notify_all()
+        self.thread.join(timeout=30)
+        self.flush()
+
+    def get_stats(self):
+        with self.changed:
+            stats = dict(self.stats)
+            stats['pending'] = self._pending()
+        stats['blocked_seconds'] = round(stats['blocked_seconds'], 2)
+        flush_seconds = stats.pop('flush_seconds')
+        stats['avg_flush_ms'] = round(flush_seconds / stats['flushes'] * 1000, 1) if stats['flushes'] else 0.0
+        return stats
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_write_behind():
+    """Process-wide WriteBehind, flushed at interpreter exit"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehind()
+            atexit.register(_writer.close)
+        return _writer